@@ -3,6 +3,7 @@ from fastapi import APIRouter, Form
 from fastapi.responses import JSONResponse
 from api.models import Enroll
 from database.connection import get_pool
+from app.config import CAMERA_INGEST_ENABLED
 
 router = APIRouter()
 
@@ -12,6 +13,9 @@ async def enroll_identity(
     gate: str = Form(...),
     roll: str = Form(...),
     location: Optional[str] = Form(None),
+    stream_url: Optional[str] = Form(None),
+    detector_imgsz: Optional[int] = Form(None),
+    detector_two_pass: bool = Form(False),
 ):
     """
     Enroll a camera for an organization at a specific gate and role.
@@ -33,6 +37,19 @@ async def enroll_identity(
     
     location : str, optional
         Physical location description of the camera. Default: None.
+    
+    stream_url : str, optional
+        RTSP URL or video file the server reads frames from when camera
+        ingestion is enabled. Default: None.
+    
+    detector_imgsz : int, optional
+        Detector input size for this camera, a multiple of 32 (e.g. 320 for
+        close-range turnstile cameras, 1280 for wide lobby cameras).
+        Default: None (DETECT_IMGSZ).
+    
+    detector_two_pass : bool, optional
+        Refine first-pass detections on high-resolution crops around them,
+        for wide cameras with small faces. Default: False.
 
     Returns
     -------
@@ -46,6 +63,15 @@ async def enroll_identity(
     HTTPException
         If organization doesn't exist, camera already exists, or database operation fails.
     """
+    from app.metadata_cache import get_metadata_cache
+    from app.camera import get_camera_ingestor
+
+    if detector_imgsz is not None and (detector_imgsz % 32 or not 32 <= detector_imgsz <= 4096):
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"detector_imgsz must be a multiple of 32 between 32 and 4096, got {detector_imgsz}.",
+        })
+
     try:
         organization_name = organization_name.lower()
         pool = await get_pool()
@@ -81,10 +107,13 @@ async def enroll_identity(
 
         async with pool.acquire() as conn:
             row = await conn.fetchrow("""
-                INSERT INTO cameras (roll, client_id, gate, camera_location)
-                VALUES ($1, $2, $3, $4)
+                INSERT INTO cameras (roll, client_id, gate, camera_location, stream_url, detector_imgsz, detector_two_pass)
+                VALUES ($1, $2, $3, $4, $5, $6, $7)
                 RETURNING id
-            """, roll, int(organization_id), gate, location)
+            """, roll, int(organization_id), gate, location, stream_url, detector_imgsz, detector_two_pass)
+        get_metadata_cache().invalidate_camera(int(organization_id), gate, roll)
+        if stream_url and CAMERA_INGEST_ENABLED:
+            await get_camera_ingestor().refresh()
 
         return Enroll(
             status="success",
@@ -35,6 +35,8 @@ async def enroll_client(
     HTTPException
         If organization already exists or database operation fails.
     """
+    from app.metadata_cache import get_metadata_cache
+
     try:
         name = organization_name.lower()
         pool = await get_pool()
@@ -62,6 +64,7 @@ async def enroll_client(
             """, name)
 
         client_id = str(row["id"])
+        get_metadata_cache().invalidate_organization(name)
         if CLIENT_FOLDER is None:
             raise ValueError("CLIENT_FOLDER environment variable is not set")
         
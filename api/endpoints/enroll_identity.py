@@ -4,6 +4,7 @@ from fastapi.responses import JSONResponse
 from app.config import CLIENT_FOLDER
 from api.models import Enroll
 from database.connection import get_pool
+from app.identity_directory import get_identity_directory
 
 router = APIRouter()
 
@@ -79,6 +80,7 @@ async def enroll_identity(
                 RETURNING id
             """, int(organization_id), identity_name)
 
+        get_identity_directory().add(int(organization_id), row["id"], identity_name)
         identity_id = str(row["id"])
         if CLIENT_FOLDER is None:
             raise ValueError("CLIENT_FOLDER environment variable is not set")
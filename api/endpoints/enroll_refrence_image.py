@@ -1,18 +1,27 @@
 from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-import faiss
-import pickle
+import asyncio
 import datetime
-import numpy as np
-import cv2
 import os
 
 from app.config import CLIENT_FOLDER
-from app import detect_faces, embbeding_face, crop_face, resize_face, load_faiss, read_image
+from app.executor import run_blocking, run_index_build
+from app.identity_directory import get_identity_directory
 from api.models import Enroll
-from database.connection import get_pool
 
 router = APIRouter()
+_promotion_tasks: dict = {}
+
+def _schedule_promotion(organization_id: int) -> None:
+    """Check in the background whether the tenant index should change type, unless a check is already pending."""
+    from app.index_builder import maybe_promote
+
+    task = _promotion_tasks.get(organization_id)
+    if task is not None and not task.done():
+        return
+    task = asyncio.create_task(run_index_build(maybe_promote, organization_id))
+    _promotion_tasks[organization_id] = task
+    task.add_done_callback(lambda _: _promotion_tasks.pop(organization_id, None))
 
 @router.post("/enroll_refrence_iamge", response_model=Enroll)
 async def identify_image(
@@ -51,43 +60,41 @@ async def identify_image(
     HTTPException
         If organization or identity not found, or image processing fails.
     """
+    import cv2
+    import numpy as np
+    from app import detect_faces, embbeding_face, crop_face, resize_face, read_upload, decode_image
+    from app.journal import append_embeddings
+    from app.metadata_cache import get_metadata_cache
+
     if not CLIENT_FOLDER:
         raise ValueError("CLIENT_FOLDER is not set or is None")
 
-    pool = await get_pool()
-    if pool is None:
-        raise ValueError("Database connection pool is not available")
-
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT id
-            FROM clients
-            WHERE organization_name = $1
-        """, organization_name)
-    
-    if row is None:
+    organization_id = await get_metadata_cache().get_organization_id(organization_name)
+    if organization_id is None:
         return JSONResponse(status_code=400, content={
             "status": "error",
             "message": f"organization '{organization_name}' is not enrolled, please enroll organization and then try again",
         })
-    organization_id = int(row["id"])
-
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT id
-            FROM identities
-            WHERE full_name = $1 and client_id = $2
-        """, identity_name, organization_id)
-    
-    if row is None:
+
+    identity_id = await get_identity_directory().get_id(organization_id, identity_name)
+    if identity_id is None:
         return JSONResponse(status_code=400, content={
             "status": "error",
             "message": f"identity '{identity_name}' is not in organization '{organization_name}'.",
             "faces": []
         })
-    identity_id = row["id"]
 
-    img = await read_image(image)
+    try:
+        image_bytes = await read_upload(image)
+    except ValueError as e:
+        return JSONResponse(status_code=413, content={
+            "status": "error",
+            "message": f"Image rejected: {e}",
+            "faces": []
+        })
+
+    # Reference faces are cropped from the full-resolution image
+    img = await decode_image(image_bytes)
     if img is None:
         return JSONResponse(status_code=400, content={
             "status": "error",
@@ -99,9 +106,6 @@ async def identify_image(
         if CLIENT_FOLDER is None:
             raise ValueError("CLIENT_FOLDER environment variable is not set")
         
-        faiss_path = os.path.join(CLIENT_FOLDER, str(organization_id), "weights", f"client_{organization_id}.faiss")
-        label_path = os.path.join(CLIENT_FOLDER, str(organization_id), "weights", f"client_{organization_id}.pkl")
-        faiss_index, labels = load_faiss(faiss_path, label_path)
         boxes, rec_time = await detect_faces(img)
 
         if len(boxes) != 1:
@@ -117,20 +121,17 @@ async def identify_image(
         cropped_face, _ = crop_face(img, box)
         resized_face, _ = resize_face(cropped_face)
 
-        # === Save reference image ===
+        # === Embedding ===
+        embedding, emb_time = await embbeding_face(resized_face)
+
+        # === Save reference image and index it under one tenant lock ===
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
         img_name = f"{timestamp}.jpg"
         img_path = os.path.join(CLIENT_FOLDER, str(organization_id), "images", str(identity_id), img_name)
-        cv2.imwrite(img_path, resized_face)
-
-        # === Embedding and Indexing ===
-        embedding, emb_time = await embbeding_face(resized_face)
-        faiss_index.add(x=np.expand_dims(embedding, axis=0))
-        labels.append(identity_id)
-
-        faiss.write_index(faiss_index, faiss_path)
-        with open(label_path, "wb") as f:
-            pickle.dump(labels, f)
+        _, encoded = await run_blocking(cv2.imencode, ".jpg", resized_face)
+        await run_blocking(append_embeddings, organization_id, np.expand_dims(embedding, axis=0), [identity_id],
+                           [(img_path, encoded.tobytes())])
+        _schedule_promotion(organization_id)
 
         return Enroll(
             status="success",
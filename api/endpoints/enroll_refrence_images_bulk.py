@@ -0,0 +1,265 @@
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import JSONResponse
+from typing import BinaryIO, List, Optional
+import asyncio
+import datetime
+import zipfile
+import os
+
+from app.config import CLIENT_FOLDER, BULK_ENROLL_MAX_IMAGES, BULK_ENROLL_CHUNK, BULK_ENROLL_MAX_BYTES, MAX_UPLOAD_BYTES
+from app.executor import run_blocking
+from app.identity_directory import get_identity_directory
+from api.endpoints.enroll_refrence_image import _schedule_promotion
+from api.models import BulkEnroll
+
+router = APIRouter()
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+def _list_archive(archive_file: BinaryIO, max_images: int) -> list[tuple[str, zipfile.ZipInfo]]:
+    """
+    List the images of a zip archive as (identity_name, entry), without extracting them.
+
+    The identity of an image is the top-level folder it is stored in,
+    e.g. ``John Doe/front.jpg``. Other files are ignored.
+
+    Raises
+    ------
+    ValueError
+        If the archive holds more than ``max_images`` images, or its images
+        of at most MAX_UPLOAD_BYTES add up to more than BULK_ENROLL_MAX_BYTES.
+    """
+    entries = []
+    total_bytes = 0
+    with zipfile.ZipFile(archive_file) as archive:
+        for info in archive.infolist():
+            parts = info.filename.strip("/").split("/")
+            if info.is_dir() or len(parts) < 2 or not info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            if len(entries) >= max_images:
+                raise ValueError(f"archive holds more than {max_images} images")
+            # Oversized entries are reported per file and never extracted
+            if info.file_size <= MAX_UPLOAD_BYTES:
+                total_bytes += info.file_size
+                if total_bytes > BULK_ENROLL_MAX_BYTES:
+                    raise ValueError(f"archive images decompress to more than {BULK_ENROLL_MAX_BYTES} bytes")
+            entries.append((parts[0], info))
+    return entries
+
+def _read_members(archive_file: BinaryIO, entries: list[zipfile.ZipInfo]) -> list[bytes]:
+    """Extract archive entries; zipfile never decompresses more than an entry's declared size."""
+    with zipfile.ZipFile(archive_file) as archive:
+        return [archive.read(info) for info in entries]
+
+def _file_size(file: BinaryIO) -> int:
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size
+
+async def _load_chunk(chunk: list, archive: Optional[UploadFile]) -> list[Optional[bytes]]:
+    """
+    Bytes of one chunk of ``(name, file_name, source)`` items, None for images larger than MAX_UPLOAD_BYTES.
+
+    A source is either a multipart UploadFile or a ZipInfo of ``archive``.
+    """
+    from app import read_upload
+
+    data = []
+    for _, _, source in chunk:
+        if isinstance(source, zipfile.ZipInfo):
+            data.append(None)
+            continue
+        try:
+            data.append(await read_upload(source))
+        except ValueError:
+            data.append(None)
+
+    members = [(i, source) for i, (_, _, source) in enumerate(chunk)
+               if isinstance(source, zipfile.ZipInfo) and source.file_size <= MAX_UPLOAD_BYTES]
+    if members:
+        extracted = await run_blocking(_read_members, archive.file, [info for _, info in members])
+        for (i, _), member_data in zip(members, extracted):
+            data[i] = member_data
+    return data
+
+@router.post("/enroll_refrence_images", response_model=BulkEnroll)
+async def enroll_refrence_images(
+    organization_name: str = Form(...),
+    identity_name: List[str] = Form([]),
+    images: List[UploadFile] = File([]),
+    archive: Optional[UploadFile] = File(None)
+):
+    """
+    Enroll many reference images of existing identities in one request.
+
+    Images are sent either as a multipart list, where the i-th
+    ``identity_name`` labels the i-th image, or as a zip ``archive`` with one
+    top-level folder per identity name. They are read, decoded, detected and
+    embedded in chunks of BULK_ENROLL_CHUNK images, so only one chunk of
+    image bytes is held at a time, and every accepted embedding is committed
+    to the organization's index with a single journal append.
+
+    Parameters
+    ----------
+    organization_name : str
+        Name of the organization the identities belong to.
+
+    identity_name : list of str, optional
+        Full name of the identity of each image in ``images``.
+
+    images : list of UploadFile, optional
+        Reference images containing exactly one face. Supported formats: JPEG, PNG.
+
+    archive : UploadFile, optional
+        Zip archive of ``<identity_name>/<image>`` files, at most
+        BULK_ENROLL_MAX_BYTES large compressed and decompressed.
+
+    Returns
+    -------
+    BulkEnroll
+        Response containing:
+        - status: str - "success" or "error"
+        - message: str - Description of enrollment result or error details
+        - enrolled: int - Number of reference images added to the index
+        - failed: List[dict] - file, identity_name and reason of every rejected
+          image (unknown identity, too large, undecodable, no face or multiple faces)
+
+    Raises
+    ------
+    HTTPException
+        If the organization is not found or the request is malformed.
+    """
+    import cv2
+    import numpy as np
+    from app import detect_faces_batch, embbeding_faces_batch, crop_face, resize_face, decode_image
+    from app.journal import append_embeddings
+    from app.metadata_cache import get_metadata_cache
+
+    if not CLIENT_FOLDER:
+        raise ValueError("CLIENT_FOLDER is not set or is None")
+
+    organization_id = await get_metadata_cache().get_organization_id(organization_name)
+    if organization_id is None:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"organization '{organization_name}' is not enrolled, please enroll organization and then try again",
+            "enrolled": 0,
+            "failed": []
+        })
+
+    if len(images) != len(identity_name):
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"got {len(images)} image(s) and {len(identity_name)} identity_name(s); one identity_name is required per image.",
+            "enrolled": 0,
+            "failed": []
+        })
+
+    items = [(name, image.filename, image) for name, image in zip(identity_name, images)]
+    if archive is not None:
+        try:
+            archive_bytes = await run_blocking(_file_size, archive.file)
+            if archive_bytes > BULK_ENROLL_MAX_BYTES:
+                raise ValueError(f"archive of {archive_bytes} bytes exceeds the {BULK_ENROLL_MAX_BYTES} byte limit")
+            entries = await run_blocking(_list_archive, archive.file, BULK_ENROLL_MAX_IMAGES)
+            items += [(name, info.filename, info) for name, info in entries]
+        except (zipfile.BadZipFile, ValueError) as e:
+            return JSONResponse(status_code=400, content={
+                "status": "error",
+                "message": f"Invalid archive: {e}",
+                "enrolled": 0,
+                "failed": []
+            })
+
+    if not items or len(items) > BULK_ENROLL_MAX_IMAGES:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"expected between 1 and {BULK_ENROLL_MAX_IMAGES} images, got {len(items)}.",
+            "enrolled": 0,
+            "failed": []
+        })
+
+    identity_directory = get_identity_directory()
+    identity_ids = {}
+    for name in {name for name, _, _ in items}:
+        identity_ids[name] = await identity_directory.get_id(organization_id, name)
+
+    failed = []
+    embeddings = []
+    labels = []
+    reference_images = []
+    try:
+        for start in range(0, len(items), BULK_ENROLL_CHUNK):
+            known = []
+            for name, file_name, source in items[start:start + BULK_ENROLL_CHUNK]:
+                if identity_ids[name] is None:
+                    failed.append({"file": file_name, "identity_name": name,
+                                   "reason": f"identity '{name}' is not in organization '{organization_name}'."})
+                else:
+                    known.append((name, file_name, source))
+
+            chunk = []
+            for (name, file_name, _), data in zip(known, await _load_chunk(known, archive)):
+                if data is None:
+                    failed.append({"file": file_name, "identity_name": name,
+                                   "reason": f"Image is larger than {MAX_UPLOAD_BYTES} bytes."})
+                else:
+                    chunk.append((name, file_name, data))
+
+            decoded = await asyncio.gather(*(decode_image(data) for _, _, data in chunk))
+            accepted = []
+            for (name, file_name, _), img in zip(chunk, decoded):
+                if img is None:
+                    failed.append({"file": file_name, "identity_name": name,
+                                   "reason": "Failed to decode the image. File may be corrupted or unsupported."})
+                else:
+                    accepted.append((name, file_name, img))
+            if not accepted:
+                continue
+
+            # === Detection, preprocessing and embedding of the chunk ===
+            detections = await detect_faces_batch([img for _, _, img in accepted])
+            faces = []
+            for (name, file_name, img), (boxes, _) in zip(accepted, detections):
+                if len(boxes) != 1:
+                    failed.append({"file": file_name, "identity_name": name,
+                                   "reason": f"Expected 1 face, but found {len(boxes)}"})
+                    continue
+                cropped_face, _ = crop_face(img, boxes[0])
+                resized_face, _ = resize_face(cropped_face)
+                faces.append((name, resized_face))
+            if not faces:
+                continue
+
+            chunk_embeddings, _ = await embbeding_faces_batch([face for _, face in faces])
+
+            # === Encode reference images, saved together with the index commit ===
+            timestamp = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S-%f")
+            for i, (name, face) in enumerate(faces):
+                img_path = os.path.join(CLIENT_FOLDER, str(organization_id), "images", str(identity_ids[name]), f"{timestamp}_{i}.jpg")
+                _, encoded = await run_blocking(cv2.imencode, ".jpg", face)
+                reference_images.append((img_path, encoded.tobytes()))
+
+            embeddings.append(chunk_embeddings)
+            labels += [identity_ids[name] for name, _ in faces]
+
+        # === One index commit for the whole request ===
+        if labels:
+            await run_blocking(append_embeddings, organization_id, np.concatenate(embeddings), labels, reference_images)
+            _schedule_promotion(organization_id)
+
+        return BulkEnroll(
+            status="success" if labels else "error",
+            message=f"{len(labels)} of {len(items)} reference image(s) enrolled.",
+            enrolled=len(labels),
+            failed=failed
+        )
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={
+            "status": "failed",
+            "message": f"Enrollment failed: {e}",
+            "enrolled": 0,
+            "failed": failed
+        })
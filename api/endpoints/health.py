@@ -0,0 +1,46 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.warmup import get_warmup
+
+router = APIRouter()
+
+@router.get("/health/live")
+async def liveness() -> JSONResponse:
+    """
+    Liveness probe.
+
+    Answers as soon as the server accepts connections, while models are still
+    warming up. Fails only when a required startup component (database,
+    models) failed, since the process would then never become ready and
+    should be restarted.
+
+    Returns
+    -------
+    JSONResponse
+        200 with ``{"status": "alive"}``, or 503 with the startup errors.
+    """
+    warmup = get_warmup()
+    if warmup.failed:
+        return JSONResponse(status_code=503, content={"status": "failed", "errors": warmup.errors})
+    return JSONResponse(status_code=200, content={"status": "alive"})
+
+@router.get("/health/ready")
+async def readiness() -> JSONResponse:
+    """
+    Readiness probe.
+
+    Ready once the database pool is open and every model has been loaded and
+    has run a warm-up inference; load balancers should only route traffic to
+    the instance from then on.
+
+    Returns
+    -------
+    JSONResponse
+        200 when ready, 503 otherwise. The body holds the state of each
+        startup component (database, models, indices), errors and durations.
+    """
+    warmup = get_warmup()
+    stats = warmup.stats()
+    stats["status"] = "ready" if warmup.ready else "not_ready"
+    return JSONResponse(status_code=200 if warmup.ready else 503, content=stats)
@@ -1,11 +1,11 @@
+import time
 from fastapi import APIRouter, UploadFile, File, Form
 from fastapi.responses import JSONResponse
-import numpy as np
-import cv2
 
-from app import get_id, read_image
+from app.config import RESULT_CACHE_LOG_HITS
+from app.access_log import get_access_log_writer
+from app.metrics import observe_frame
 from api.models import IdentifyResponse, FaceInfo
-from database.connection import get_pool
 
 router = APIRouter()
 
@@ -51,71 +51,63 @@ async def identify_image(
     HTTPException
         If organization or camera not found, or image processing fails.
     """
-    pool = await get_pool()
-    if pool is None:
-        raise ValueError("Database connection pool is not available")
+    from app import read_upload
+    from app.result_cache import get_id_cached
+    from app.metadata_cache import get_metadata_cache
 
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT id
-            FROM clients
-            WHERE organization_name = $1
-        """, organization_name)
-    
-    if row is None:
+    start = time.perf_counter()
+    organization_id, camera_id = await get_metadata_cache().resolve(organization_name, camera_gate, camera_roll)
+    if organization_id is None:
         return JSONResponse(status_code=400, content={
             "status": "error",
             "message": f"organization '{organization_name}' is not enrolled, please enroll organization and then try again",
             "faces": []
         })
-    organization_id = int(row["id"])
 
-    async with pool.acquire() as conn:
-        row = await conn.fetchrow("""
-            SELECT id
-            FROM cameras
-            WHERE client_id = $1 and gate = $2 and roll = $3
-        """, organization_id, camera_gate, camera_roll)
-    
-    if row is None:
+    if camera_id is None:
         return JSONResponse(status_code=400, content={
             "status": "error",
             "message": f"organization '{organization_name}' don`t have any camera in gate: '{camera_gate}' for roll: '{camera_roll}'.",
             "faces": []
         })
-    camera_id = row["id"]
 
-    img = await read_image(image)
-    if img is None:
+    try:
+        image_bytes = await read_upload(image)
+    except ValueError as e:
+        return JSONResponse(status_code=413, content={
+            "status": "error",
+            "message": f"Image rejected: {e}",
+            "faces": []
+        })
+
+    detector_settings = get_metadata_cache().detector_settings(camera_id)
+    result, cached = await get_id_cached(image_bytes, organization_id, detector_settings)
+    if result is None:
         return JSONResponse(status_code=400, content={
             "status": "error",
             "message": "Failed to decode the image. File may be corrupted or unsupported.",
             "faces": []
         })
 
-    result = await get_id(img, organization_id)
+    observe_frame(organization_id, camera_id, result, time.perf_counter() - start, cached)
     if result["status"] != "success":
         return JSONResponse(status_code=500, content=result["message"])
 
     face_outputs = []
-    async with pool.acquire() as conn:
-        for face in result["faces"]:
-            if face.get("status") == "ok":
-                row = await conn.fetchrow("SELECT id FROM identities WHERE full_name = $1", face.get("label"))
-                person_id = row["id"]
-                info = FaceInfo(
-                    status=face.get("status", "unknown"),
-                    label=face.get("label", "unknown"),
-                    confidence=float(face.get("confidence", 0.0)),
-                    detection_time=face.get("detection_time"),
-                    embbeding_time=face.get("embbeding_time"),
-                    total_time=face.get("total_time")
-                )
-                face_outputs.append(info)
-                row = await conn.execute("""
-                    INSERT INTO access_logs (identity_id, camera_id, detection_confidence, processing_time_ms)
-                    VALUES ($1, $2, $3, $4)
-                """, person_id, camera_id, float(info.confidence), float(info.total_time.split(' ')[0]))
+    access_log_writer = get_access_log_writer()
+    for face in result["faces"]:
+        if face.get("status") == "ok" and face.get("identity_id") is not None:
+            info = FaceInfo(
+                status=face.get("status", "unknown"),
+                label=face.get("label", "unknown"),
+                confidence=float(face.get("confidence", 0.0)),
+                detection_time=face.get("detection_time"),
+                embbeding_time=face.get("embbeding_time"),
+                total_time=face.get("total_time")
+            )
+            face_outputs.append(info)
+            if not cached or RESULT_CACHE_LOG_HITS:
+                access_log_writer.enqueue(face["identity_id"], camera_id, info.confidence, face["total_time_ms"])
 
     return IdentifyResponse(
         status=result["status"],
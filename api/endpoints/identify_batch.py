@@ -0,0 +1,147 @@
+import time
+import asyncio
+from typing import List
+from fastapi import APIRouter, UploadFile, File, Form
+from fastapi.responses import JSONResponse
+
+from app.config import IDENTIFY_BATCH_MAX_IMAGES, RESULT_CACHE_LOG_HITS
+from app.access_log import get_access_log_writer
+from app.metrics import observe_frame
+from api.models import IdentifyResponse, BatchIdentifyResponse, FaceInfo
+
+router = APIRouter()
+
+async def _identify_one(organization_id: int, camera_id: int | None, camera_gate: str, camera_roll: str,
+                        organization_name: str, image: UploadFile) -> IdentifyResponse:
+    from app import read_upload
+    from app.result_cache import get_id_cached
+    from app.metadata_cache import get_metadata_cache
+
+    if camera_id is None:
+        return IdentifyResponse(
+            status="error",
+            message=f"organization '{organization_name}' don`t have any camera in gate: '{camera_gate}' for roll: '{camera_roll}'.",
+            faces=[]
+        )
+
+    start = time.perf_counter()
+    try:
+        image_bytes = await read_upload(image)
+    except ValueError as e:
+        return IdentifyResponse(status="error", message=f"Image rejected: {e}", faces=[])
+
+    detector_settings = get_metadata_cache().detector_settings(camera_id)
+    result, cached = await get_id_cached(image_bytes, organization_id, detector_settings)
+    if result is None:
+        return IdentifyResponse(
+            status="error",
+            message="Failed to decode the image. File may be corrupted or unsupported.",
+            faces=[]
+        )
+
+    observe_frame(organization_id, camera_id, result, time.perf_counter() - start, cached)
+    face_outputs = []
+    access_log_writer = get_access_log_writer()
+    for face in result["faces"]:
+        if face.get("status") == "ok" and face.get("identity_id") is not None:
+            info = FaceInfo(
+                status=face.get("status", "unknown"),
+                label=face.get("label", "unknown"),
+                confidence=float(face.get("confidence", 0.0)),
+                detection_time=face.get("detection_time"),
+                embbeding_time=face.get("embbeding_time"),
+                total_time=face.get("total_time")
+            )
+            face_outputs.append(info)
+            if not cached or RESULT_CACHE_LOG_HITS:
+                access_log_writer.enqueue(face["identity_id"], camera_id, info.confidence, face["total_time_ms"])
+
+    return IdentifyResponse(
+        status=result["status"],
+        message=result["message"],
+        faces=face_outputs
+    )
+
+@router.post("/identify_batch", response_model=BatchIdentifyResponse)
+async def identify_batch(
+    organization_name: str = Form(...),
+    camera_gate: List[str] = Form(...),
+    camera_roll: List[str] = Form(...),
+    images: List[UploadFile] = File(...)
+):
+    """
+    Identify faces in several images of one organization and log access events.
+
+    Each image is tagged with the gate and roll of the camera that captured
+    it: the i-th ``camera_gate`` and ``camera_roll`` belong to the i-th image.
+    Images are decoded and recognized concurrently, so their detection and
+    embedding run in shared cross-image batches, and all access events are
+    handed to the access-log writer, which stores them with a single COPY.
+
+    Parameters
+    ----------
+    organization_name : str
+        Name of the organization to search against.
+
+    camera_gate : list of str
+        Gate identifier of each image's camera.
+
+    camera_roll : list of str
+        Camera role ("entry" or "exit") of each image's camera.
+
+    images : list of UploadFile
+        Image files containing faces to identify. Supported formats: JPEG, PNG.
+
+    Returns
+    -------
+    BatchIdentifyResponse
+        Response containing:
+        - status: str - "success" or "error"
+        - message: str - Description of results or error details
+        - results: List[IdentifyResponse] - Result of every image, in upload order.
+          An unknown camera or undecodable image only fails its own entry.
+
+    Raises
+    ------
+    HTTPException
+        If the organization is not found or the request is malformed.
+    """
+    from app.metadata_cache import get_metadata_cache
+
+    if not (len(images) == len(camera_gate) == len(camera_roll)):
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"got {len(images)} image(s), {len(camera_gate)} camera_gate(s) and {len(camera_roll)} camera_roll(s); one of each is required per image.",
+            "results": []
+        })
+
+    if len(images) > IDENTIFY_BATCH_MAX_IMAGES:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"at most {IDENTIFY_BATCH_MAX_IMAGES} images are accepted per request, got {len(images)}.",
+            "results": []
+        })
+
+    metadata_cache = get_metadata_cache()
+    cameras = await asyncio.gather(*(
+        metadata_cache.resolve(organization_name, gate, roll) for gate, roll in zip(camera_gate, camera_roll)
+    ))
+    organization_id = cameras[0][0]
+    if organization_id is None:
+        return JSONResponse(status_code=400, content={
+            "status": "error",
+            "message": f"organization '{organization_name}' is not enrolled, please enroll organization and then try again",
+            "results": []
+        })
+
+    results = await asyncio.gather(*(
+        _identify_one(organization_id, camera_id, gate, roll, organization_name, image)
+        for (_, camera_id), gate, roll, image in zip(cameras, camera_gate, camera_roll, images)
+    ))
+
+    succeeded = sum(result.status == "success" for result in results)
+    return BatchIdentifyResponse(
+        status="success",
+        message=f"{succeeded} of {len(results)} image(s) processed.",
+        results=list(results)
+    )
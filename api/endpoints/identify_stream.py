@@ -0,0 +1,161 @@
+import time
+import asyncio
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.config import MAX_UPLOAD_BYTES
+from app.access_log import get_access_log_writer
+from app.metrics import observe_frame
+from api.models import FaceInfo, StreamFrameResult
+
+router = APIRouter()
+
+class LatestFrame:
+    """Single-slot buffer holding the newest unprocessed frame of a connection."""
+
+    def __init__(self):
+        self.data = None
+        self.seq = 0
+        self.dropped = 0
+        self.closed = False
+        self.event = asyncio.Event()
+
+    def put(self, data: bytes) -> None:
+        """Store a frame, replacing (and counting) one that was not processed yet."""
+        if self.data is not None:
+            self.dropped += 1
+        self.data = data
+        self.seq += 1
+        self.event.set()
+
+    async def take(self):
+        """Wait for the next frame; returns (seq, bytes), or (seq, None) once closed."""
+        while self.data is None and not self.closed:
+            self.event.clear()
+            await self.event.wait()
+        data, self.data = self.data, None
+        return self.seq, data
+
+    def close(self) -> None:
+        """Wake the consumer so it can exit."""
+        self.closed = True
+        self.event.set()
+
+async def _process_frames(websocket: WebSocket, frames: LatestFrame, organization_id: int, camera_id: int) -> None:
+    from app import get_id, decode_image_reduced
+    from app.tracker import FaceTracker
+    from app.metadata_cache import get_metadata_cache
+
+    tracker = FaceTracker()
+    detector_settings = get_metadata_cache().detector_settings(camera_id)
+    access_log_writer = get_access_log_writer()
+
+    while True:
+        seq, data = await frames.take()
+        if data is None:
+            return
+
+        start = time.perf_counter()
+        if len(data) > MAX_UPLOAD_BYTES:
+            result = {"status": "error", "message": f"Frame is larger than {MAX_UPLOAD_BYTES} bytes.", "faces": []}
+        else:
+            img, scale = await decode_image_reduced(data, detector_settings.decode_side())
+            decode_ms = (time.perf_counter() - start) * 1000
+            if img is None:
+                result = {"status": "error", "message": "Failed to decode the frame.", "faces": []}
+            else:
+                result = await get_id(img, organization_id, tracker, image_bytes=data, scale=scale,
+                                      detector_settings=detector_settings)
+                result.setdefault("timings", {})["decode_ms"] = decode_ms
+                observe_frame(organization_id, camera_id, result, time.perf_counter() - start)
+
+        face_outputs = []
+        for face in result["faces"]:
+            if face.get("status") == "ok" and face.get("identity_id") is not None:
+                info = FaceInfo(
+                    status=face.get("status", "unknown"),
+                    label=face.get("label", "unknown"),
+                    confidence=float(face.get("confidence", 0.0)),
+                    detection_time=face.get("detection_time"),
+                    embbeding_time=face.get("embbeding_time"),
+                    total_time=face.get("total_time")
+                )
+                face_outputs.append(info)
+                # Tracked faces are logged when their identity is decided, not on every frame
+                if not face["reused"]:
+                    access_log_writer.enqueue(face["identity_id"], camera_id, info.confidence, face["total_time_ms"])
+
+        await websocket.send_json(StreamFrameResult(
+            frame=seq,
+            status=result["status"],
+            message=result["message"],
+            faces=face_outputs,
+            dropped=frames.dropped
+        ).model_dump())
+
+@router.websocket("/ws/identify")
+async def identify_stream(websocket: WebSocket):
+    """
+    Identify faces in a stream of frames sent over a WebSocket.
+
+    The camera authenticates once by sending a JSON text message
+    ``{"organization_name": ..., "camera_gate": ..., "camera_roll": ...}``
+    and receives ``{"status": "ready", "camera_id": ...}``. After that every
+    binary message is an encoded frame (JPEG, PNG) and every processed frame
+    is answered with a `StreamFrameResult`. Frames are processed one at a
+    time; a frame arriving while another is being processed replaces any
+    frame still waiting, so results always describe the newest input.
+
+    Faces are tracked across frames of the connection, and recognized
+    identities are written to the access logs when they are first decided.
+
+    Parameters
+    ----------
+    websocket : WebSocket
+        Client connection.
+    """
+    from app.metadata_cache import get_metadata_cache
+
+    await websocket.accept()
+
+    try:
+        hello = await websocket.receive_json()
+        organization_name = hello["organization_name"]
+        camera_gate = hello["camera_gate"]
+        camera_roll = hello["camera_roll"]
+    except (KeyError, TypeError, ValueError):
+        await websocket.send_json({
+            "status": "error",
+            "message": "First message must be JSON with organization_name, camera_gate and camera_roll.",
+        })
+        await websocket.close(code=1008)
+        return
+    except WebSocketDisconnect:
+        return
+
+    organization_id, camera_id = await get_metadata_cache().resolve(organization_name, camera_gate, camera_roll)
+    if organization_id is None or camera_id is None:
+        await websocket.send_json({
+            "status": "error",
+            "message": f"organization '{organization_name}' don`t have any camera in gate: '{camera_gate}' for roll: '{camera_roll}'.",
+        })
+        await websocket.close(code=1008)
+        return
+
+    await websocket.send_json({"status": "ready", "camera_id": camera_id})
+
+    frames = LatestFrame()
+    worker = asyncio.create_task(_process_frames(websocket, frames, organization_id, camera_id))
+    try:
+        while not worker.done():
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("bytes"):
+                frames.put(message["bytes"])
+    except WebSocketDisconnect:
+        pass
+    finally:
+        # The worker only fails when sending to a client that is gone
+        frames.close()
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+from app.metrics import render_metrics
+
+router = APIRouter()
+
+@router.get("/metrics")
+async def get_metrics() -> Response:
+    """
+    Expose service metrics in the Prometheus text format.
+
+    Includes per-stage latency histograms (decode, detect, crop, embed,
+    search) and end-to-end frame latency labeled by organization and camera,
+    database round trip times by operation, frame / face / unknown-face
+    counters, and gauges of model and FAISS index-cache state.
+
+    Returns
+    -------
+    Response
+        Metrics exposition for a Prometheus scrape.
+    """
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
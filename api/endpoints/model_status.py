@@ -1,7 +1,10 @@
 from fastapi import APIRouter, HTTPException
 from typing import Dict, Any
 
-from app.model_manager import get_model_manager
+from app.identity_directory import get_identity_directory
+from app.access_log import get_access_log_writer
+from app.executor import get_inference_executor, get_io_executor, get_index_build_executor
+from app.warmup import get_warmup
 
 router = APIRouter()
 
@@ -14,20 +17,51 @@ async def get_model_status() -> Dict[str, Any]:
     -------
     Dict[str, Any]
         Model status information including:
+        - backend: str - Inference backend ("torch" or "onnx")
+        - quantized: bool - Whether INT8-quantized models are loaded
         - yolo_model_path: str - Path to YOLO model
         - embedding_model: str - Name of embedding model
         - device: str - Device (CPU/GPU) being used
         - initialized: bool - Whether models are loaded
+        - executor: str - Inference executor kind ("thread" or "process")
+        - workers: int - Inference workers
         - cuda_available: bool - Whether CUDA is available
         - embedding_dim: int - Embedding dimension
+        - index_cache: dict - Resident FAISS index cache usage
+        - identity_directory: dict - Organizations and identities held in memory
+        - access_log: dict - Access-log queue depth, counters and flush latency
+        - metadata_cache: dict - Cached organizations and cameras, hit / miss counters
+        - cameras: dict - Per-camera ingestion state and frame counters
+        - result_cache: dict - Cached results of duplicate uploads, hit / miss counters
+        - batching: dict - Achieved detection/embedding micro-batch sizes
+        - executors: dict - Inference, I/O and index-build executor load
+        - startup: dict - Warm-up state of the database, models and preloaded indices
     """
+    from app.model_manager import get_model_info, get_batchers
+    from app.index_cache import get_index_cache
+    from app.metadata_cache import get_metadata_cache
+    from app.camera import get_camera_ingestor
+    from app.result_cache import get_result_cache
+
     try:
-        model_manager = await get_model_manager()
-        model_info = model_manager.get_model_info()
+        model_info = get_model_info()
         
         return {
             "status": "success",
             "models": model_info,
+            "index_cache": get_index_cache().stats(),
+            "identity_directory": get_identity_directory().stats(),
+            "access_log": get_access_log_writer().stats(),
+            "metadata_cache": get_metadata_cache().stats(),
+            "cameras": get_camera_ingestor().stats(),
+            "result_cache": get_result_cache().stats(),
+            "batching": {name: batcher.stats() for name, batcher in get_batchers().items()},
+            "executors": {
+                "inference": get_inference_executor().stats(),
+                "io": get_io_executor().stats(),
+                "index_build": get_index_build_executor().stats(),
+            },
+            "startup": get_warmup().stats(),
             "message": "Model status retrieved successfully"
         }
     
@@ -1,53 +1,78 @@
 import os
-import cv2
 from fastapi import FastAPI
 from api.endpoints.identify import router as identify_router
+from api.endpoints.identify_batch import router as identify_batch_router
+from api.endpoints.identify_stream import router as identify_stream_router
 from api.endpoints.enroll_identity import router as enroll_identities_router
 from api.endpoints.enroll_client import router as enroll_client_router
 from api.endpoints.enroll_camera import router as enroll_camera_router
 from api.endpoints.enroll_refrence_image import router as enroll_identity_router
+from api.endpoints.enroll_refrence_images_bulk import router as enroll_refrence_images_bulk_router
 from api.endpoints.clients import router as client_info_router
 from api.endpoints.model_status import router as model_status_router
-from database.connection import get_pool
+from api.endpoints.metrics import router as metrics_router
+from api.endpoints.health import router as health_router
 
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
-from app import get_id
 
 app = FastAPI(title="Face ID API")
-db_pool = None
 
 
 @app.on_event("startup")
 async def startup_event():
     print("[Startup] Warming up...")
-    global db_pool
     
-    # Initialize database pool
-    db_pool = await get_pool()
+    # Start the buffered access-log writer
+    from app.access_log import get_access_log_writer
+    get_access_log_writer().start()
     
-    # Initialize ML models
-    from app.model_manager import initialize_models
-    await initialize_models()
-    
-    print("[Startup] Done")
+    # Open the database pool, load and warm up the models and preload the
+    # busiest tenants concurrently in the background; camera ingestion starts
+    # once they are up and /health/ready reports when that is the case
+    from app.warmup import get_warmup
+    get_warmup().start()
 
 @app.on_event("shutdown")
 async def shutdown():
-    global db_pool
+    # Stop a warm-up that is still running
+    from app.warmup import get_warmup
+    await get_warmup().stop()
+    
+    # Stop camera streams before their last access logs are flushed
+    from app.camera import get_camera_ingestor
+    await get_camera_ingestor().stop()
+    
+    # Flush pending access logs while the pool is still open
+    from app.access_log import get_access_log_writer
+    await get_access_log_writer().stop()
     
     # Cleanup database pool
-    if db_pool:
-        await db_pool.close()
+    from database import connection
+    if connection.pool:
+        await connection.pool.close()
+    
+    # Fold pending enrollment journals into the index files
+    from app.journal import checkpoint_all
+    checkpoint_all()
     
     # Cleanup ML models
     from app.model_manager import cleanup_models
     await cleanup_models()
+    
+    # Stop inference and I/O executors
+    from app.executor import shutdown_executors
+    shutdown_executors()
 
 app.include_router(identify_router, prefix="/api", tags=["Identify"])
+app.include_router(identify_batch_router, prefix="/api", tags=["Identify"])
+app.include_router(identify_stream_router, prefix="/api", tags=["Identify"])
 app.include_router(enroll_identities_router, prefix="/api", tags=["Enroll"])
 app.include_router(enroll_client_router, prefix="/api", tags=["Enroll"])
 app.include_router(enroll_camera_router, prefix="/api", tags=["Enroll"])
 app.include_router(enroll_identity_router, prefix="/api", tags=["Enroll"])
+app.include_router(enroll_refrence_images_bulk_router, prefix="/api", tags=["Enroll"])
 app.include_router(client_info_router, prefix="/api", tags=["Admin"])
 app.include_router(model_status_router, prefix="/api", tags=["System"])
+app.include_router(metrics_router, tags=["System"])
+app.include_router(health_router, tags=["System"])
 
@@ -1,7 +1,7 @@
-from .identify import FaceInfo, IdentifyResponse
+from .identify import FaceInfo, IdentifyResponse, BatchIdentifyResponse, StreamFrameResult
 from .clients import ClientsInfoResponse
-from .enroll import Enroll
+from .enroll import Enroll, BulkEnroll
 __all__ = [
-    "FaceInfo", "IdentifyResponse", "Enroll",
+    "FaceInfo", "IdentifyResponse", "BatchIdentifyResponse", "StreamFrameResult", "Enroll", "BulkEnroll",
     "ClientsInfoResponse"
 ]
\ No newline at end of file
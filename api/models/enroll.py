@@ -1,5 +1,12 @@
 from pydantic import BaseModel
+from typing import List
 
 class Enroll(BaseModel):
     status: str                    # "success" or "error"
     message: str                   # General description or error message
+
+class BulkEnroll(BaseModel):
+    status: str                    # "success" or "error"
+    message: str                   # General description or error message
+    enrolled: int                  # Number of reference images added to the index
+    failed: List[dict]             # Rejected images: file, identity_name and reason
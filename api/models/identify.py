@@ -14,4 +14,14 @@ class IdentifyResponse(BaseModel):
     message: str                   # General description or error message
     faces: List[FaceInfo]          # List of recognized faces
 
+class BatchIdentifyResponse(BaseModel):
+    status: str                    # "success" or "error"
+    message: str                   # General description or error message
+    results: List[IdentifyResponse]  # One result per uploaded image, in upload order
 
+class StreamFrameResult(BaseModel):
+    frame: int                     # Sequence number of the processed frame on this connection
+    status: str                    # "success" or "error"
+    message: str                   # General description or error message
+    faces: List[FaceInfo]          # List of recognized faces
+    dropped: int                   # Frames replaced by newer ones before processing so far
@@ -1,15 +1,35 @@
-from .preprocessor import crop_face, resize_face, normalize
-from .embedder import embbeding_face
-from .yolo.detector import detect_faces
-from .utils import load_faiss, read_image
-from .faiss_search import faiss_search
-from .get_id import get_id
+from importlib import import_module
+
+# Public names and the submodules defining them. Submodules, and the heavy
+# libraries they import, are only loaded when one of their names is first used.
+_EXPORTS = {
+    "crop_face": ".preprocessor", "resize_face": ".preprocessor", "normalize": ".preprocessor", "normalize_batch": ".preprocessor",
+    "embbeding_face": ".embedder", "embbeding_faces_batch": ".embedder",
+    "detect_faces": ".yolo.detector", "detect_faces_batch": ".yolo.detector",
+    "read_image": ".utils", "read_upload": ".utils", "decode_image": ".utils",
+    "decode_image_reduced": ".utils", "get_tenant_paths": ".utils",
+    "get_index_cache": ".index_cache",
+    "faiss_search": ".faiss_search", "faiss_search_batch": ".faiss_search",
+    "get_id": ".get_id",
+}
 
 __all__ = [
-    "crop_face", "resize_face", "embbeding_face", 
-    "detect_faces", "normalize", "load_faiss", "faiss_search",
-    "get_id", "read_image"
+    "crop_face", "resize_face", "embbeding_face", "embbeding_faces_batch", "normalize_batch",
+    "detect_faces", "detect_faces_batch", "normalize", "faiss_search", "faiss_search_batch",
+    "get_id", "read_image", "read_upload", "decode_image", "decode_image_reduced", "get_tenant_paths", "get_index_cache"
 ]
 
 __version__ = "0.1.0"
 __author__ = "Mahmood Reissi"
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    # Cached as a real attribute; also replaces the `app.get_id` submodule binding
+    globals()[name] = value
+    return value
+
+def __dir__() -> list:
+    return sorted(set(globals()) | set(__all__))
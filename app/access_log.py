@@ -0,0 +1,227 @@
+import time
+import asyncio
+import datetime
+from typing import List, Optional, Tuple
+
+import asyncpg
+
+from app.config import ACCESS_LOG_QUEUE_SIZE, ACCESS_LOG_BATCH_SIZE, ACCESS_LOG_FLUSH_MS
+from app.metrics import observe_db
+from database.connection import get_pool
+
+# access_time is captured at enqueue, so buffering and retries do not shift it
+ACCESS_LOG_COLUMNS = ["identity_id", "camera_id", "detection_confidence", "processing_time_ms", "access_time"]
+INSERT_ACCESS_LOG = f"INSERT INTO access_logs ({', '.join(ACCESS_LOG_COLUMNS)}) VALUES ($1, $2, $3, $4, $5)"
+
+# Failures worth retrying the whole batch once, and row failures that only reject the offending rows
+CONNECTION_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresConnectionError, asyncpg.InterfaceError)
+DATA_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+RETRY_DELAY_S = 1.0
+
+class AccessLogWriter:
+    """
+    Asynchronous, buffered sink for `access_logs` rows.
+
+    The request path only enqueues events; a background task writes them in
+    batches with asyncpg's COPY whenever ``batch_size`` rows are pending or
+    ``flush_interval_ms`` has elapsed. The buffer is bounded: when it is full
+    new events are dropped and counted instead of blocking requests.
+
+    A batch that hits a connection error is retried once. When the database
+    rejects a batch for its data (e.g. an identity deleted meanwhile) the rows
+    are inserted one by one so only the invalid ones are lost.
+    """
+
+    def __init__(self, max_queue: int = ACCESS_LOG_QUEUE_SIZE, batch_size: int = ACCESS_LOG_BATCH_SIZE,
+                 flush_interval_ms: float = ACCESS_LOG_FLUSH_MS):
+        """Initialize an idle writer; call `start` from the running event loop."""
+        self.max_queue = max_queue
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.retries = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    def start(self) -> None:
+        """Start the background flush task."""
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._stopping = False
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def enqueue(self, identity_id: int, camera_id: int, detection_confidence: float, processing_time_ms: float) -> bool:
+        """
+        Queue one access event for writing, stamped with the current UTC time.
+
+        Parameters
+        ----------
+        identity_id : int
+            Recognized identity.
+
+        camera_id : int
+            Camera that captured the event.
+
+        detection_confidence : float
+            Recognition confidence score.
+
+        processing_time_ms : float
+            Pipeline processing time in milliseconds.
+
+        Returns
+        -------
+        bool
+            False if the event was dropped because the buffer is full or the writer is not running.
+        """
+        if self._queue is None or self._stopping:
+            self.dropped += 1
+            return False
+
+        record = (identity_id, camera_id, float(detection_confidence), float(processing_time_ms),
+                  datetime.datetime.now(datetime.timezone.utc))
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+        self.enqueued += 1
+        return True
+
+    async def stop(self) -> None:
+        """
+        Stop the background task after every pending event is flushed.
+
+        This function should be called during application shutdown, before
+        the database pool is closed.
+        """
+        if self._task is None:
+            return
+
+        self._stopping = True
+        await self._task
+        self._task = None
+
+    def _drain(self, limit: int) -> List[Tuple]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not (self._stopping and self._queue.empty()):
+            # Wait for the first event, then collect until the batch is full or the interval ends
+            try:
+                batch = [await asyncio.wait_for(self._queue.get(), self.flush_interval)]
+            except asyncio.TimeoutError:
+                continue
+
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                batch.extend(self._drain(self.batch_size - len(batch)))
+                remaining = deadline - loop.time()
+                if len(batch) >= self.batch_size or remaining <= 0 or self._stopping:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._flush(batch)
+
+    async def _flush(self, batch: List[Tuple]) -> None:
+        start = time.perf_counter()
+        try:
+            try:
+                await self._copy(batch)
+            except CONNECTION_ERRORS as e:
+                self.retries += 1
+                print(f"[AccessLog] Connection error writing {len(batch)} access log(s), retrying: {e}")
+                await asyncio.sleep(RETRY_DELAY_S)
+                await self._copy(batch)
+            self.written += len(batch)
+
+        except DATA_ERRORS as e:
+            print(f"[AccessLog] Batch of {len(batch)} access log(s) rejected, inserting row by row: {e}")
+            await self._insert_rows(batch)
+
+        except Exception as e:
+            self.failed += len(batch)
+            print(f"[AccessLog] Failed to write {len(batch)} access log(s): {e}")
+
+        finally:
+            self.flushes += 1
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+
+    async def _copy(self, batch: List[Tuple]) -> None:
+        pool = await get_pool()
+        if pool is None:
+            raise ValueError("Database connection pool is not available")
+        with observe_db("access_log_flush"):
+            async with pool.acquire() as conn:
+                await conn.copy_records_to_table("access_logs", records=batch, columns=ACCESS_LOG_COLUMNS)
+
+    async def _insert_rows(self, batch: List[Tuple]) -> None:
+        done = 0
+        try:
+            pool = await get_pool()
+            with observe_db("access_log_insert_rows"):
+                async with pool.acquire() as conn:
+                    for record in batch:
+                        try:
+                            await conn.execute(INSERT_ACCESS_LOG, *record)
+                            self.written += 1
+                        except DATA_ERRORS as e:
+                            self.failed += 1
+                            print(f"[AccessLog] Dropped access log {record}: {e}")
+                        done += 1
+
+        except Exception as e:
+            self.failed += len(batch) - done
+            print(f"[AccessLog] Failed to write {len(batch) - done} access log(s): {e}")
+
+    def stats(self) -> dict:
+        """
+        Get writer metrics.
+
+        Returns
+        -------
+        dict
+            Queue depth and capacity, event counters and flush latency in milliseconds.
+        """
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_capacity": self.max_queue,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "retries": self.retries,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
+
+# Global access-log writer instance
+access_log_writer = AccessLogWriter()
+
+def get_access_log_writer() -> AccessLogWriter:
+    """
+    Get the global access-log writer instance.
+
+    Returns
+    -------
+    AccessLogWriter
+        The global access-log writer.
+    """
+    return access_log_writer
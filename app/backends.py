@@ -0,0 +1,389 @@
+import os
+import ast
+import time
+import threading
+import cv2
+import numpy as np
+from typing import Any, List, Optional, Tuple
+
+from app.config import (
+    YOLO_MODEL_PATH, EMBEDDING_MODEL, ONNX_INT8, ONNX_DETECTOR_PATH, ONNX_EMBEDDER_PATH, ONNX_INTRA_OP_THREADS
+)
+
+BACKENDS = ("torch", "onnx")
+
+# File name DeepFace downloads the SFace ONNX weights to
+SFACE_WEIGHTS_FILE = "face_recognition_sface_2021dec.onnx"
+
+# Ultralytics predict() defaults, reproduced by the ONNX detector
+YOLO_MIN_CONF = 0.25
+YOLO_NMS_IOU = 0.7
+YOLO_PAD_VALUE = 114
+
+def get_sface_weights_path() -> str:
+    """Path DeepFace stores the SFace ONNX weights at."""
+    return os.path.join(os.getenv("DEEPFACE_HOME", os.path.expanduser("~")), ".deepface", "weights", SFACE_WEIGHTS_FILE)
+
+def get_onnx_model_paths(int8: bool = ONNX_INT8) -> Tuple[str, str]:
+    """
+    Resolve the exported ONNX detector and embedder files.
+
+    ONNX_DETECTOR_PATH / ONNX_EMBEDDER_PATH win when set; otherwise the files
+    written by ``scripts/export_onnx.py`` next to YOLO_MODEL_PATH are used.
+
+    Returns
+    -------
+    detector_path : str
+        ONNX YOLO face detector.
+
+    embedder_path : str
+        ONNX SFace embedder.
+    """
+    suffix = ".int8.onnx" if int8 else ".onnx"
+    model_dir = os.path.dirname(YOLO_MODEL_PATH or "")
+    detector_path = ONNX_DETECTOR_PATH or os.path.splitext(YOLO_MODEL_PATH or "yolo")[0] + suffix
+    embedder_path = ONNX_EMBEDDER_PATH or os.path.join(model_dir, f"sface{suffix}")
+    return detector_path, embedder_path
+
+class TorchDetector:
+    """
+    YOLO face detector running through ultralytics / PyTorch.
+
+    The ultralytics predictor keeps per-call state, so calls are serialized;
+    PyTorch parallelizes each call over its own intra-op threads.
+    """
+
+    def __init__(self, model_path: str):
+        import torch
+        from ultralytics import YOLO
+
+        self.model_path = model_path
+        self.device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.model = YOLO(model_path).to(self.device)
+        self._lock = threading.Lock()
+
+    def detect(self, images: List[np.ndarray], imgsz: int = 640) -> List[Tuple[np.ndarray, np.ndarray, float]]:
+        """Boxes [x1, y1, x2, y2], confidences and total time in ms of every image, detected at input size ``imgsz``."""
+        detections = []
+        with self._lock:
+            for results in self.model(list(images), imgsz=imgsz, verbose=False):
+                total_time = results.speed['preprocess'] + results.speed['inference'] + results.speed['postprocess']
+                detections.append((results.boxes.xyxy.cpu().numpy(), results.boxes.conf.cpu().numpy(), total_time))
+        return detections
+
+    def info(self) -> dict:
+        import torch
+        return {"detector_model": self.model_path, "device": self.device, "cuda_available": torch.cuda.is_available()}
+
+    def close(self) -> None:
+        import torch
+        if self.device == "cuda":
+            torch.cuda.empty_cache()
+        self.model = None
+
+class DeepFaceEmbedder:
+    """
+    DeepFace embedding model.
+
+    For SFace the ONNX weights are also loaded into an OpenCV DNN network so
+    a whole batch of faces can run in a single forward pass. The network
+    holds its input between ``setInput`` and ``forward``, so calls are
+    serialized.
+    """
+
+    def __init__(self, model_name: str):
+        from deepface import DeepFace
+
+        self.model_name = model_name
+        self.model = DeepFace.build_model(model_name)
+        self.input_size: Tuple[int, int] = (112, 112)
+        input_shape = getattr(self.model, "input_shape", None)
+        if input_shape is not None:
+            self.input_size = (int(input_shape[1]), int(input_shape[0]))
+
+        self._sface_net: Optional[cv2.dnn.Net] = None
+        if model_name == "SFace" and os.path.exists(get_sface_weights_path()):
+            self._sface_net = cv2.dnn.readNetFromONNX(get_sface_weights_path())
+        self._lock = threading.Lock()
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run the embedding model over a batch of resized BGR uint8 faces.
+
+        Parameters
+        ----------
+        batch : np.ndarray
+            Resized faces. Shape: (N, H, W, 3), dtype: uint8.
+
+        Returns
+        -------
+        np.ndarray
+            Raw (unnormalized) embeddings. Shape: (N, D).
+        """
+        with self._lock:
+            return self._forward(batch)
+
+    def _forward(self, batch: np.ndarray) -> np.ndarray:
+        if self._sface_net is not None:
+            # Same preprocessing as cv2.FaceRecognizerSF, for the whole batch
+            blob = cv2.dnn.blobFromImages(list(batch), 1.0, self.input_size, (0, 0, 0), True, False)
+            try:
+                self._sface_net.setInput(blob)
+                output = self._sface_net.forward()
+                if len(output) == len(batch):
+                    return output
+            except cv2.error:
+                pass
+
+            # Graph exported with a fixed batch of one
+            rows = []
+            for i in range(len(blob)):
+                self._sface_net.setInput(blob[i:i + 1])
+                rows.append(self._sface_net.forward().reshape(-1))
+            return np.stack(rows)
+
+        scaled = batch.astype(np.float32) / 255.0
+        keras_model = getattr(self.model, "model", None)
+        if hasattr(keras_model, "predict"):
+            return np.asarray(keras_model.predict(scaled, verbose=0))
+
+        # Backends without batch support fall back to one forward per row
+        return np.stack([np.asarray(self.model.forward(scaled[i:i + 1])).reshape(-1) for i in range(len(scaled))])
+
+    def info(self) -> dict:
+        return {"embedding_model": self.model_name, "embedder_model": self.model_name}
+
+    def close(self) -> None:
+        self.model = None
+        self._sface_net = None
+
+def _onnx_session(model_path: str) -> Any:
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise ValueError("The onnx backend needs ONNX Runtime: pip install -r requirements-onnx.txt")
+
+    if not os.path.exists(model_path):
+        raise ValueError(f"ONNX model file not found: {model_path} (run scripts/export_onnx.py)")
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    if ONNX_INTRA_OP_THREADS > 0:
+        options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+    return ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+def letterbox(image: np.ndarray, size: int) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    Resize an image into a ``size`` x ``size`` canvas keeping its aspect ratio, as ultralytics does.
+
+    Returns
+    -------
+    canvas : np.ndarray
+        Padded image. Shape: (size, size, 3), dtype: uint8.
+
+    ratio : float
+        Scale applied to the image.
+
+    pad : tuple of float
+        Left and top padding in pixels.
+    """
+    height, width = image.shape[:2]
+    ratio = min(size / height, size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (size - new_width) / 2, (size - new_height) / 2
+
+    canvas = np.full((size, size, 3), YOLO_PAD_VALUE, dtype=np.uint8)
+    left, top = int(round(pad_x - 0.1)), int(round(pad_y - 0.1))
+    canvas[top:top + new_height, left:left + new_width] = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    return canvas, ratio, (left, top)
+
+class OnnxDetector:
+    """
+    YOLO face detector exported to ONNX and run with ONNX Runtime on CPU.
+
+    Pre- and post-processing (letterbox, confidence filter, NMS) follow the
+    ultralytics defaults so boxes match the PyTorch backend. ONNX Runtime
+    sessions are thread-safe, so calls from several inference threads run
+    concurrently.
+    """
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.session = _onnx_session(model_path)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Exports with a fixed input size ignore the requested size
+        self.fixed_imgsz = model_input.shape[2] if isinstance(model_input.shape[2], int) else None
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+
+        names = self.session.get_modelmeta().custom_metadata_map.get("names")
+        self.num_classes = len(ast.literal_eval(names)) if names else 1
+
+    def _postprocess(self, output: np.ndarray, ratio: float, pad: Tuple[float, float],
+                     shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        predictions = output.T  # (anchors, 4 + classes [+ keypoints])
+        scores = predictions[:, 4:4 + self.num_classes].max(axis=1)
+        keep = scores >= YOLO_MIN_CONF
+        predictions, scores = predictions[keep], scores[keep]
+        if len(predictions) == 0:
+            return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32)
+
+        centers, sizes = predictions[:, :2], predictions[:, 2:4]
+        boxes = np.concatenate([centers - sizes / 2, centers + sizes / 2], axis=1)
+        indices = cv2.dnn.NMSBoxes(
+            np.concatenate([boxes[:, :2], sizes], axis=1).tolist(), scores.tolist(), YOLO_MIN_CONF, YOLO_NMS_IOU
+        )
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        boxes, scores = boxes[indices], scores[indices]
+
+        # Undo the letterbox
+        boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / ratio).clip(0, shape[1])
+        boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / ratio).clip(0, shape[0])
+        return boxes.astype(np.float32), scores.astype(np.float32)
+
+    def detect(self, images: List[np.ndarray], imgsz: int = 640) -> List[Tuple[np.ndarray, np.ndarray, float]]:
+        """Boxes [x1, y1, x2, y2], confidences and total time in ms of every image, detected at input size ``imgsz``."""
+        start = time.perf_counter()
+        size = self.fixed_imgsz or imgsz
+        letterboxed = [letterbox(image, size) for image in images]
+        blob = cv2.dnn.blobFromImages([canvas for canvas, _, _ in letterboxed], 1 / 255.0, swapRB=True)
+
+        if self.fixed_batch is None:
+            outputs = self.session.run(None, {self.input_name: blob})[0]
+        else:
+            outputs = np.concatenate([
+                self.session.run(None, {self.input_name: blob[i:i + 1]})[0] for i in range(len(blob))
+            ])
+
+        detections = [
+            self._postprocess(output, ratio, pad, image.shape[:2])
+            for output, (_, ratio, pad), image in zip(outputs, letterboxed, images)
+        ]
+        elapsed = (time.perf_counter() - start) * 1000 / max(len(images), 1)
+        return [(boxes, scores, elapsed) for boxes, scores in detections]
+
+    def info(self) -> dict:
+        return {"detector_model": self.model_path, "device": "cpu", "cuda_available": False}
+
+    def close(self) -> None:
+        self.session = None
+
+class OnnxEmbedder:
+    """
+    SFace embedder exported to ONNX and run with ONNX Runtime on CPU.
+
+    Input preprocessing matches cv2.FaceRecognizerSF: RGB, 0-255 float, NCHW.
+    Calls run concurrently, like `OnnxDetector`.
+    """
+
+    def __init__(self, model_path: str):
+        self.model_path = model_path
+        self.session = _onnx_session(model_path)
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        self.input_size: Tuple[int, int] = (int(model_input.shape[3]), int(model_input.shape[2]))
+        self.fixed_batch = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        """Raw embeddings of resized BGR uint8 faces. Shape: (N, D)."""
+        blob = cv2.dnn.blobFromImages(list(batch), 1.0, self.input_size, (0, 0, 0), True, False)
+        if self.fixed_batch is None:
+            return self.session.run(None, {self.input_name: blob})[0]
+        return np.concatenate([self.session.run(None, {self.input_name: blob[i:i + 1]})[0] for i in range(len(blob))])
+
+    def info(self) -> dict:
+        return {"embedding_model": EMBEDDING_MODEL, "embedder_model": self.model_path}
+
+    def close(self) -> None:
+        self.session = None
+
+def create_detector(backend: str, int8: bool = ONNX_INT8) -> Any:
+    """
+    Load the face detector of an inference backend.
+
+    Parameters
+    ----------
+    backend : str
+        "torch" (ultralytics) or "onnx" (ONNX Runtime on CPU).
+
+    int8 : bool, optional
+        Use the INT8-quantized ONNX export. Default: ONNX_INT8.
+
+    Returns
+    -------
+    detector
+        Object providing ``detect(images, imgsz)``.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown, or the model is missing or not configured.
+    """
+    if backend == "torch":
+        if YOLO_MODEL_PATH is None:
+            raise ValueError("YOLO_MODEL_PATH is not set or is None")
+        if not os.path.exists(YOLO_MODEL_PATH):
+            raise ValueError(f"YOLO model file not found: {YOLO_MODEL_PATH}")
+        return TorchDetector(YOLO_MODEL_PATH)
+
+    if backend == "onnx":
+        return OnnxDetector(get_onnx_model_paths(int8)[0])
+
+    raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+def create_embedder(backend: str, int8: bool = ONNX_INT8) -> Any:
+    """
+    Load the embedding model of an inference backend.
+
+    Parameters
+    ----------
+    backend : str
+        "torch" (DeepFace) or "onnx" (ONNX Runtime on CPU).
+
+    int8 : bool, optional
+        Use the INT8-quantized ONNX export. Default: ONNX_INT8.
+
+    Returns
+    -------
+    embedder
+        Object providing ``forward(batch)`` and ``input_size``.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown, or the model is missing or not configured.
+    """
+    if backend == "torch":
+        if EMBEDDING_MODEL is None:
+            raise ValueError("EMBEDDING_MODEL is not set or is None")
+        return DeepFaceEmbedder(EMBEDDING_MODEL)
+
+    if backend == "onnx":
+        if EMBEDDING_MODEL != "SFace":
+            raise ValueError(f"The onnx backend only supports the SFace embedder, got {EMBEDDING_MODEL}")
+        return OnnxEmbedder(get_onnx_model_paths(int8)[1])
+
+    raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+
+def create_backend(backend: str, int8: bool = ONNX_INT8) -> Tuple[Any, Any]:
+    """
+    Load the detector and embedder of an inference backend.
+
+    Parameters
+    ----------
+    backend : str
+        "torch" (ultralytics + DeepFace) or "onnx" (ONNX Runtime on CPU).
+
+    int8 : bool, optional
+        Use the INT8-quantized ONNX exports. Default: ONNX_INT8.
+
+    Returns
+    -------
+    detector, embedder
+        See `create_detector` and `create_embedder`.
+
+    Raises
+    ------
+    ValueError
+        If the backend is unknown, or a model is missing or not configured.
+    """
+    return create_detector(backend, int8), create_embedder(backend, int8)
@@ -1 +1,264 @@
 # Camera capture logic
+import time
+import asyncio
+import threading
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.config import CAMERA_FRAME_INTERVAL_MS, CAMERA_RECONNECT_S, CAMERA_REFRESH_S
+from app.tracker import FaceTracker
+from app.model_manager import DetectorSettings
+from app.metadata_cache import camera_detector_settings
+from database.connection import get_pool
+
+class CameraStream:
+    """
+    Background decoder of one video source.
+
+    A daemon thread reads frames with `cv2.VideoCapture` and keeps only the
+    most recent one, so a consumer that falls behind always gets the newest
+    frame and stale frames are dropped instead of queued. Local video files
+    are paced to their native frame rate and restart at the end, which makes
+    them usable as stand-ins for RTSP cameras.
+    """
+
+    def __init__(self, camera_id: int, organization_id: int, stream_url: str,
+                 reconnect_s: float = CAMERA_RECONNECT_S):
+        """Initialize a stopped stream; call `start` to begin decoding."""
+        self.camera_id = camera_id
+        self.organization_id = organization_id
+        self.stream_url = stream_url
+        self.reconnect_s = reconnect_s
+        self._frame: Optional[np.ndarray] = None
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.tracker: Optional[FaceTracker] = None
+        self.detector_settings = DetectorSettings()
+        self.connected = False
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.frames_processed = 0
+        self.frames_failed = 0
+        self.reconnects = 0
+
+    def start(self) -> None:
+        """Start the decoding thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f"camera-{self.camera_id}", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the decoding thread and release the source."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def latest(self, after_seq: int = 0) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        Take the newest decoded frame.
+
+        Parameters
+        ----------
+        after_seq : int, optional
+            Sequence number of the last frame the caller processed. Default: 0.
+
+        Returns
+        -------
+        seq : int
+            Sequence number of the returned frame.
+
+        frame : np.ndarray or None
+            BGR frame, or None if no frame newer than ``after_seq`` is available.
+        """
+        with self._lock:
+            if self._seq <= after_seq:
+                return after_seq, None
+            # Frames decoded since the last take were never processed
+            self.frames_dropped += self._seq - after_seq - 1
+            self.frames_processed += 1
+            return self._seq, self._frame
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            capture = cv2.VideoCapture(self.stream_url)
+            if not capture.isOpened():
+                print(f"[Camera] Cannot open camera {self.camera_id}, retrying in {self.reconnect_s}s")
+                self._stop.wait(self.reconnect_s)
+                continue
+
+            self.connected = True
+            # Live sources report no frame count; files are paced to their frame rate
+            is_file = capture.get(cv2.CAP_PROP_FRAME_COUNT) > 0
+            fps = capture.get(cv2.CAP_PROP_FPS) or 25.0
+            next_frame_at = time.monotonic()
+
+            while not self._stop.is_set():
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                with self._lock:
+                    self._frame = frame
+                    self._seq += 1
+                self.frames_read += 1
+
+                if is_file:
+                    next_frame_at += 1 / fps
+                    self._stop.wait(max(0.0, next_frame_at - time.monotonic()))
+
+            capture.release()
+            self.connected = False
+            if not self._stop.is_set():
+                self.reconnects += 1
+                if not is_file:
+                    print(f"[Camera] Lost camera {self.camera_id}, reconnecting in {self.reconnect_s}s")
+                    self._stop.wait(self.reconnect_s)
+
+    def stats(self) -> dict:
+        """Connection state and frame counters."""
+        return {
+            "organization_id": self.organization_id,
+            "connected": self.connected,
+            "frames_read": self.frames_read,
+            "frames_processed": self.frames_processed,
+            "frames_dropped": self.frames_dropped,
+            "frames_failed": self.frames_failed,
+            "reconnects": self.reconnects,
+            "detector": self.detector_settings._asdict(),
+            "tracking": self.tracker.stats() if self.tracker is not None else None,
+        }
+
+class CameraIngestor:
+    """
+    Server-side recognition of every camera with a ``stream_url``.
+
+    Each camera gets a `CameraStream` and an asyncio task that takes the
+    newest frame at most every ``frame_interval_ms``, runs it through
+    `get_id` with the camera's `FaceTracker` and detector settings and
+    records newly recognized identities with the access-log writer. The
+    camera list is reloaded from the database every ``refresh_s``.
+    """
+
+    def __init__(self, frame_interval_ms: float = CAMERA_FRAME_INTERVAL_MS, refresh_s: float = CAMERA_REFRESH_S):
+        """Initialize an idle ingestor; call `start` from the running event loop."""
+        self.frame_interval = frame_interval_ms / 1000
+        self.refresh_s = refresh_s
+        self._streams: Dict[int, CameraStream] = {}
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Open every registered camera stream and start the refresh task."""
+        if self._refresh_task is not None:
+            return
+        await self.refresh()
+        self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """
+        Stop all camera streams.
+
+        This function should be called during application shutdown, before
+        the access-log writer is stopped.
+        """
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        for camera_id in list(self._streams):
+            await self._remove(camera_id)
+
+    async def refresh(self) -> None:
+        """Start, restart or stop streams to match the `cameras` table."""
+        pool = await get_pool()
+        if pool is None:
+            raise ValueError("Database connection pool is not available")
+
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT id, client_id, stream_url, detector_imgsz, detector_two_pass
+                FROM cameras
+                WHERE stream_url IS NOT NULL
+            """)
+        wanted = {row["id"]: (row["client_id"], row["stream_url"]) for row in rows}
+        detector_settings = {row["id"]: camera_detector_settings(row["detector_imgsz"], row["detector_two_pass"]) for row in rows}
+
+        for camera_id, stream in list(self._streams.items()):
+            if wanted.get(camera_id) != (stream.organization_id, stream.stream_url):
+                await self._remove(camera_id)
+
+        for camera_id, (organization_id, stream_url) in wanted.items():
+            if camera_id not in self._streams:
+                stream = CameraStream(camera_id, organization_id, stream_url)
+                stream.start()
+                self._streams[camera_id] = stream
+                self._tasks[camera_id] = asyncio.create_task(self._consume(stream))
+            # Detector changes apply from the next frame without reopening the stream
+            self._streams[camera_id].detector_settings = detector_settings[camera_id]
+
+    async def _remove(self, camera_id: int) -> None:
+        task = self._tasks.pop(camera_id, None)
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        stream = self._streams.pop(camera_id, None)
+        if stream is not None:
+            await asyncio.to_thread(stream.stop)
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_s)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"[Camera] Failed to refresh cameras: {e}")
+
+    async def _consume(self, stream: CameraStream) -> None:
+        from app import get_id
+        from app.access_log import get_access_log_writer
+        from app.metrics import observe_frame
+
+        loop = asyncio.get_running_loop()
+        access_log_writer = get_access_log_writer()
+        stream.tracker = FaceTracker()
+        seq = 0
+        while True:
+            started = loop.time()
+            try:
+                seq, frame = stream.latest(seq)
+                if frame is not None:
+                    start = time.perf_counter()
+                    result = await get_id(frame, stream.organization_id, stream.tracker,
+                                          detector_settings=stream.detector_settings)
+                    observe_frame(stream.organization_id, stream.camera_id, result, time.perf_counter() - start)
+                    for face in result["faces"]:
+                        # A tracked face is logged when its identity is decided, not on every frame
+                        if face.get("status") == "ok" and face.get("identity_id") is not None and not face["reused"]:
+                            access_log_writer.enqueue(face["identity_id"], stream.camera_id, face["confidence"],
+                                                      face["total_time_ms"])
+            except Exception as e:
+                # One bad frame must not stop the camera's recognition task
+                stream.frames_failed += 1
+                print(f"[Camera] Failed to process a frame of camera {stream.camera_id}: {e}")
+            await asyncio.sleep(max(0.0, self.frame_interval - (loop.time() - started)))
+
+    def stats(self) -> dict:
+        """Per-camera stream metrics keyed by camera ID."""
+        return {camera_id: stream.stats() for camera_id, stream in self._streams.items()}
+
+# Global camera ingestor instance
+camera_ingestor = CameraIngestor()
+
+def get_camera_ingestor() -> CameraIngestor:
+    """
+    Get the global camera ingestor instance.
+
+    Returns
+    -------
+    CameraIngestor
+        The global camera ingestor.
+    """
+    return camera_ingestor
@@ -8,7 +8,94 @@ load_dotenv()
 YOLO_MODEL_PATH = os.getenv("YOLO_MODEL_PATH")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL")
 EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM"))
+# Identifies how embeddings are computed (model and preprocessing); indices built with another version must be rebuilt
+EMBEDDING_VERSION = f"{EMBEDDING_MODEL}/batch-resize-v1"
+LEGACY_EMBEDDING_VERSION = f"{EMBEDDING_MODEL}/represent"  # Vectors enrolled through DeepFace.represent, before versions were recorded
 FAISS_INDEX_PATH = os.getenv("FAISS_INDEX_PATH")
 LABELS_PATH = os.getenv("LABELS_PATH")
 DB_URL = os.getenv("DB_URL")
 CLIENT_FOLDER = os.getenv("CLIENT_FOLDER")
+
+# In-process FAISS index cache
+FAISS_CACHE_MAX_BYTES = int(os.getenv("FAISS_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+# Startup warm-up
+PRELOAD_TENANTS = int(os.getenv("PRELOAD_TENANTS", "8"))  # Busiest organizations whose indices load at startup; 0 disables
+PRELOAD_RECENT_EVENTS = int(os.getenv("PRELOAD_RECENT_EVENTS", "100000"))  # Latest access logs that rank organizations by activity
+
+# Executors for blocking model, image and index-file work
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")  # "thread" or "process"
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(os.cpu_count() or 1)))
+IO_WORKERS = int(os.getenv("IO_WORKERS", str(min(32, (os.cpu_count() or 1) + 4))))
+
+# Cross-request micro-batching of detection and embedding
+DETECT_MAX_BATCH = int(os.getenv("DETECT_MAX_BATCH", "8"))
+DETECT_MAX_WAIT_MS = float(os.getenv("DETECT_MAX_WAIT_MS", "5"))
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))
+EMBED_MAX_WAIT_MS = float(os.getenv("EMBED_MAX_WAIT_MS", "2"))
+
+# FAISS index types and automatic promotion of large tenants
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat")  # "flat", "ivf" or "hnsw"
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_HNSW_M = int(os.getenv("FAISS_HNSW_M", "32"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+FAISS_EF_CONSTRUCTION = int(os.getenv("FAISS_EF_CONSTRUCTION", "200"))
+FAISS_PROMOTE_THRESHOLD = int(os.getenv("FAISS_PROMOTE_THRESHOLD", "100000"))
+FAISS_PROMOTE_TYPE = os.getenv("FAISS_PROMOTE_TYPE", "hnsw")
+FAISS_PROMOTE_MIN_RECALL = float(os.getenv("FAISS_PROMOTE_MIN_RECALL", "0.95"))
+FAISS_PROMOTE_RETRY_GROWTH = float(os.getenv("FAISS_PROMOTE_RETRY_GROWTH", "0.1"))  # Index growth before a rejected promotion is retried
+FAISS_RECALL_SAMPLE = int(os.getenv("FAISS_RECALL_SAMPLE", "200"))
+
+# Append-only enrollment journal
+JOURNAL_CHECKPOINT_RECORDS = int(os.getenv("JOURNAL_CHECKPOINT_RECORDS", "1000"))
+
+# Buffered access-log writer
+ACCESS_LOG_QUEUE_SIZE = int(os.getenv("ACCESS_LOG_QUEUE_SIZE", "10000"))
+ACCESS_LOG_BATCH_SIZE = int(os.getenv("ACCESS_LOG_BATCH_SIZE", "500"))
+ACCESS_LOG_FLUSH_MS = float(os.getenv("ACCESS_LOG_FLUSH_MS", "500"))
+
+# In-memory organization / camera resolution
+METADATA_CACHE_TTL_S = float(os.getenv("METADATA_CACHE_TTL_S", "300"))
+
+# Server-side ingestion of camera streams (cameras.stream_url)
+CAMERA_INGEST_ENABLED = os.getenv("CAMERA_INGEST_ENABLED", "false").lower() in ("1", "true", "yes")
+CAMERA_FRAME_INTERVAL_MS = float(os.getenv("CAMERA_FRAME_INTERVAL_MS", "200"))
+CAMERA_RECONNECT_S = float(os.getenv("CAMERA_RECONNECT_S", "5"))
+CAMERA_REFRESH_S = float(os.getenv("CAMERA_REFRESH_S", "60"))
+
+# Per-camera face tracking across frames
+TRACK_IOU_THRESHOLD = float(os.getenv("TRACK_IOU_THRESHOLD", "0.3"))
+TRACK_REEMBED_IOU = float(os.getenv("TRACK_REEMBED_IOU", "0.5"))
+TRACK_MAX_AGE_S = float(os.getenv("TRACK_MAX_AGE_S", "1.0"))
+
+# Maximum images accepted by one /api/identify_batch request
+IDENTIFY_BATCH_MAX_IMAGES = int(os.getenv("IDENTIFY_BATCH_MAX_IMAGES", "32"))
+
+# Bulk reference enrollment
+BULK_ENROLL_MAX_IMAGES = int(os.getenv("BULK_ENROLL_MAX_IMAGES", "5000"))
+BULK_ENROLL_CHUNK = int(os.getenv("BULK_ENROLL_CHUNK", "64"))
+BULK_ENROLL_MAX_BYTES = int(os.getenv("BULK_ENROLL_MAX_BYTES", str(1024 ** 3)))  # Archive size and total image bytes
+
+# Short-lived cache of recognition results for byte-identical uploads
+RESULT_CACHE_TTL_S = float(os.getenv("RESULT_CACHE_TTL_S", "2"))
+RESULT_CACHE_MAX_ENTRIES = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024"))  # 0 disables the cache
+RESULT_CACHE_LOG_HITS = os.getenv("RESULT_CACHE_LOG_HITS", "true").lower() in ("1", "true", "yes")
+
+# Inference backend for detection and embedding
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "torch")  # "torch" or "onnx"
+ONNX_INT8 = os.getenv("ONNX_INT8", "false").lower() in ("1", "true", "yes")
+ONNX_DETECTOR_PATH = os.getenv("ONNX_DETECTOR_PATH")  # Default: next to YOLO_MODEL_PATH
+ONNX_EMBEDDER_PATH = os.getenv("ONNX_EMBEDDER_PATH")  # Default: sface[.int8].onnx next to YOLO_MODEL_PATH
+ONNX_INTRA_OP_THREADS = int(os.getenv("ONNX_INTRA_OP_THREADS", "0"))  # 0 lets ONNX Runtime decide
+
+# Upload decoding
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(20 * 1024 ** 2)))
+DECODE_TARGET_SIDE = int(os.getenv("DECODE_TARGET_SIDE", "640"))  # Detector input size; 0 always decodes at full resolution
+FACE_CROP_MIN_SIDE = int(os.getenv("FACE_CROP_MIN_SIDE", "112"))  # Smaller faces are re-cropped from the full-resolution image
+
+# Detector input size, per camera override in cameras.detector_imgsz / cameras.detector_two_pass
+DETECT_IMGSZ = int(os.getenv("DETECT_IMGSZ", "640"))
+DETECT_REFINE_IMGSZ = int(os.getenv("DETECT_REFINE_IMGSZ", "320"))  # Input size of two-pass refinement crops
+DETECT_PROPOSAL_CONF = float(os.getenv("DETECT_PROPOSAL_CONF", "0.25"))  # First-pass confidence that earns a refinement crop
+DETECT_REFINE_MARGIN = float(os.getenv("DETECT_REFINE_MARGIN", "2.0"))  # Refinement crop side / proposal box side
+DETECT_REFINE_MAX_REGIONS = int(os.getenv("DETECT_REFINE_MAX_REGIONS", "16"))
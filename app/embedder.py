@@ -1,5 +1,6 @@
 import numpy as np
-from app.model_manager import get_model_manager
+from app.config import EMBEDDING_DIM
+from app.model_manager import ensure_models, embedding_batcher
 
 async def embbeding_face(face: np.ndarray) -> tuple[np.ndarray, float]:
     """
@@ -24,9 +25,41 @@ async def embbeding_face(face: np.ndarray) -> tuple[np.ndarray, float]:
         If embedding generation fails due to model or image issues.
     """
     try:
-        model_manager = await get_model_manager()
-        return model_manager.generate_embedding(face)
+        await ensure_models()
+        return (await embedding_batcher.submit([face]))[0]
 
     except Exception as e:
         raise RuntimeError(f"Failed to extract embedding: {e}")
 
+async def embbeding_faces_batch(faces: list[np.ndarray]) -> tuple[np.ndarray, float]:
+    """
+    Generate normalized facial embeddings for all faces of a frame in one model call.
+
+    Parameters
+    ----------
+    faces : list of np.ndarray
+        Cropped face images as NumPy arrays. Each shape: (H, W, 3), dtype: uint8.
+
+    Returns
+    -------
+    embeddings : np.ndarray
+        L2-normalized facial embeddings, one row per face. Shape: (N, 128), dtype: float32.
+
+    embed_time : float
+        Average time taken per face in milliseconds.
+
+    Raises
+    ------
+    RuntimeError
+        If embedding generation fails due to model or image issues.
+    """
+    try:
+        await ensure_models()
+        results = await embedding_batcher.submit(faces)
+        if len(results) == 0:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32), 0.0
+        embeddings = np.stack([embedding for embedding, _ in results])
+        return embeddings, results[0][1]
+
+    except Exception as e:
+        raise RuntimeError(f"Failed to extract embeddings: {e}")
@@ -0,0 +1,157 @@
+import asyncio
+import functools
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from app.config import INFERENCE_EXECUTOR, INFERENCE_WORKERS, IO_WORKERS
+
+class BoundedExecutor:
+    """
+    Executor wrapper that runs blocking callables off the asyncio event loop.
+
+    At most ``max_workers`` calls are in flight at once; further callers wait
+    on a semaphore instead of piling up in the executor queue, so the event
+    loop stays free to serve cheap requests while inference is saturated.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, initializer: Optional[Callable] = None):
+        """Create the underlying thread or process pool."""
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind '{kind}', expected 'thread' or 'process'")
+
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self._semaphore = asyncio.Semaphore(self.max_workers)
+        self.in_flight = 0
+        self.waiting = 0
+
+        if kind == "process":
+            self._executor: Executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=initializer)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run a blocking callable in the pool and await its result.
+
+        Parameters
+        ----------
+        func : Callable
+            Blocking function. Must be a picklable module-level function for process pools.
+
+        *args, **kwargs
+            Arguments forwarded to ``func``.
+
+        Returns
+        -------
+        Any
+            Return value of ``func``. Exceptions raised by ``func`` propagate.
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+
+        self.waiting += 1
+        async with self._semaphore:
+            self.waiting -= 1
+            self.in_flight += 1
+            try:
+                return await loop.run_in_executor(self._executor, call)
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        """Return pool kind, size and current load."""
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+    def shutdown(self) -> None:
+        """Shut the pool down, waiting for running calls to finish."""
+        self._executor.shutdown(wait=True)
+
+_inference_executor: Optional[BoundedExecutor] = None
+_io_executor: Optional[BoundedExecutor] = None
+_index_build_executor: Optional[BoundedExecutor] = None
+
+def get_inference_executor() -> BoundedExecutor:
+    """
+    Get the executor used for model inference.
+
+    Its kind (thread or process) and size come from INFERENCE_EXECUTOR and
+    INFERENCE_WORKERS. Process workers load their own models on start.
+
+    Returns
+    -------
+    BoundedExecutor
+        The global inference executor.
+    """
+    global _inference_executor
+    if _inference_executor is None:
+        initializer = None
+        if INFERENCE_EXECUTOR == "process":
+            from app.model_manager import init_worker_process
+            initializer = init_worker_process
+        _inference_executor = BoundedExecutor("inference", INFERENCE_EXECUTOR, INFERENCE_WORKERS, initializer)
+    return _inference_executor
+
+def get_io_executor() -> BoundedExecutor:
+    """
+    Get the thread pool used for blocking image and index-file work.
+
+    Returns
+    -------
+    BoundedExecutor
+        The global I/O executor.
+    """
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = BoundedExecutor("io", "thread", IO_WORKERS)
+    return _io_executor
+
+def get_index_build_executor() -> BoundedExecutor:
+    """
+    Get the single thread that builds FAISS indices in the background.
+
+    Index promotions and rebuilds take seconds to minutes; running them
+    here keeps them from occupying the I/O executor that enrollment and
+    image saves depend on, and runs at most one build at a time.
+
+    Returns
+    -------
+    BoundedExecutor
+        The global index-build executor.
+    """
+    global _index_build_executor
+    if _index_build_executor is None:
+        _index_build_executor = BoundedExecutor("index-build", "thread", 1)
+    return _index_build_executor
+
+async def run_inference(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking model call on the inference executor."""
+    return await get_inference_executor().run(func, *args, **kwargs)
+
+async def run_blocking(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run blocking image decoding/encoding or file work on the I/O executor."""
+    return await get_io_executor().run(func, *args, **kwargs)
+
+async def run_index_build(func: Callable, *args: Any, **kwargs: Any) -> Any:
+    """Run a background index build or promotion on the index-build executor."""
+    return await get_index_build_executor().run(func, *args, **kwargs)
+
+def shutdown_executors() -> None:
+    """
+    Shut down the global executors.
+
+    This function should be called during application shutdown.
+    """
+    global _inference_executor, _io_executor, _index_build_executor
+    for executor in (_inference_executor, _io_executor, _index_build_executor):
+        if executor is not None:
+            executor.shutdown()
+    _inference_executor = None
+    _io_executor = None
+    _index_build_executor = None
@@ -1,37 +1,87 @@
-import time
 import numpy as np
 
-from app import load_faiss
-from database.connection import get_pool
+from app.config import EMBEDDING_VERSION
+from app.index_cache import get_index_cache
+from app.reembed import schedule_reembed
+from app.executor import run_blocking
+from app.identity_directory import get_identity_directory
 
 # Define thresholds
 VOTE_THRESHOLD = 0.75      # Adjust as needed
 DISTANCE_THRESHOLD = 0.7  # Lower means stricter match
 
-async def faiss_search(embedding: np.ndarray, faiss_path, label_path, top_k: int = 10) -> dict:
+def weighted_vote(distances: np.ndarray, indices: np.ndarray, label_array: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Perform face identity recognition using FAISS nearest neighbor search with weighted voting.
+    Weighted voting over the top-k neighbors of every query row at once.
 
     Parameters
     ----------
-    embedding : np.ndarray
-        1D normalized face embedding vector. Shape: (128,), dtype: float32.
-    
-    faiss_path : str
-        Path to the FAISS index file.
-    
-    label_path : str
-        Path to the labels pickle file.
-    
+    distances : np.ndarray
+        FAISS distances. Shape: (N, K), dtype: float32.
+
+    indices : np.ndarray
+        FAISS neighbor indices, -1 for missing neighbors. Shape: (N, K), dtype: int64.
+
+    label_array : np.ndarray
+        Identity label of each vector in the index. Shape: (M,).
+
+    Returns
+    -------
+    pred_labels : np.ndarray
+        Winning label per row. Shape: (N,). Undefined where ``has_votes`` is False.
+
+    vote_ratios : np.ndarray
+        Share of the total vote score held by the winning label. Shape: (N,), dtype: float64.
+
+    has_votes : np.ndarray
+        Whether the row had at least one valid neighbor. Shape: (N,), dtype: bool.
+    """
+    n_rows = indices.shape[0]
+
+    # Guard: ignore invalid indices (-1 or OOB)
+    valid = (indices >= 0) & (indices < len(label_array))
+    has_votes = valid.any(axis=1)
+    if not has_votes.any():
+        return np.zeros(n_rows, dtype=np.int64), np.zeros(n_rows), has_votes
+
+    neighbor_labels = label_array[np.where(valid, indices, 0)]
+    scores = np.where(valid, 1 / (distances + 1e-8), 0.0)
+
+    # Accumulate scores per (row, label) in a dense (N, U) matrix
+    unique_labels, inverse = np.unique(neighbor_labels[valid], return_inverse=True)
+    rows = np.nonzero(valid)[0]
+    label_scores = np.zeros((n_rows, len(unique_labels)))
+    np.add.at(label_scores, (rows, inverse), scores[valid])
+
+    winners = label_scores.argmax(axis=1)
+    total_scores = label_scores.sum(axis=1)
+    winner_scores = label_scores[np.arange(n_rows), winners]
+    vote_ratios = np.divide(winner_scores, total_scores, out=np.zeros(n_rows), where=total_scores != 0)
+
+    return unique_labels[winners], vote_ratios, has_votes
+
+async def faiss_search_batch(embeddings: np.ndarray, organization_id: int, top_k: int = 10) -> list[dict]:
+    """
+    Recognize all faces of a frame with one FAISS search and vectorized weighted voting.
+
+    Parameters
+    ----------
+    embeddings : np.ndarray
+        L2-normalized face embeddings, one row per face. Shape: (N, 128), dtype: float32.
+
+    organization_id : int
+        Organization ID whose resident FAISS index is searched.
+
     top_k : int, optional
         Number of nearest neighbors to consider for voting. Default: 10.
 
     Returns
     -------
-    result : dict
-        Recognition result containing:
+    results : list of dict
+        One recognition result per input row, in input order, each containing:
         - status: str - "ok" if confident, "unconfident" if below threshold
         - label: str - predicted identity name or "unknown"
+        - identity_id: int or None - predicted identity ID
         - confidence: float - weighted voting confidence score (0.0 - 1.0)
 
     Raises
@@ -40,64 +90,75 @@ async def faiss_search(embedding: np.ndarray, faiss_path, label_path, top_k: int
         If FAISS search or voting process fails.
     """
     try:
-        # Load index and labels
-        faiss_index, true_labels = load_faiss(faiss_path, label_path)
+        embeddings = np.ascontiguousarray(np.atleast_2d(embeddings), dtype=np.float32)
+        if len(embeddings) == 0:
+            return []
 
-        if embedding.ndim == 1:
-            embedding = np.expand_dims(embedding, axis=0).astype(np.float32)
+        # Resident index and labels
+        tenant = await run_blocking(get_index_cache().get, organization_id)
+        if tenant.embedding_version != EMBEDDING_VERSION:
+            schedule_reembed(organization_id)
 
         # --- FAISS SEARCH ---
-        faiss_start = time.time()
-        D, I = faiss_index.search(embedding, top_k)
-        faiss_time = (time.time() - faiss_start) * 1000  # ms
+        D, I, labels = await run_blocking(tenant.search, embeddings, top_k)
 
-        top_k_indices = I[0]
-        top_k_distances = D[0]
+        # --- Weighted Voting ---
+        pred_labels, vote_ratios, has_votes = weighted_vote(D, I, labels)
+        is_confident = has_votes & (vote_ratios >= VOTE_THRESHOLD)
 
-        # Guard: remove invalid indices (-1 or OOB)
-        valid_entries = [(idx, dist) for idx, dist in zip(top_k_indices, top_k_distances)
-                        if 0 <= idx < len(true_labels)]
+        # --- Identity names from the in-memory directory ---
+        names = await get_identity_directory().get_names(organization_id, np.unique(pred_labels[has_votes]))
 
-        if not valid_entries:
-            return {
-                "status": "unconfident",
-                "label": "unknown",
-                "confidence": 0.0
-            }
+        results = []
+        for label, ratio, voted, confident in zip(pred_labels, vote_ratios, has_votes, is_confident):
+            if not voted:
+                results.append({
+                    "status": "unconfident",
+                    "label": "unknown",
+                    "identity_id": None,
+                    "confidence": 0.0
+                })
+                continue
 
-        # --- Weighted Voting ---
-        label_scores = {}
-        for idx, dist in valid_entries:
-            label = true_labels[idx]
-            score = 1 / (dist + 1e-8)
-            label_scores[label] = label_scores.get(label, 0) + score
-
-        pred_label = max(label_scores, key=label_scores.get)
-        total_score = sum(label_scores.values())
-        vote_ratio = label_scores[pred_label] / total_score
-        mean_distance = np.mean([dist for _, dist in valid_entries])
-
-        # --- Confidence Decision ---
-        confidence = vote_ratio
-        is_confident = vote_ratio >= VOTE_THRESHOLD
-        pool = await get_pool()
-        if pool is None:
-            raise ValueError("Database connection pool is not available")
-        async with pool.acquire() as conn:
-            row = await conn.fetchrow("""
-                SELECT full_name 
-                FROM identities 
-                WHERE id = $1
-            """, pred_label)
-            if row:
-                label_text = row["full_name"]
-            else:
-                label_text = "unknown"
-
-        return {
-            "status": "ok" if is_confident else "unconfident",
-            "label": label_text,
-            "confidence": round(confidence, 3)
-        }
+            identity_id = int(label)
+            results.append({
+                "status": "ok" if confident else "unconfident",
+                "label": names.get(identity_id, "unknown"),
+                "identity_id": identity_id if identity_id in names else None,
+                "confidence": round(float(ratio), 3)
+            })
+
+        return results
     except Exception as e:
-        raise RuntimeError(f"Failed on faiss search with error: {e}")
\ No newline at end of file
+        raise RuntimeError(f"Failed on faiss search with error: {e}")
+
+async def faiss_search(embedding: np.ndarray, organization_id: int, top_k: int = 10) -> dict:
+    """
+    Perform face identity recognition using FAISS nearest neighbor search with weighted voting.
+
+    Parameters
+    ----------
+    embedding : np.ndarray
+        1D normalized face embedding vector. Shape: (128,), dtype: float32.
+
+    organization_id : int
+        Organization ID whose resident FAISS index is searched.
+
+    top_k : int, optional
+        Number of nearest neighbors to consider for voting. Default: 10.
+
+    Returns
+    -------
+    result : dict
+        Recognition result containing:
+        - status: str - "ok" if confident, "unconfident" if below threshold
+        - label: str - predicted identity name or "unknown"
+        - identity_id: int or None - predicted identity ID
+        - confidence: float - weighted voting confidence score (0.0 - 1.0)
+
+    Raises
+    ------
+    RuntimeError
+        If FAISS search or voting process fails.
+    """
+    return (await faiss_search_batch(np.atleast_2d(embedding), organization_id, top_k))[0]
@@ -1,14 +1,20 @@
 import os
 import time
+from typing import Optional
+
 import cv2
 import numpy as np
 
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
-from app.config import CLIENT_FOLDER
-from app import detect_faces, resize_face, crop_face, faiss_search, embbeding_face
+from app.config import FACE_CROP_MIN_SIDE
+from app import detect_faces, resize_face, crop_face, faiss_search_batch, embbeding_faces_batch, decode_image
+from app.tracker import FaceTracker
+from app.model_manager import DetectorSettings
 
-async def get_id(image: np.ndarray, organization_id: int) -> dict:
+async def get_id(image: np.ndarray, organization_id: int, tracker: Optional[FaceTracker] = None,
+                 image_bytes: Optional[bytes] = None, scale: float = 1.0,
+                 detector_settings: Optional[DetectorSettings] = None) -> dict:
     """
     Perform complete face detection, embedding, and identity recognition pipeline.
 
@@ -20,6 +26,25 @@ async def get_id(image: np.ndarray, organization_id: int) -> dict:
     organization_id : int
         Organization ID to search against their specific FAISS index.
 
+    tracker : FaceTracker, optional
+        Tracker of the camera the frame comes from. Tracked faces reuse their
+        last identity decision instead of being embedded and searched again.
+        Default: None.
+
+    image_bytes : bytes, optional
+        Encoded upload ``image`` was decoded from at reduced resolution (see
+        `decode_image_reduced`). Faces smaller than FACE_CROP_MIN_SIDE in
+        ``image`` are cropped from a full-resolution decode of it instead.
+        Default: None.
+
+    scale : float, optional
+        Full-resolution size divided by the size of ``image``. Bounding boxes
+        are reported in full-resolution coordinates. Default: 1.0.
+
+    detector_settings : DetectorSettings, optional
+        Detector input size and mode of the camera the image comes from.
+        Default: DETECT_IMGSZ, single pass.
+
     Returns
     -------
     results : dict
@@ -29,11 +54,17 @@ async def get_id(image: np.ndarray, organization_id: int) -> dict:
         - faces: list - List of face recognition results, each containing:
             - status: str - "ok" or "unconfident"
             - label: str - Predicted identity or "unknown"
+            - identity_id: int or None - Predicted identity ID
             - confidence: float - Recognition confidence score
             - bounding_box: tuple - Face coordinates (x1, y1, x2, y2)
             - detection_time: str - Face detection processing time
             - embbeding_time: str - Feature extraction time
             - total_time: str - Total processing time
+            - total_time_ms: float - Total processing time in milliseconds
+            - track_id: int - Track of the face (only with a tracker)
+            - reused: bool - Whether the decision was reused from the track (only with a tracker)
+        - timings: dict - Wall-clock milliseconds of the frame's detect, crop,
+          embed and search stages (only the stages that ran)
 
     Raises
     ------
@@ -41,43 +72,79 @@ async def get_id(image: np.ndarray, organization_id: int) -> dict:
         If any step in the pipeline fails.
     """
     try:
-
-        if CLIENT_FOLDER is None:
-            raise ValueError("CLIENT_FOLDER is not set or is None")
-        
-        faiss_path = os.path.join(CLIENT_FOLDER, str(organization_id), "weights", f"client_{organization_id}.faiss")
-        label_path = os.path.join(CLIENT_FOLDER, str(organization_id), "weights", f"client_{organization_id}.pkl")
-
-        boxes, detect_time = await detect_faces(image)
+        stage_start = time.perf_counter()
+        boxes, detect_time = await detect_faces(image, settings=detector_settings)
+        timings = {"detect_ms": (time.perf_counter() - stage_start) * 1000}
         if len(boxes) == 0:
             return {
                 "status": "error",
                 "message": "No faces detected in image.",
                 "faces": [],
+                "timings": timings,
             }
 
-        all_result = []
-        for box in boxes:
-            start_total = time.time()
-            x1, y1, x2, y2 = map(int, box)
-            cropped_face, _ = crop_face(image, box)
+        tracks = tracker.update(boxes) if tracker is not None else [(None, True)] * len(boxes)
+        to_embed = [i for i, (_, needs_embedding) in enumerate(tracks) if needs_embedding]
+
+        start_faces = time.perf_counter()
+        full_image = None
+        faces = []
+        for i in to_embed:
+            source, box = image, boxes[i]
+            if image_bytes is not None and scale > 1.0 and min(box[2] - box[0], box[3] - box[1]) < FACE_CROP_MIN_SIDE:
+                # Too few pixels in the reduced decode, crop the face at full resolution
+                if full_image is None:
+                    full_image = await decode_image(image_bytes)
+                if full_image is not None:
+                    source, box = full_image, np.asarray(box) * scale
+            cropped_face, _ = crop_face(source, box)
             resized_face, _ = resize_face(cropped_face, (112, 112))
-            embedding, emb_time = await embbeding_face(resized_face)
-            result = await faiss_search(embedding, faiss_path, label_path)
-            total_time = (time.time() - start_total) * 1000
-            total_time += detect_time
+            faces.append(resized_face)
+
+        results = [None] * len(boxes)
+        emb_time = face_time = search_time = 0.0
+        if faces:
+            embed_start = time.perf_counter()
+            timings["crop_ms"] = (embed_start - start_faces) * 1000
+
+            # One embedding forward pass for every face of the frame
+            embeddings, emb_time = await embbeding_faces_batch(faces)
+            search_start = time.perf_counter()
+            timings["embed_ms"] = (search_start - embed_start) * 1000
+            face_time = (search_start - start_faces) * 1000 / len(faces)
+
+            # One FAISS search for every face of the frame
+            searched = await faiss_search_batch(embeddings, organization_id)
+            timings["search_ms"] = (time.perf_counter() - search_start) * 1000
+            search_time = timings["search_ms"] / len(faces)
+            for i, result in zip(to_embed, searched):
+                results[i] = result
+
+        all_result = []
+        for box, (track, needs_embedding), result in zip(boxes, tracks, results):
+            x1, y1, x2, y2 = map(int, np.asarray(box) * scale)
+            if track is not None:
+                if needs_embedding:
+                    tracker.record(track, result)
+                else:
+                    result = {key: track.result[key] for key in ("status", "label", "identity_id", "confidence")}
+                result.update({"track_id": track.track_id, "reused": not needs_embedding})
+
+            total_time = detect_time + (face_time + search_time if needs_embedding else 0.0)
             result.update({
                 "bounding_box": (x1, y1, x2, y2),
                 "detection_time": f"{detect_time:.2f} ms",
-                "embbeding_time": f"{emb_time:.2f} ms",
-                "total_time": f"{total_time:.2f} ms"
+                "embbeding_time": f"{emb_time if needs_embedding else 0.0:.2f} ms",
+                "total_time": f"{total_time:.2f} ms",
+                "total_time_ms": total_time
             })
             all_result.append(result)
 
         return {
             "status": "success",
             "message": f"{len(boxes)} face(s) processed.",
-            "faces": all_result
+            "faces": all_result,
+            "timings": timings
         }
 
     except Exception as e:
@@ -0,0 +1,138 @@
+import time
+import asyncio
+from typing import Dict, Iterable, Optional
+
+from app.metrics import observe_db
+from database.connection import get_pool
+
+# Minimum seconds between reloads of a tenant triggered by an unknown identity ID
+RELOAD_MIN_INTERVAL = 5.0
+
+class TenantIdentities:
+    """Identity ID <-> full name maps of one organization."""
+
+    def __init__(self, rows: Iterable):
+        self.names: Dict[int, str] = {}
+        self.ids: Dict[str, int] = {}
+        for row in rows:
+            self.add(row["id"], row["full_name"])
+        self.loaded_at = time.monotonic()
+
+    def add(self, identity_id: int, full_name: str) -> None:
+        """Register one identity."""
+        self.names[identity_id] = full_name
+        self.ids[full_name] = identity_id
+
+class IdentityDirectory:
+    """
+    Per-organization in-memory directory of enrolled identities.
+
+    Each organization is loaded from the database once and then kept up to
+    date by `/api/enroll_identity`, so recognition resolves identity names
+    without any query on the hot path.
+    """
+
+    def __init__(self):
+        """Initialize an empty directory."""
+        self._tenants: Dict[int, TenantIdentities] = {}
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    async def _tenant(self, organization_id: int, reload: bool = False) -> TenantIdentities:
+        tenant = self._tenants.get(organization_id)
+        if tenant is not None and not reload:
+            return tenant
+
+        lock = self._locks.setdefault(organization_id, asyncio.Lock())
+        async with lock:
+            current = self._tenants.get(organization_id)
+            if current is not None and current is not tenant:
+                return current  # Loaded by a concurrent caller
+
+            pool = await get_pool()
+            if pool is None:
+                raise ValueError("Database connection pool is not available")
+            with observe_db("identity_directory_load"):
+                async with pool.acquire() as conn:
+                    rows = await conn.fetch("""
+                        SELECT id, full_name
+                        FROM identities
+                        WHERE client_id = $1
+                    """, organization_id)
+
+            tenant = TenantIdentities(rows)
+            self._tenants[organization_id] = tenant
+            return tenant
+
+    async def get_names(self, organization_id: int, identity_ids: Iterable[int]) -> Dict[int, str]:
+        """
+        Resolve identity IDs of an organization to full names.
+
+        Parameters
+        ----------
+        organization_id : int
+            Organization the identities belong to.
+
+        identity_ids : iterable of int
+            Identity IDs to resolve.
+
+        Returns
+        -------
+        dict
+            Full name per resolved identity ID. IDs still unknown after a
+            reload (e.g. deleted identities) are omitted.
+        """
+        identity_ids = [int(identity_id) for identity_id in identity_ids]
+        tenant = await self._tenant(organization_id)
+        if any(identity_id not in tenant.names for identity_id in identity_ids) \
+                and time.monotonic() - tenant.loaded_at >= RELOAD_MIN_INTERVAL:
+            tenant = await self._tenant(organization_id, reload=True)
+
+        return {identity_id: tenant.names[identity_id] for identity_id in identity_ids if identity_id in tenant.names}
+
+    async def get_id(self, organization_id: int, full_name: str) -> Optional[int]:
+        """
+        Resolve the full name of an identity in an organization to its ID.
+
+        Returns
+        -------
+        int or None
+            Identity ID, or None if the organization has no such identity.
+        """
+        tenant = await self._tenant(organization_id)
+        if full_name not in tenant.ids and time.monotonic() - tenant.loaded_at >= RELOAD_MIN_INTERVAL:
+            tenant = await self._tenant(organization_id, reload=True)
+        return tenant.ids.get(full_name)
+
+    def add(self, organization_id: int, identity_id: int, full_name: str) -> None:
+        """Record a newly enrolled identity if its organization is loaded."""
+        tenant = self._tenants.get(organization_id)
+        if tenant is not None:
+            tenant.add(identity_id, full_name)
+
+    def invalidate(self, organization_id: Optional[int] = None) -> None:
+        """Forget one organization, or all of them if no ID is given."""
+        if organization_id is None:
+            self._tenants.clear()
+        else:
+            self._tenants.pop(organization_id, None)
+
+    def stats(self) -> dict:
+        """Number of loaded organizations and identities."""
+        return {
+            "tenants": len(self._tenants),
+            "identities": sum(len(tenant.names) for tenant in self._tenants.values()),
+        }
+
+# Global identity directory instance
+identity_directory = IdentityDirectory()
+
+def get_identity_directory() -> IdentityDirectory:
+    """
+    Get the global identity directory instance.
+
+    Returns
+    -------
+    IdentityDirectory
+        The global identity directory.
+    """
+    return identity_directory
@@ -0,0 +1,344 @@
+import os
+import json
+import math
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import faiss
+
+from app.config import (
+    EMBEDDING_DIM, EMBEDDING_VERSION, LEGACY_EMBEDDING_VERSION, FAISS_INDEX_TYPE, FAISS_NPROBE, FAISS_HNSW_M, FAISS_EF_SEARCH,
+    FAISS_EF_CONSTRUCTION, FAISS_PROMOTE_THRESHOLD, FAISS_PROMOTE_TYPE,
+    FAISS_PROMOTE_MIN_RECALL, FAISS_PROMOTE_RETRY_GROWTH, FAISS_RECALL_SAMPLE
+)
+from app.utils import get_tenant_paths, fsync_directory
+
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+INDEX_CONFIG_FILE = "index_config.json"
+EMBEDDING_VERSION_FILE = "embedding_version"
+IVF_MIN_TRAINING_POINTS = 39  # FAISS wants ~39 training points per inverted list
+
+# Organizations being promoted, and index size at each one's last rejected candidate
+_promotion_lock = threading.Lock()
+_promotions_in_flight: set = set()
+_rejected_sizes: Dict[int, int] = {}
+
+def load_index_config(organization_id: int) -> dict:
+    """
+    Load the index configuration of an organization.
+
+    Values come from ``weights/index_config.json`` of the organization when
+    present, falling back to the FAISS_* environment defaults.
+
+    Parameters
+    ----------
+    organization_id : int
+        Organization ID owning the index.
+
+    Returns
+    -------
+    config : dict
+        - type: str - "flat", "ivf" or "hnsw"
+        - explicit_type: bool - whether the type was set for this organization
+        - nlist: int or None - IVF list count, None to derive from the index size
+        - nprobe: int - IVF lists visited per query
+        - hnsw_m: int - HNSW graph degree
+        - ef_search: int - HNSW search beam width
+        - ef_construction: int - HNSW build beam width
+
+    Raises
+    ------
+    ValueError
+        If the configured index type is unknown.
+    """
+    config = {
+        "type": FAISS_INDEX_TYPE,
+        "explicit_type": False,
+        "nlist": None,
+        "nprobe": FAISS_NPROBE,
+        "hnsw_m": FAISS_HNSW_M,
+        "ef_search": FAISS_EF_SEARCH,
+        "ef_construction": FAISS_EF_CONSTRUCTION,
+    }
+
+    faiss_path, _ = get_tenant_paths(organization_id)
+    config_path = os.path.join(os.path.dirname(faiss_path), INDEX_CONFIG_FILE)
+    if os.path.exists(config_path):
+        with open(config_path, "r") as f:
+            overrides = json.load(f)
+        config["explicit_type"] = "type" in overrides
+        config.update(overrides)
+
+    if config["type"] not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type '{config['type']}', expected one of {INDEX_TYPES}")
+    return config
+
+def get_embedding_version_path(organization_id: int) -> str:
+    """Path of the file recording which EMBEDDING_VERSION the vectors of an organization were computed with."""
+    faiss_path, _ = get_tenant_paths(organization_id)
+    return os.path.join(os.path.dirname(faiss_path), EMBEDDING_VERSION_FILE)
+
+def read_embedding_version(organization_id: int) -> Optional[str]:
+    """Embedding version of an organization's stored vectors, or None if it was never recorded."""
+    try:
+        with open(get_embedding_version_path(organization_id), "r") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def stored_embedding_version(organization_id: int, count: int) -> str:
+    """
+    Embedding version of an organization's ``count`` stored vectors.
+
+    Vectors enrolled before versions were recorded have no version file and
+    count as LEGACY_EMBEDDING_VERSION; a tenant without vectors is current.
+    """
+    if count == 0:
+        return EMBEDDING_VERSION
+    return read_embedding_version(organization_id) or LEGACY_EMBEDDING_VERSION
+
+def write_embedding_version(organization_id: int, version: str = EMBEDDING_VERSION) -> None:
+    """Atomically record the embedding version of an organization's stored vectors."""
+    path = get_embedding_version_path(organization_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path)
+
+def index_type(index: faiss.Index) -> str:
+    """Return "flat", "ivf" or "hnsw" for a FAISS index."""
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+def apply_search_params(index: faiss.Index, config: dict) -> None:
+    """Set query-time tunables (``nprobe`` / ``efSearch``) on a loaded index."""
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = int(config["nprobe"])
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = int(config["ef_search"])
+
+def get_vectors(index: faiss.Index, start: int = 0) -> np.ndarray:
+    """
+    Reconstruct the stored vectors of an index.
+
+    Parameters
+    ----------
+    index : faiss.Index
+        Flat, IVF or HNSW index.
+
+    start : int, optional
+        First vector to reconstruct. Default: 0.
+
+    Returns
+    -------
+    np.ndarray
+        Stored vectors in insertion order. Shape: (ntotal - start, D), dtype: float32.
+    """
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    if index.ntotal <= start:
+        return np.empty((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(start, index.ntotal - start)
+
+def build_index(kind: str, vectors: np.ndarray, config: dict) -> faiss.Index:
+    """
+    Build an inner-product index of the given type over a set of vectors.
+
+    Parameters
+    ----------
+    kind : str
+        "flat", "ivf" or "hnsw".
+
+    vectors : np.ndarray
+        L2-normalized embeddings in label order. Shape: (N, D), dtype: float32.
+
+    config : dict
+        Index configuration as returned by `load_index_config`.
+
+    Returns
+    -------
+    faiss.Index
+        Trained index containing all vectors, with search tunables applied.
+
+    Raises
+    ------
+    ValueError
+        If the type is unknown.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    dim = vectors.shape[1] if vectors.ndim == 2 else EMBEDDING_DIM
+
+    if kind == "flat":
+        index = faiss.IndexFlatIP(dim)
+    elif kind == "ivf":
+        nlist = config.get("nlist") or int(4 * math.sqrt(max(len(vectors), 1)))
+        nlist = max(1, min(nlist, len(vectors) // IVF_MIN_TRAINING_POINTS))
+        quantizer = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, nlist, faiss.METRIC_INNER_PRODUCT)
+        index.train(vectors)
+    elif kind == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, int(config["hnsw_m"]), faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = int(config["ef_construction"])
+    else:
+        raise ValueError(f"Unknown index type '{kind}', expected one of {INDEX_TYPES}")
+
+    if len(vectors):
+        index.add(vectors)
+    apply_search_params(index, config)
+    return index
+
+def recall_at_k(candidate: faiss.Index, vectors: np.ndarray, top_k: int = 10, sample_size: int = FAISS_RECALL_SAMPLE) -> float:
+    """
+    Measure recall of an approximate index against exact search on a sample.
+
+    Parameters
+    ----------
+    candidate : faiss.Index
+        Index to evaluate, built over ``vectors``.
+
+    vectors : np.ndarray
+        Vectors the index contains. Shape: (N, D), dtype: float32.
+
+    top_k : int, optional
+        Neighbors compared per query. Default: 10.
+
+    sample_size : int, optional
+        Number of stored vectors used as queries. Default: FAISS_RECALL_SAMPLE.
+
+    Returns
+    -------
+    float
+        Mean fraction of exact top-k neighbors also returned by ``candidate`` (0.0 - 1.0).
+    """
+    if len(vectors) == 0:
+        return 1.0
+
+    rng = np.random.default_rng(0)
+    queries = vectors[rng.choice(len(vectors), size=min(sample_size, len(vectors)), replace=False)]
+    k = min(top_k, len(vectors))
+
+    exact = faiss.IndexFlatIP(vectors.shape[1])
+    exact.add(vectors)
+    _, exact_ids = exact.search(queries, k)
+    _, candidate_ids = candidate.search(queries, k)
+
+    hits = sum(len(np.intersect1d(e, c)) for e, c in zip(exact_ids, candidate_ids))
+    return hits / (len(queries) * k)
+
+def target_index_type(organization_id: int, ntotal: int) -> str:
+    """
+    Decide which index type an organization should use at its current size.
+
+    An explicitly configured type always wins; otherwise tenants are promoted
+    to FAISS_PROMOTE_TYPE once they reach FAISS_PROMOTE_THRESHOLD vectors.
+    """
+    config = load_index_config(organization_id)
+    if config["explicit_type"]:
+        return config["type"]
+    if ntotal >= FAISS_PROMOTE_THRESHOLD:
+        return FAISS_PROMOTE_TYPE
+    return config["type"]
+
+def write_index_atomic(index: faiss.Index, path: str) -> None:
+    """Durably write a FAISS index to a temporary file and rename it over ``path``."""
+    tmp_path = f"{path}.tmp"
+    faiss.write_index(index, tmp_path)
+    with open(tmp_path, "rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path)
+
+def maybe_promote(organization_id: int) -> dict:
+    """
+    Convert an organization's index to its target type if needed (blocking).
+
+    The candidate index is built outside the tenant lock, checked for recall
+    against exact search on a sample, and swapped in only if it reaches
+    FAISS_PROMOTE_MIN_RECALL. Vectors enrolled while the candidate was being
+    built are copied over before the swap; if the resident index was
+    reloaded or replaced meanwhile the candidate is discarded.
+
+    At most one promotion runs per organization, and after a rejection the
+    next attempt waits until the index grew by FAISS_PROMOTE_RETRY_GROWTH.
+
+    Parameters
+    ----------
+    organization_id : int
+        Organization ID owning the index.
+
+    Returns
+    -------
+    result : dict
+        - status: str - "unchanged", "promoted", "rejected", "in_progress",
+          "deferred" (recently rejected) or "stale" (index reloaded during the build)
+        - from_type: str - index type before the call
+        - to_type: str - target index type
+        - recall: float or None - measured recall of the candidate
+    """
+    with _promotion_lock:
+        if organization_id in _promotions_in_flight:
+            return {"status": "in_progress", "from_type": None, "to_type": None, "recall": None}
+        _promotions_in_flight.add(organization_id)
+    try:
+        return _promote(organization_id)
+    finally:
+        with _promotion_lock:
+            _promotions_in_flight.discard(organization_id)
+
+def _promote(organization_id: int) -> dict:
+    from app.index_cache import get_index_cache
+    from app.journal import tenant_file_lock
+
+    index_cache = get_index_cache()
+    tenant = index_cache.get(organization_id)
+    config = load_index_config(organization_id)
+
+    with tenant.lock:
+        source_index = tenant.index
+        current_type = index_type(source_index)
+        target_type = target_index_type(organization_id, source_index.ntotal)
+        if current_type == target_type or (target_type == "ivf" and source_index.ntotal < IVF_MIN_TRAINING_POINTS):
+            return {"status": "unchanged", "from_type": current_type, "to_type": target_type, "recall": None}
+        with _promotion_lock:
+            rejected_size = _rejected_sizes.get(organization_id)
+        if rejected_size is not None and source_index.ntotal < rejected_size * (1 + FAISS_PROMOTE_RETRY_GROWTH):
+            return {"status": "deferred", "from_type": current_type, "to_type": target_type, "recall": None}
+        vectors = get_vectors(source_index)
+
+    candidate = build_index(target_type, vectors, config)
+    recall = None
+    if target_type != "flat":
+        recall = recall_at_k(candidate, vectors)
+        if recall < FAISS_PROMOTE_MIN_RECALL:
+            with _promotion_lock:
+                _rejected_sizes[organization_id] = len(vectors)
+            print(f"[IndexBuilder] Rejected {target_type} index for organization {organization_id}: recall {recall:.3f}")
+            return {"status": "rejected", "from_type": current_type, "to_type": target_type, "recall": recall}
+
+    faiss_path, _ = get_tenant_paths(organization_id)
+    with tenant_file_lock(organization_id):
+        # The entry may have been reloaded from disk or replaced while building
+        tenant = index_cache.get(organization_id)
+        with tenant.lock:
+            if tenant.index is not source_index:
+                print(f"[IndexBuilder] Discarded {target_type} index for organization {organization_id}: index changed during the build")
+                return {"status": "stale", "from_type": current_type, "to_type": target_type, "recall": recall}
+
+            # Catch up with enrollments that happened while building
+            if tenant.index.ntotal > len(vectors):
+                candidate.add(get_vectors(tenant.index, start=len(vectors)))
+            write_index_atomic(candidate, faiss_path)
+            tenant.index = candidate
+            index_cache.update(organization_id, candidate, tenant.labels)
+
+    with _promotion_lock:
+        _rejected_sizes.pop(organization_id, None)
+    print(f"[IndexBuilder] Promoted organization {organization_id} from {current_type} to {target_type} (recall: {recall})")
+    return {"status": "promoted", "from_type": current_type, "to_type": target_type, "recall": recall}
@@ -0,0 +1,269 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+
+from app.config import EMBEDDING_DIM, EMBEDDING_VERSION, FAISS_CACHE_MAX_BYTES
+from app.utils import get_tenant_paths, load_labels, LABEL_DTYPE
+from app.index_builder import apply_search_params, load_index_config, stored_embedding_version
+from app.journal import get_journal_path, replay_journal
+
+class TenantIndex:
+    """
+    FAISS index and labels of one organization kept resident in memory.
+
+    ``embedding_version`` tells which embedding pipeline the stored vectors
+    come from; when it is not EMBEDDING_VERSION the index keeps serving
+    while `app.reembed` rebuilds it in the background.
+    """
+
+    def __init__(self, organization_id: int, index: faiss.Index, labels: np.ndarray, signature: tuple,
+                 embedding_version: str = EMBEDDING_VERSION):
+        self.organization_id = organization_id
+        self.index = index
+        # Guards the index against searches running while it is being modified
+        self.lock = threading.Lock()
+        self.refresh(labels, signature, embedding_version)
+
+    def refresh(self, labels: np.ndarray, signature: tuple, embedding_version: str = EMBEDDING_VERSION) -> None:
+        """Record new labels, on-disk signature and embedding version after the index was modified."""
+        self.labels = labels
+        self.signature = signature
+        self.embedding_version = embedding_version
+        self.nbytes = _estimate_nbytes(self.index, labels)
+
+    def search(self, embeddings: np.ndarray, top_k: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Search the index and snapshot the matching labels under the tenant lock.
+
+        Returns
+        -------
+        distances : np.ndarray
+            Shape: (N, top_k).
+
+        indices : np.ndarray
+            Shape: (N, top_k).
+
+        labels : np.ndarray
+            Labels consistent with the searched index.
+        """
+        with self.lock:
+            distances, indices = self.index.search(embeddings, top_k)
+            return distances, indices, self.labels
+
+def _file_signature(path: str) -> Optional[tuple[int, int]]:
+    """Return (mtime_ns, size) of a file, or None if it doesn't exist."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _tenant_signature(organization_id: int) -> tuple:
+    """On-disk signature of an organization's index, labels and journal files."""
+    faiss_path, label_path = get_tenant_paths(organization_id)
+    journal_path = get_journal_path(organization_id)
+    return _file_signature(faiss_path), _file_signature(label_path), _file_signature(journal_path)
+
+def _estimate_nbytes(index: faiss.Index, labels: np.ndarray) -> int:
+    """Rough resident size of an index and its labels in bytes."""
+    nbytes = index.ntotal * index.d * 4 + labels.nbytes
+    if isinstance(index, faiss.IndexHNSW):
+        nbytes += index.ntotal * index.hnsw.nb_neighbors(0) * 4  # base-level graph links
+    return nbytes
+
+class IndexCache:
+    """
+    Per-organization registry of resident FAISS indices.
+
+    Entries are refreshed when the index, labels or journal file changes on disk and
+    evicted in least-recently-used order once the estimated resident size
+    exceeds ``max_bytes``. Indices are read from disk outside the cache lock,
+    so loading one tenant never blocks lookups of the others; concurrent
+    lookups of the same tenant wait for a single load.
+    """
+
+    def __init__(self, max_bytes: int = FAISS_CACHE_MAX_BYTES):
+        """Initialize an empty cache with the given memory budget."""
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[int, TenantIndex]" = OrderedDict()
+        self._lock = threading.RLock()
+        # One lock per organization, held while its index is read from disk
+        self._load_locks: Dict[int, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, organization_id: int) -> TenantIndex:
+        """
+        Return the resident index of an organization, loading it if needed.
+
+        Parameters
+        ----------
+        organization_id : int
+            Organization ID owning the index.
+
+        Returns
+        -------
+        TenantIndex
+            Resident index and labels. When no files exist yet an empty
+            in-memory index is returned and nothing is written to disk.
+
+        Raises
+        ------
+        RuntimeError
+            If the index or labels file cannot be read.
+        """
+        signature = _tenant_signature(organization_id)
+        with self._lock:
+            entry = self._lookup(organization_id, signature)
+            if entry is not None:
+                return entry
+            load_lock = self._load_locks.setdefault(organization_id, threading.Lock())
+
+        with load_lock:
+            # Another thread may have loaded the index while we waited
+            signature = _tenant_signature(organization_id)
+            with self._lock:
+                entry = self._lookup(organization_id, signature)
+                if entry is not None:
+                    return entry
+                self.misses += 1
+
+            entry = self._load(organization_id, signature)
+
+            signature = _tenant_signature(organization_id)
+            with self._lock:
+                # Keep an entry registered by update() during the load if it is the current one
+                current = self._entries.get(organization_id)
+                if current is not None and current.signature == signature and entry.signature != signature:
+                    self._entries.move_to_end(organization_id)
+                    return current
+                self._store(entry)
+            return entry
+
+    def update(self, organization_id: int, index: faiss.Index, labels: np.ndarray) -> TenantIndex:
+        """
+        Register the resident index of an organization after it was written to disk.
+
+        When ``index`` is the object already resident, the existing entry is
+        refreshed in place so searches keep sharing its lock.
+
+        Parameters
+        ----------
+        organization_id : int
+            Organization ID owning the index.
+
+        index : faiss.Index
+            Index that was just persisted.
+
+        labels : np.ndarray
+            Labels that were just persisted.
+
+        Returns
+        -------
+        TenantIndex
+            The new resident entry.
+        """
+        signature = _tenant_signature(organization_id)
+        version = stored_embedding_version(organization_id, len(labels))
+        with self._lock:
+            entry = self._entries.get(organization_id)
+            if entry is not None and entry.index is index:
+                entry.refresh(labels, signature, version)
+            else:
+                entry = TenantIndex(organization_id, index, labels, signature, version)
+            self._store(entry)
+        return entry
+
+    def invalidate(self, organization_id: Optional[int] = None) -> None:
+        """Drop one organization from the cache, or all of them if no ID is given."""
+        with self._lock:
+            if organization_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(organization_id, None)
+
+    def organization_ids(self) -> list[int]:
+        """Return the IDs of the organizations currently resident."""
+        with self._lock:
+            return list(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Get cache usage information.
+
+        Returns
+        -------
+        dict
+            Number of resident tenants, resident bytes, budget and hit/miss/eviction counters.
+        """
+        with self._lock:
+            return {
+                "tenants": len(self._entries),
+                "resident_bytes": sum(e.nbytes for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _lookup(self, organization_id: int, signature: tuple) -> Optional[TenantIndex]:
+        # Caller holds self._lock
+        entry = self._entries.get(organization_id)
+        if entry is None or entry.signature != signature:
+            return None
+        self._entries.move_to_end(organization_id)
+        self.hits += 1
+        return entry
+
+    def _load(self, organization_id: int, signature: tuple) -> TenantIndex:
+        try:
+            faiss_path, label_path = get_tenant_paths(organization_id)
+            if signature[0] is not None:
+                index = faiss.read_index(faiss_path)
+                apply_search_params(index, load_index_config(organization_id))
+                labels = load_labels(label_path)
+            else:
+                index = faiss.IndexFlatIP(EMBEDDING_DIM)
+                labels = np.empty(0, dtype=LABEL_DTYPE)
+
+            # Enrollments since the last checkpoint
+            labels = replay_journal(index, labels, get_journal_path(organization_id))
+
+            version = stored_embedding_version(organization_id, len(labels))
+            if version != EMBEDDING_VERSION:
+                print(f"[IndexCache] Organization {organization_id} has {version} embeddings, "
+                      f"serving them until they are re-embedded with {EMBEDDING_VERSION}")
+            return TenantIndex(organization_id, index, labels, signature, version)
+
+        except Exception as e:
+            raise RuntimeError(f"Failed to load faiss and labels for organization {organization_id}: {e}")
+
+    def _store(self, entry: TenantIndex) -> None:
+        self._entries[entry.organization_id] = entry
+        self._entries.move_to_end(entry.organization_id)
+
+        # Evict least recently used tenants, always keeping the newest one
+        total = sum(e.nbytes for e in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted.nbytes
+            self.evictions += 1
+
+# Global index cache instance
+index_cache = IndexCache()
+
+def get_index_cache() -> IndexCache:
+    """
+    Get the global index cache instance.
+
+    Returns
+    -------
+    IndexCache
+        The global index cache shared by search and enrollment.
+    """
+    return index_cache
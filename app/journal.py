@@ -0,0 +1,241 @@
+import os
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import EMBEDDING_DIM, JOURNAL_CHECKPOINT_RECORDS
+from app.utils import get_tenant_paths, save_labels, fsync_directory, LABEL_DTYPE
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process journal lock
+    fcntl = None
+
+def record_dtype(dim: int = EMBEDDING_DIM) -> np.dtype:
+    """
+    Fixed-size on-disk layout of one journal record.
+
+    ``seq`` is the position the embedding takes in the tenant index, which
+    makes replay idempotent: records already contained in the checkpointed
+    index or labels are skipped.
+    """
+    return np.dtype([("seq", "<i8"), ("identity_id", "<i8"), ("embedding", "<f4", (dim,))])
+
+def get_journal_path(organization_id: int) -> str:
+    """Path of the append-only enrollment journal of an organization."""
+    faiss_path, _ = get_tenant_paths(organization_id)
+    return os.path.join(os.path.dirname(faiss_path), f"client_{organization_id}.journal")
+
+@contextmanager
+def tenant_file_lock(organization_id: int) -> Iterator[None]:
+    """
+    Hold an exclusive cross-process lock on an organization's index files.
+
+    Serializes journal appends and checkpoints between worker processes.
+    It is a no-op on platforms without ``fcntl``.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    lock_path = f"{get_journal_path(organization_id)}.lock"
+    with open(lock_path, "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def read_journal(path: str, dim: int = EMBEDDING_DIM) -> np.ndarray:
+    """
+    Read all complete records of a journal file.
+
+    Parameters
+    ----------
+    path : str
+        Journal file path.
+
+    dim : int, optional
+        Embedding dimension. Default: EMBEDDING_DIM.
+
+    Returns
+    -------
+    np.ndarray
+        Structured array with fields ``seq``, ``identity_id`` and ``embedding``.
+        A torn record at the end of the file (crash mid-append) is ignored.
+    """
+    dtype = record_dtype(dim)
+    if not os.path.exists(path):
+        return np.empty(0, dtype=dtype)
+
+    count = os.path.getsize(path) // dtype.itemsize
+    return np.fromfile(path, dtype=dtype, count=count)
+
+def replay_journal(index, labels: np.ndarray, path: str) -> np.ndarray:
+    """
+    Apply journal records missing from a checkpointed index and labels list.
+
+    The index is always checkpointed before the labels, so after a crash the
+    index may hold more vectors than there are labels; such labels are
+    restored from the journal as well.
+
+    Parameters
+    ----------
+    index : faiss.Index
+        Index loaded from the last checkpoint. Modified in place.
+
+    labels : np.ndarray
+        Labels loaded from the last checkpoint.
+
+    path : str
+        Journal file path.
+
+    Returns
+    -------
+    np.ndarray
+        Labels including the replayed records.
+
+    Raises
+    ------
+    RuntimeError
+        If the journal has a gap relative to the checkpoint.
+    """
+    records = read_journal(path, index.d)
+    if len(records) == 0:
+        return labels
+
+    missing_labels = records[records["seq"] >= len(labels)]
+    missing_vectors = records[records["seq"] >= index.ntotal]
+    if len(missing_labels) and missing_labels["seq"][0] != len(labels):
+        raise RuntimeError(f"Journal {path} starts at {missing_labels['seq'][0]}, expected {len(labels)}")
+
+    if len(missing_vectors):
+        index.add(np.ascontiguousarray(missing_vectors["embedding"]))
+    return np.concatenate([labels, missing_labels["identity_id"].astype(LABEL_DTYPE)])
+
+def write_file_atomic(path: str, data: bytes) -> None:
+    """Durably write a file through a temporary file so readers never see it partially written."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_directory(path)
+
+def append_embeddings(organization_id: int, embeddings: np.ndarray, identity_ids: list,
+                      images: Optional[List[Tuple[str, bytes]]] = None) -> int:
+    """
+    Durably enroll embeddings by appending them to the tenant journal (blocking).
+
+    Records are written and fsynced before the resident index is updated, so
+    an enrollment that returned is never lost. The full index is only
+    rewritten every JOURNAL_CHECKPOINT_RECORDS records.
+
+    Parameters
+    ----------
+    organization_id : int
+        Organization ID owning the index.
+
+    embeddings : np.ndarray
+        L2-normalized embeddings. Shape: (N, D), dtype: float32.
+
+    identity_ids : list of int
+        Identity ID of each embedding.
+
+    images : list of (str, bytes), optional
+        Encoded reference images to store as (path, file contents). They are
+        written under the same tenant lock as the records, so an index
+        rebuild never sees an image without its journal record or the other
+        way around.
+
+    Returns
+    -------
+    int
+        Number of records in the journal after the append (0 after a checkpoint).
+    """
+    from app.index_cache import get_index_cache
+    from app.index_builder import write_embedding_version
+
+    embeddings = np.atleast_2d(embeddings).astype(np.float32)
+    index_cache = get_index_cache()
+    path = get_journal_path(organization_id)
+
+    with tenant_file_lock(organization_id):
+        for image_path, data in images or ():
+            write_file_atomic(image_path, data)
+
+        # Reloads the tenant if another process appended since our last look
+        tenant = index_cache.get(organization_id)
+        with tenant.lock:
+            records = np.empty(len(embeddings), dtype=record_dtype(embeddings.shape[1]))
+            records["seq"] = np.arange(len(tenant.labels), len(tenant.labels) + len(embeddings))
+            records["identity_id"] = identity_ids
+            records["embedding"] = embeddings
+
+            # Drop a torn record left by a crash mid-append so new records stay aligned
+            if os.path.exists(path) and os.path.getsize(path) % records.dtype.itemsize:
+                os.truncate(path, os.path.getsize(path) - os.path.getsize(path) % records.dtype.itemsize)
+
+            # First vectors of the tenant: record the pipeline they come from
+            if len(tenant.labels) == 0:
+                write_embedding_version(organization_id)
+
+            with open(path, "ab") as f:
+                f.write(records.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+            tenant.index.add(embeddings)
+            labels = np.concatenate([tenant.labels, np.asarray(identity_ids, dtype=LABEL_DTYPE)])
+            tenant = index_cache.update(organization_id, tenant.index, labels)
+
+            journal_records = os.path.getsize(path) // records.dtype.itemsize
+            if journal_records >= JOURNAL_CHECKPOINT_RECORDS:
+                _checkpoint_locked(organization_id, tenant)
+                return 0
+            return journal_records
+
+def checkpoint(organization_id: int) -> None:
+    """
+    Write the resident index and labels of an organization and truncate its journal (blocking).
+
+    Parameters
+    ----------
+    organization_id : int
+        Organization ID owning the index.
+    """
+    from app.index_cache import get_index_cache
+
+    with tenant_file_lock(organization_id):
+        tenant = get_index_cache().get(organization_id)
+        with tenant.lock:
+            _checkpoint_locked(organization_id, tenant)
+
+def _checkpoint_locked(organization_id: int, tenant) -> None:
+    from app.index_cache import get_index_cache
+    from app.index_builder import write_index_atomic
+
+    faiss_path, label_path = get_tenant_paths(organization_id)
+
+    # Index first, then labels: replay_journal relies on this order
+    write_index_atomic(tenant.index, faiss_path)
+    save_labels(tenant.labels, label_path)
+
+    with open(get_journal_path(organization_id), "wb"):
+        pass
+    get_index_cache().update(organization_id, tenant.index, tenant.labels)
+
+def checkpoint_all() -> None:
+    """
+    Checkpoint every resident organization that has pending journal records (blocking).
+
+    This function should be called during application shutdown.
+    """
+    from app.index_cache import get_index_cache
+
+    for organization_id in get_index_cache().organization_ids():
+        path = get_journal_path(organization_id)
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            checkpoint(organization_id)
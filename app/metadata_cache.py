@@ -0,0 +1,162 @@
+import time
+from typing import Dict, Optional, Tuple
+
+from app.config import METADATA_CACHE_TTL_S
+from app.model_manager import DetectorSettings
+from app.metrics import observe_db
+from database.connection import get_pool
+
+class MetadataCache:
+    """
+    TTL cache of organization and camera IDs used by request handlers.
+
+    Organization names and ``(organization, gate, roll)`` camera keys are
+    resolved in memory; a miss costs one joined query that fills both
+    entries at once, along with the camera's detector settings. Only found
+    rows are cached, and the enrollment endpoints invalidate the keys they
+    touch.
+    """
+
+    def __init__(self, ttl_s: float = METADATA_CACHE_TTL_S):
+        """Initialize an empty cache whose entries expire after ``ttl_s`` seconds."""
+        self.ttl_s = ttl_s
+        self._organizations: Dict[str, Tuple[int, float]] = {}
+        self._cameras: Dict[Tuple[int, str, str], Tuple[int, float]] = {}
+        # Refreshed whenever the camera's entry is fetched again
+        self._detector_settings: Dict[int, DetectorSettings] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, entries: dict, key) -> Optional[int]:
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            entries.pop(key, None)
+            return None
+        return value
+
+    def _store(self, entries: dict, key, value: int) -> None:
+        entries[key] = (value, time.monotonic() + self.ttl_s)
+
+    async def resolve(self, organization_name: str, gate: Optional[str] = None,
+                      roll: Optional[str] = None) -> Tuple[Optional[int], Optional[int]]:
+        """
+        Resolve an organization name and, optionally, one of its cameras.
+
+        Parameters
+        ----------
+        organization_name : str
+            Name of the organization.
+
+        gate : str, optional
+            Camera gate. The camera is only resolved if gate and roll are given.
+
+        roll : str, optional
+            Camera role ("entry" or "exit").
+
+        Returns
+        -------
+        organization_id : int or None
+            Organization ID, or None if the organization is not enrolled.
+
+        camera_id : int or None
+            Camera ID, or None if not requested or not enrolled.
+
+        Raises
+        ------
+        ValueError
+            If the database pool is not available on a cache miss.
+        """
+        want_camera = gate is not None and roll is not None
+        organization_id = self._lookup(self._organizations, organization_name)
+        camera_id = None
+        if organization_id is not None and want_camera:
+            camera_id = self._lookup(self._cameras, (organization_id, gate, roll))
+
+        if organization_id is not None and (camera_id is not None or not want_camera):
+            self.hits += 1
+            return organization_id, camera_id
+
+        self.misses += 1
+        pool = await get_pool()
+        if pool is None:
+            raise ValueError("Database connection pool is not available")
+
+        with observe_db("metadata_resolve"):
+            async with pool.acquire() as conn:
+                row = await conn.fetchrow("""
+                    SELECT c.id AS client_id, cam.id AS camera_id, cam.detector_imgsz, cam.detector_two_pass
+                    FROM clients c
+                    LEFT JOIN cameras cam
+                        ON cam.client_id = c.id and cam.gate = $2 and cam.roll = $3
+                    WHERE c.organization_name = $1
+                """, organization_name, gate, roll)
+
+        if row is None:
+            return None, None
+
+        organization_id = int(row["client_id"])
+        self._store(self._organizations, organization_name, organization_id)
+        if row["camera_id"] is not None:
+            camera_id = int(row["camera_id"])
+            self._store(self._cameras, (organization_id, gate, roll), camera_id)
+            self._detector_settings[camera_id] = camera_detector_settings(row["detector_imgsz"], row["detector_two_pass"])
+        return organization_id, camera_id
+
+    def detector_settings(self, camera_id: Optional[int]) -> DetectorSettings:
+        """Detector settings of a camera resolved by `resolve`, or the defaults."""
+        if camera_id is None:
+            return DetectorSettings()
+        return self._detector_settings.get(camera_id, DetectorSettings())
+
+    async def get_organization_id(self, organization_name: str) -> Optional[int]:
+        """Resolve an organization name to its ID, or None if it is not enrolled."""
+        organization_id, _ = await self.resolve(organization_name)
+        return organization_id
+
+    def invalidate_organization(self, organization_name: str) -> None:
+        """Forget the cached ID of one organization name."""
+        self._organizations.pop(organization_name, None)
+
+    def invalidate_camera(self, organization_id: int, gate: str, roll: str) -> None:
+        """Forget the cached ID of one camera."""
+        camera = self._cameras.pop((organization_id, gate, roll), None)
+        if camera is not None:
+            self._detector_settings.pop(camera[0], None)
+
+    def invalidate(self) -> None:
+        """Forget every cached organization and camera."""
+        self._organizations.clear()
+        self._cameras.clear()
+        self._detector_settings.clear()
+
+    def stats(self) -> dict:
+        """Cached entry counts and hit / miss counters."""
+        return {
+            "organizations": len(self._organizations),
+            "cameras": len(self._cameras),
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+def camera_detector_settings(imgsz: Optional[int], two_pass: Optional[bool]) -> DetectorSettings:
+    """Detector settings from a `cameras` row; NULL columns use the defaults."""
+    default = DetectorSettings()
+    return DetectorSettings(imgsz=int(imgsz) if imgsz else default.imgsz, two_pass=bool(two_pass))
+
+# Global metadata cache instance
+metadata_cache = MetadataCache()
+
+def get_metadata_cache() -> MetadataCache:
+    """
+    Get the global metadata cache instance.
+
+    Returns
+    -------
+    MetadataCache
+        The global metadata cache.
+    """
+    return metadata_cache
@@ -0,0 +1,128 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+from prometheus_client import Counter, Histogram, REGISTRY, CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Seconds; recognition stages range from sub-millisecond searches to multi-second cold loads
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+FRAME_LABELS = ("organization", "camera")
+
+STAGE_LATENCY = {
+    stage: Histogram(f"face_id_{stage}_seconds", f"Time spent in the {stage} stage per frame",
+                     FRAME_LABELS, buckets=LATENCY_BUCKETS)
+    for stage in ("decode", "detect", "crop", "embed", "search")
+}
+REQUEST_LATENCY = Histogram("face_id_frame_seconds", "End-to-end processing time per frame",
+                            FRAME_LABELS, buckets=LATENCY_BUCKETS)
+DB_LATENCY = Histogram("face_id_db_seconds", "Database round trip time by operation",
+                       ("operation",), buckets=LATENCY_BUCKETS)
+
+FRAMES = Counter("face_id_frames", "Frames processed", FRAME_LABELS + ("status", "cached"))
+FACES = Counter("face_id_faces", "Faces detected in processed frames", FRAME_LABELS)
+UNKNOWN_FACES = Counter("face_id_unknown_faces", "Detected faces without a confident identity", FRAME_LABELS)
+
+def observe_frame(organization_id: int, camera_id: int, result: dict, seconds: float, cached: bool = False) -> None:
+    """
+    Record the latency and face counts of one processed frame.
+
+    Parameters
+    ----------
+    organization_id : int
+        Organization the frame was recognized against.
+
+    camera_id : int
+        Camera the frame comes from.
+
+    result : dict
+        `get_id` result. Its ``timings`` (milliseconds per stage) feed the
+        stage histograms unless the result was served from the result cache.
+
+    seconds : float
+        End-to-end processing time of the frame.
+
+    cached : bool, optional
+        Whether the result came from the result cache. Default: False.
+    """
+    labels = (str(organization_id), str(camera_id))
+    FRAMES.labels(*labels, result.get("status", "error"), str(cached).lower()).inc()
+    REQUEST_LATENCY.labels(*labels).observe(seconds)
+    if not cached:
+        for stage, elapsed_ms in result.get("timings", {}).items():
+            histogram = STAGE_LATENCY.get(stage.removesuffix("_ms"))
+            if histogram is not None:
+                histogram.labels(*labels).observe(elapsed_ms / 1000)
+
+    faces = result.get("faces", [])
+    if faces:
+        FACES.labels(*labels).inc(len(faces))
+        unknown = sum(face.get("status") != "ok" or face.get("identity_id") is None for face in faces)
+        if unknown:
+            UNKNOWN_FACES.labels(*labels).inc(unknown)
+
+@contextmanager
+def observe_db(operation: str) -> Iterator[None]:
+    """Time a database round trip, e.g. ``with observe_db("access_log_flush"): ...``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_LATENCY.labels(operation).observe(time.perf_counter() - start)
+
+class StateCollector:
+    """
+    Gauges of readiness, model and index-cache state, read when `/metrics` is scraped.
+
+    State is read from the global model manager and index cache at collection
+    time, so nothing has to be kept in sync on the hot path.
+    """
+
+    def describe(self):
+        # Registering must not import the model and index modules, which import metrics themselves
+        return []
+
+    def collect(self):
+        from app.model_manager import model_manager, models_ready
+        from app.index_cache import get_index_cache
+        from app.warmup import get_warmup
+
+        initialized = GaugeMetricFamily("face_id_model_initialized", "Whether the models are loaded",
+                                        labels=["backend", "device"])
+        initialized.add_metric([model_manager.backend, model_manager.device], float(models_ready()))
+        yield initialized
+        yield GaugeMetricFamily("face_id_ready", "Whether the service passed its startup warm-up", value=float(get_warmup().ready))
+
+        cache = get_index_cache().stats()
+        yield GaugeMetricFamily("face_id_index_cache_tenants", "Tenants with a resident FAISS index", value=cache["tenants"])
+        yield GaugeMetricFamily("face_id_index_cache_resident_bytes", "Bytes of resident FAISS indices", value=cache["resident_bytes"])
+        yield GaugeMetricFamily("face_id_index_cache_max_bytes", "Index cache budget in bytes", value=cache["max_bytes"])
+        for name in ("hits", "misses", "evictions"):
+            yield CounterMetricFamily(f"face_id_index_cache_{name}", f"Index cache {name}", value=cache[name])
+
+REGISTRY.register(StateCollector())
+
+def render_metrics() -> tuple[bytes, str]:
+    """
+    Render all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set (several server worker processes,
+    see ``main.py``) the histograms and counters of every worker are merged;
+    state gauges describe the worker answering the scrape.
+
+    Returns
+    -------
+    body : bytes
+        Exposition of every registered metric.
+
+    content_type : str
+        Content type to serve ``body`` with.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(StateCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
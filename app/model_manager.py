@@ -1,91 +1,156 @@
-import os
 import time
+import asyncio
+import threading
+import cv2
 import numpy as np
-from typing import Optional, Tuple
-import torch
-from ultralytics import YOLO
-from deepface import DeepFace
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
-from app.config import YOLO_MODEL_PATH, EMBEDDING_MODEL, EMBEDDING_DIM
-from app import normalize
+from app.config import (
+    YOLO_MODEL_PATH, EMBEDDING_MODEL, EMBEDDING_DIM, INFERENCE_BACKEND, ONNX_INT8,
+    DETECT_MAX_BATCH, DETECT_MAX_WAIT_MS, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS,
+    DETECT_IMGSZ, DETECT_REFINE_IMGSZ, DETECT_PROPOSAL_CONF, DETECT_REFINE_MARGIN, DETECT_REFINE_MAX_REGIONS,
+    DECODE_TARGET_SIDE, INFERENCE_EXECUTOR, INFERENCE_WORKERS
+)
+from app import normalize_batch
+from app.backends import create_detector, create_embedder
+from app.executor import run_inference
+
+# IoU above which refined boxes of one face are merged
+REFINE_NMS_IOU = 0.5
+
+class DetectorSettings(NamedTuple):
+    """
+    Detector configuration of a camera.
+
+    imgsz : int
+        Detector input size; small for close-range cameras, large for wide ones.
+
+    two_pass : bool
+        Refine first-pass detections by detecting again on crops around them
+        at DETECT_REFINE_IMGSZ, so small faces are seen at a useful resolution.
+    """
+    imgsz: int = DETECT_IMGSZ
+    two_pass: bool = False
+
+    def decode_side(self) -> int:
+        """Long side an upload must keep when decoded for this camera (0 decodes at full resolution)."""
+        if self.two_pass or DECODE_TARGET_SIDE <= 0:
+            return 0  # Refinement crops need the full-resolution pixels
+        return min(DECODE_TARGET_SIDE, self.imgsz)
+
+def refine_windows(boxes: np.ndarray, confidences: np.ndarray, shape: Tuple[int, ...]) -> List[Tuple[int, int, int, int]]:
+    """
+    Square crop windows [x1, y1, x2, y2] around first-pass proposals, clipped to the image.
+
+    Only the DETECT_REFINE_MAX_REGIONS most confident proposals above
+    DETECT_PROPOSAL_CONF are refined.
+    """
+    height, width = shape[:2]
+    windows = []
+    for i in np.argsort(-confidences)[:DETECT_REFINE_MAX_REGIONS]:
+        if confidences[i] < DETECT_PROPOSAL_CONF:
+            break
+        x1, y1, x2, y2 = boxes[i]
+        half = max(x2 - x1, y2 - y1) * DETECT_REFINE_MARGIN / 2
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        window = (max(int(cx - half), 0), max(int(cy - half), 0), min(int(cx + half), width), min(int(cy + half), height))
+        if window[2] > window[0] and window[3] > window[1]:
+            windows.append(window)
+    return windows
 
 class ModelManager:
-    """Global model manager for YOLO and SFace models."""
+    """Global model manager for the face detection and embedding models."""
     
-    def __init__(self):
-        """Initialize the model manager."""
-        self.yolo_model: Optional[YOLO] = None
-        self.embedding_model_name: Optional[str] = None
-        self.device: str = "cuda" if torch.cuda.is_available() else "cpu"
-        self._initialized = False
-    
-    async def initialize(self) -> None:
+    def __init__(self, backend: str = INFERENCE_BACKEND):
         """
-        Initialize all models asynchronously.
+        Initialize the model manager.
         
-        This method loads the YOLO face detection model and prepares
-        the SFace embedding model for use.
+        Parameters
+        ----------
+        backend : str, optional
+            Inference backend, "torch" (ultralytics + DeepFace) or "onnx"
+            (ONNX Runtime on CPU). Default: INFERENCE_BACKEND.
         """
-        if self._initialized:
-            return
-        
-        print("[ModelManager] Initializing models...")
-        
-        # Load YOLO model
-        await self._load_yolo_model()
-        
-        # Initialize embedding model
-        await self._initialize_embedding_model()
-        
-        self._initialized = True
-        print(f"[ModelManager] Models initialized successfully on {self.device}")
+        self.backend = backend
+        self.detector: Optional[Any] = None
+        self.embedder: Optional[Any] = None
+        self.embedding_model_name: Optional[str] = None
+        self.embedding_input_size: Tuple[int, int] = (112, 112)
+        self.device: str = "cpu"
+        self._load_lock = threading.Lock()
+        self._initialized = False
     
-    async def _load_yolo_model(self) -> None:
+    async def initialize(self) -> None:
         """
-        Load the YOLO face detection model.
-        
+        Initialize all models without blocking the event loop.
+
+        Runs `load` in a thread; concurrent callers wait for the same load.
+
         Raises
         ------
         ValueError
-            If YOLO_MODEL_PATH is not set or model file doesn't exist.
+            If the backend is unknown or a model is not configured or missing.
         RuntimeError
             If model loading fails.
         """
-        if YOLO_MODEL_PATH is None:
-            raise ValueError("YOLO_MODEL_PATH is not set or is None")
-        
-        if not os.path.exists(YOLO_MODEL_PATH):
-            raise ValueError(f"YOLO model file not found: {YOLO_MODEL_PATH}")
-        
-        try:
-            print(f"[ModelManager] Loading YOLO model from {YOLO_MODEL_PATH}")
-            self.yolo_model = YOLO(YOLO_MODEL_PATH).to(self.device)
-            
-            # Warm up the model with a dummy inference
-            dummy_image = np.random.randint(0, 255, (640, 640, 3), dtype=np.uint8)
-            _ = self.yolo_model(dummy_image, verbose=False)
-            
-            print(f"[ModelManager] YOLO model loaded successfully on {self.device}")
-        
-        except Exception as e:
-            raise RuntimeError(f"Failed to load YOLO model: {e}")
-    
-    async def _initialize_embedding_model(self) -> None:
+        if self._initialized:
+            return
+        await asyncio.to_thread(self.load)
+
+    def load(self) -> None:
         """
-        Initialize the SFace embedding model.
-        
+        Load the face detector and the embedding model concurrently.
+
+        Each model runs a real warm-up inference right after loading, so the
+        first request does not pay for lazy framework initialization; the
+        manager only reports initialized once both warm-ups succeeded.
+
         Raises
         ------
         ValueError
-            If EMBEDDING_MODEL is not set.
+            If the backend is unknown or a model is not configured or missing.
+        RuntimeError
+            If model loading fails.
         """
-        if EMBEDDING_MODEL is None:
-            raise ValueError("EMBEDDING_MODEL is not set or is None")
-        
-        self.embedding_model_name = EMBEDDING_MODEL
-        print(f"[ModelManager] Embedding model initialized: {self.embedding_model_name}")
+        with self._load_lock:
+            if self._initialized:
+                return
+
+            print(f"[ModelManager] Initializing models with the {self.backend} backend...")
+            start = time.perf_counter()
+            try:
+                with ThreadPoolExecutor(max_workers=2, thread_name_prefix="model-load") as pool:
+                    detector = pool.submit(self._load_detector)
+                    embedder = pool.submit(self._load_embedder)
+                    self.detector, self.embedder = detector.result(), embedder.result()
+            except ValueError:
+                raise
+            except Exception as e:
+                raise RuntimeError(f"Failed to load models: {e}")
+
+            self.device = self.detector.info()["device"]
+            self.embedding_model_name = EMBEDDING_MODEL
+            self.embedding_input_size = self.embedder.input_size
+            self._initialized = True
+            print(f"[ModelManager] Models initialized on {self.device} in {time.perf_counter() - start:.1f}s")
+
+    def _load_detector(self) -> Any:
+        detector = create_detector(self.backend)
+        # Warm up at the default and refinement input sizes
+        dummy_image = np.random.randint(0, 255, (DETECT_IMGSZ, DETECT_IMGSZ, 3), dtype=np.uint8)
+        for imgsz in sorted({DETECT_IMGSZ, DETECT_REFINE_IMGSZ}):
+            detector.detect([dummy_image], imgsz)
+        return detector
+
+    def _load_embedder(self) -> Any:
+        embedder = create_embedder(self.backend)
+        width, height = embedder.input_size
+        embedder.forward(np.random.randint(0, 255, (2, height, width, 3), dtype=np.uint8))
+        return embedder
     
-    def detect_faces(self, image: np.ndarray, conf_threshold: float = 0.7) -> Tuple[np.ndarray, float]:
+    def detect_faces(self, image: np.ndarray, conf_threshold: float = 0.7,
+                     settings: Optional[DetectorSettings] = None) -> Tuple[np.ndarray, float]:
         """
         Detect faces in an image using the loaded YOLO model.
         
@@ -97,6 +162,9 @@ class ModelManager:
         conf_threshold : float, optional
             Minimum confidence threshold for face detection. Default: 0.7.
         
+        settings : DetectorSettings, optional
+            Detector input size and mode of the camera. Default: DETECT_IMGSZ, single pass.
+        
         Returns
         -------
         boxes : np.ndarray
@@ -110,26 +178,102 @@ class ModelManager:
         RuntimeError
             If model is not initialized or face detection fails.
         """
-        if not self._initialized or self.yolo_model is None:
+        return self.detect_faces_batch([image], [conf_threshold], [settings or DetectorSettings()])[0]
+    
+    def detect_faces_batch(self, images: List[np.ndarray], conf_thresholds: List[float],
+                           settings: Optional[List[DetectorSettings]] = None) -> List[Tuple[np.ndarray, float]]:
+        """
+        Detect faces in several images with one YOLO call per input size.
+        
+        Images of two-pass cameras are then refined: crops around every
+        first-pass proposal are detected again in one call at
+        DETECT_REFINE_IMGSZ, and the refined boxes, mapped back to image
+        coordinates, replace the proposals.
+        
+        Parameters
+        ----------
+        images : list of np.ndarray
+            Input images in BGR format. Each shape: (H, W, 3), dtype: uint8.
+        
+        conf_thresholds : list of float
+            Minimum confidence threshold for each image.
+        
+        settings : list of DetectorSettings, optional
+            Detector settings of each image. Default: DETECT_IMGSZ, single pass.
+        
+        Returns
+        -------
+        list of tuple
+            One ``(boxes, used_time)`` pair per image, in input order, as returned by `detect_faces`.
+        
+        Raises
+        ------
+        RuntimeError
+            If model is not initialized or face detection fails.
+        """
+        if not self._initialized or self.detector is None:
             raise RuntimeError("YOLO model not initialized. Call initialize() first.")
         
+        settings = settings or [DetectorSettings()] * len(images)
         try:
-            results = self.yolo_model(image, verbose=False)[0]
-            all_boxes = results.boxes.xyxy.cpu().numpy()
-            confidences = results.boxes.conf.cpu().numpy()
+            all_results = [None] * len(images)
+            for imgsz in sorted({setting.imgsz for setting in settings}):
+                indices = [i for i, setting in enumerate(settings) if setting.imgsz == imgsz]
+                results = self.detector.detect([images[i] for i in indices], imgsz)
+                for i, result in zip(indices, results):
+                    all_results[i] = result
             
-            # Calculate timing
-            total_time = results.speed['preprocess'] + results.speed['inference'] + results.speed['postprocess']
-            time_per_face = total_time / max(len(all_boxes), 1)  # Avoid division by zero
+            two_pass = [i for i, setting in enumerate(settings) if setting.two_pass and len(all_results[i][0])]
+            if two_pass:
+                for i, result in zip(two_pass, self._refine([images[i] for i in two_pass], [all_results[i] for i in two_pass])):
+                    all_results[i] = result
             
-            # Filter by confidence
-            filtered_boxes = all_boxes[confidences >= conf_threshold]
+            detections = []
+            for (all_boxes, confidences, total_time), conf_threshold in zip(all_results, conf_thresholds):
+                # Calculate timing
+                time_per_face = total_time / max(len(all_boxes), 1)  # Avoid division by zero
+                
+                # Filter by confidence
+                filtered_boxes = all_boxes[confidences >= conf_threshold]
+                detections.append((filtered_boxes, time_per_face))
             
-            return filtered_boxes, time_per_face
+            return detections
         
         except Exception as e:
             raise RuntimeError(f"Failed to detect faces: {e}")
     
+    def _refine(self, images: List[np.ndarray],
+                proposals: List[Tuple[np.ndarray, np.ndarray, float]]) -> List[Tuple[np.ndarray, np.ndarray, float]]:
+        """Second detection pass on crops around first-pass proposals; returns boxes, confidences and time like `detect`."""
+        crops = []  # (image index, x offset, y offset, crop)
+        for k, (image, (boxes, confidences, _)) in enumerate(zip(images, proposals)):
+            for x1, y1, x2, y2 in refine_windows(boxes, confidences, image.shape):
+                crops.append((k, x1, y1, image[y1:y2, x1:x2]))
+        
+        found: List[List[Tuple[np.ndarray, np.ndarray]]] = [[] for _ in images]
+        # Each image is charged the time of its own crops, so images with more proposals report more time
+        refine_times = [0.0] * len(images)
+        if crops:
+            results = self.detector.detect([crop for _, _, _, crop in crops], DETECT_REFINE_IMGSZ)
+            for (k, x, y, _), (boxes, confidences, total_time) in zip(crops, results):
+                found[k].append((boxes + np.array([x, y, x, y], dtype=boxes.dtype), confidences))
+                refine_times[k] += total_time
+        
+        refined = []
+        for (boxes, _, first_time), parts, refine_time in zip(proposals, found, refine_times):
+            boxes = np.concatenate([b for b, _ in parts]) if parts else np.empty((0, 4), dtype=np.float32)
+            confidences = np.concatenate([c for _, c in parts]) if parts else np.empty(0, dtype=np.float32)
+            if len(boxes) > 1:
+                # Overlapping crops find the same face more than once
+                keep = cv2.dnn.NMSBoxes(
+                    np.concatenate([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]], axis=1).tolist(),
+                    confidences.tolist(), 0.0, REFINE_NMS_IOU
+                )
+                keep = np.asarray(keep, dtype=np.int64).reshape(-1)
+                boxes, confidences = boxes[keep], confidences[keep]
+            refined.append((boxes, confidences, first_time + refine_time))
+        return refined
+    
     def generate_embedding(self, face: np.ndarray) -> Tuple[np.ndarray, float]:
         """
         Generate a normalized facial embedding using the SFace model.
@@ -152,25 +296,59 @@ class ModelManager:
         RuntimeError
             If model is not initialized or embedding generation fails.
         """
-        if not self._initialized or self.embedding_model_name is None:
+        embeddings, embed_time = self.generate_embeddings_batch([face])
+        return embeddings[0], embed_time
+    
+    def generate_embeddings_batch(self, faces: List[np.ndarray]) -> Tuple[np.ndarray, float]:
+        """
+        Generate normalized facial embeddings for all faces of a frame in one forward pass.
+        
+        Faces are resized into a single preallocated batch tensor, the embedding
+        model runs once over the whole batch and every row is L2-normalized at once.
+        
+        Parameters
+        ----------
+        faces : list of np.ndarray
+            Cropped face images in BGR format. Each shape: (H, W, 3), dtype: uint8.
+        
+        Returns
+        -------
+        embeddings : np.ndarray
+            L2-normalized facial embeddings, one row per face. Shape: (N, 128), dtype: float32.
+        
+        embed_time : float
+            Average time taken per face in milliseconds.
+        
+        Raises
+        ------
+        RuntimeError
+            If model is not initialized or embedding generation fails.
+        """
+        if not self._initialized or self.embedder is None:
             raise RuntimeError("Embedding model not initialized. Call initialize() first.")
         
+        if len(faces) == 0:
+            return np.empty((0, EMBEDDING_DIM), dtype=np.float32), 0.0
+        
         try:
-            start_time = time.time()
+            start_time = time.perf_counter()
             
-            result = DeepFace.represent(
-                img_path=face, 
-                model_name=self.embedding_model_name, 
-                enforce_detection=False
-            )[0]
+            width, height = self.embedding_input_size
+            batch = np.empty((len(faces), height, width, 3), dtype=np.uint8)
+            for i, face in enumerate(faces):
+                if face.shape[:2] == (height, width):
+                    batch[i] = face
+                else:
+                    batch[i] = cv2.resize(face, (width, height))
             
-            embedding = normalize(np.array(result["embedding"]).astype(np.float32))
-            embed_time = (time.time() - start_time) * 1000  # Convert to milliseconds
+            raw_embeddings = self.embedder.forward(batch)
+            embeddings = normalize_batch(raw_embeddings.reshape(len(faces), -1).astype(np.float32))
+            embed_time = (time.perf_counter() - start_time) * 1000 / len(faces)  # ms per face
             
-            return embedding, embed_time
+            return embeddings, embed_time
         
         except Exception as e:
-            raise RuntimeError(f"Failed to generate embedding: {e}")
+            raise RuntimeError(f"Failed to generate embeddings: {e}")
     
     def get_model_info(self) -> dict:
         """
@@ -179,26 +357,33 @@ class ModelManager:
         Returns
         -------
         dict
-            Information about the loaded models including device and model names.
+            Information about the loaded models including the active backend,
+            device, model names and exported model files.
         """
-        return {
+        info = {
+            "backend": self.backend,
+            "quantized": self.backend == "onnx" and ONNX_INT8,
             "yolo_model_path": YOLO_MODEL_PATH,
             "embedding_model": self.embedding_model_name,
             "device": self.device,
             "initialized": self._initialized,
-            "cuda_available": torch.cuda.is_available(),
+            "cuda_available": False,
             "embedding_dim": EMBEDDING_DIM
         }
+        if self._initialized:
+            info.update(self.detector.info())
+            info.update(self.embedder.info())
+        return info
     
     async def cleanup(self) -> None:
         """Clean up model resources."""
-        if self.yolo_model is not None:
-            # Clear CUDA cache if using GPU
-            if self.device == "cuda":
-                torch.cuda.empty_cache()
-            
-            del self.yolo_model
-            self.yolo_model = None
+        if self.detector is not None:
+            self.detector.close()
+            self.detector = None
+        
+        if self.embedder is not None:
+            self.embedder.close()
+            self.embedder = None
         
         self._initialized = False
         print("[ModelManager] Models cleaned up")
@@ -206,18 +391,93 @@ class ModelManager:
 # Global model manager instance
 model_manager = ModelManager()
 
-async def initialize_models() -> None:
+def init_worker_process() -> None:
     """
-    Initialize the global model manager.
+    Load the models inside an inference worker process.
     
-    This function should be called during application startup.
+    Used as the process pool initializer when INFERENCE_EXECUTOR is "process".
+    """
+    model_manager.load()
+
+def model_info_job() -> dict:
+    """Information about the models of the current process (executor entry point)."""
+    return model_manager.get_model_info()
+
+def detect_faces_job(items: List[Tuple[np.ndarray, float, DetectorSettings]]) -> List[Tuple[np.ndarray, float]]:
+    """Run batched face detection on the models of the current process (executor entry point)."""
+    images = [image for image, _, _ in items]
+    conf_thresholds = [conf_threshold for _, conf_threshold, _ in items]
+    settings = [setting for _, _, setting in items]
+    return model_manager.detect_faces_batch(images, conf_thresholds, settings)
+
+def generate_embeddings_job(faces: List[np.ndarray]) -> List[Tuple[np.ndarray, float]]:
+    """Run batched embedding on the models of the current process (executor entry point)."""
+    embeddings, embed_time = model_manager.generate_embeddings_batch(faces)
+    return [(embedding, embed_time) for embedding in embeddings]
+
+# Set once every process inference worker has loaded its models
+_workers_ready = False
+# Model details reported by the process inference workers when they started
+_worker_model_info: Dict[str, Any] = {}
+
+async def initialize_models() -> None:
+    """
+    Initialize the models that serve inference jobs.
+
+    This function should be called during application startup. With a
+    process inference executor only the workers load (and warm up) models,
+    each its own copy, before traffic arrives; this process holds none, and
+    keeps the details the workers report for `get_model_info`.
+    """
+    global _workers_ready
+    if INFERENCE_EXECUTOR == "process":
+        infos = await asyncio.gather(*(run_inference(model_info_job) for _ in range(INFERENCE_WORKERS)))
+        _workers_ready = all(info["initialized"] for info in infos)
+        _worker_model_info.update(infos[0])
+    else:
+        await model_manager.initialize()
+
+async def ensure_models() -> None:
+    """
+    Make sure the models serving inference jobs are loaded before submitting one.
+
+    Process inference workers load their models in the pool initializer, so
+    this only loads the models of this process with a thread executor.
+    """
+    if INFERENCE_EXECUTOR != "process":
+        await model_manager.initialize()
+
+def models_ready() -> bool:
+    """Whether the models serving inference jobs are loaded, without loading them."""
+    return _workers_ready if INFERENCE_EXECUTOR == "process" else model_manager._initialized
+
+def get_model_info() -> dict:
     """
-    await model_manager.initialize()
+    Get information about the models serving inference jobs.
+
+    Answered from this process only: it neither queues a job behind
+    inference nor loads models, so status probes stay cheap.
+
+    Returns
+    -------
+    dict
+        `ModelManager.get_model_info` of this process, or the details the
+        inference workers reported at startup with a process executor, plus
+        the executor kind and worker count.
+    """
+    if INFERENCE_EXECUTOR == "process":
+        info = dict(_worker_model_info) or model_manager.get_model_info()
+        info["initialized"] = _workers_ready
+    else:
+        info = model_manager.get_model_info()
+    info["executor"] = INFERENCE_EXECUTOR
+    info["workers"] = INFERENCE_WORKERS
+    return info
 
 async def get_model_manager() -> ModelManager:
     """
     Get the global model manager instance.
-    
+
     Returns
     -------
     ModelManager
@@ -230,7 +490,167 @@ async def get_model_manager() -> ModelManager:
 async def cleanup_models() -> None:
     """
     Clean up model resources.
-    
+
     This function should be called during application shutdown.
     """
-    await model_manager.cleanup() 
\ No newline at end of file
+    await model_manager.cleanup()
+
+class MicroBatcher:
+    """
+    Cross-request dynamic micro-batching scheduler.
+    
+    Callers submit lists of items; pending items from all callers are collected
+    for up to ``max_wait_ms`` or until ``max_batch_size`` items are waiting, then
+    run as one batched job on the inference executor. Each caller's future is
+    resolved with the results of its own items, in order. If a shared batch
+    fails, each caller's items are run again on their own, so an error only
+    reaches the caller whose items caused it.
+    """
+    
+    def __init__(self, name: str, job: Callable[[List[Any]], List[Any]], max_batch_size: int, max_wait_ms: float):
+        """
+        Parameters
+        ----------
+        name : str
+            Name used in statistics.
+        
+        job : Callable
+            Module-level function mapping a list of items to a list of per-item results.
+        
+        max_batch_size : int
+            Number of pending items that triggers an immediate flush.
+        
+        max_wait_ms : float
+            Longest time the first pending item waits for companions.
+        """
+        self.name = name
+        self.job = job
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._pending: List[Tuple[List[Any], asyncio.Future]] = []
+        self._pending_items = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set = set()
+        self.batches = 0
+        self.items = 0
+        self.max_seen = 0
+        self.failed_batches = 0
+        self.batch_size_counts: Dict[int, int] = {}
+    
+    async def submit(self, items: List[Any]) -> List[Any]:
+        """
+        Queue items for the next batch and wait for their results.
+        
+        Parameters
+        ----------
+        items : list
+            Items of one caller.
+        
+        Returns
+        -------
+        list
+            Results for ``items``, in the same order. Exceptions of a job run
+            on ``items`` alone propagate.
+        """
+        if len(items) == 0:
+            return []
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((items, future))
+        self._pending_items += len(items)
+        
+        if self._pending_items >= self.max_batch_size or self.max_wait == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        
+        return await future
+    
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        
+        pending, self._pending = self._pending, []
+        self._pending_items = 0
+        task = asyncio.get_running_loop().create_task(self._run(pending))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, pending: List[Tuple[List[Any], asyncio.Future]]) -> None:
+        batch = [item for items, _ in pending for item in items]
+        self.batches += 1
+        self.items += len(batch)
+        self.max_seen = max(self.max_seen, len(batch))
+        self.batch_size_counts[len(batch)] = self.batch_size_counts.get(len(batch), 0) + 1
+        
+        try:
+            results = await run_inference(self.job, batch)
+        except Exception as e:
+            if len(pending) == 1:
+                self._resolve(pending[0][1], exception=e)
+                return
+            # One caller's items can fail the whole batch; rerun each caller alone so only it sees the error
+            self.failed_batches += 1
+            await asyncio.gather(*(self._run_alone(items, future) for items, future in pending))
+            return
+        
+        offset = 0
+        for items, future in pending:
+            self._resolve(future, results[offset:offset + len(items)])
+            offset += len(items)
+    
+    async def _run_alone(self, items: List[Any], future: asyncio.Future) -> None:
+        try:
+            self._resolve(future, await run_inference(self.job, items))
+        except Exception as e:
+            self._resolve(future, exception=e)
+    
+    @staticmethod
+    def _resolve(future: asyncio.Future, results: Optional[List[Any]] = None,
+                 exception: Optional[BaseException] = None) -> None:
+        if future.done():
+            return  # Caller was cancelled
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(results)
+    
+    def stats(self) -> dict:
+        """
+        Get achieved batching statistics.
+        
+        Returns
+        -------
+        dict
+            Configured knobs, number of batches and items, mean and max batch
+            size, shared batches that failed and were rerun per caller, and
+            a histogram of batch sizes.
+        """
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "max_batch_seen": self.max_seen,
+            "failed_batches": self.failed_batches,
+            "batch_size_counts": dict(sorted(self.batch_size_counts.items())),
+        }
+
+detection_batcher = MicroBatcher("detection", detect_faces_job, DETECT_MAX_BATCH, DETECT_MAX_WAIT_MS)
+embedding_batcher = MicroBatcher("embedding", generate_embeddings_job, EMBED_MAX_BATCH, EMBED_MAX_WAIT_MS)
+
+def get_batchers() -> Dict[str, MicroBatcher]:
+    """
+    Get the detection and embedding micro-batchers.
+    
+    Returns
+    -------
+    dict
+        Batchers keyed by stage name.
+    """
+    return {"detection": detection_batcher, "embedding": embedding_batcher}
@@ -28,9 +28,9 @@ def resize_face(face: np.ndarray, size=(160, 160)) -> tuple[np.ndarray, float]:
         If resize operation fails.
     """
     try:
-        start = time.time()
+        start = time.perf_counter()
         face_resized = cv2.resize(face, size)
-        resize_time = (time.time() - start) * 1000  # milliseconds
+        resize_time = (time.perf_counter() - start) * 1000  # milliseconds
         return face_resized, resize_time
     
     except Exception as e:
@@ -63,13 +63,13 @@ def crop_face(frame: np.ndarray, box) -> tuple[np.ndarray, float]:
         If crop operation fails.
     """
     try:
-        start = time.time()
+        start = time.perf_counter()
         x1, y1, x2, y2 = map(int, box)
         h, w = frame.shape[:2]
         x1, y1 = max(0, x1), max(0, y1)
         x2, y2 = min(w, x2), min(h, y2)
         face = frame[y1:y2, x1:x2]
-        crop_time = (time.time() - start) * 1000  # milliseconds
+        crop_time = (time.perf_counter() - start) * 1000  # milliseconds
         return face, crop_time
     
     except Exception as e:
@@ -102,3 +102,30 @@ def normalize(embedding: np.ndarray) -> np.ndarray:
         return embedding / norm
     except Exception as e:
         raise RuntimeError(f"Failed to normalize embedding: {e}")
+
+def normalize_batch(embeddings: np.ndarray) -> np.ndarray:
+    """
+    Normalize a matrix of face embeddings row-wise using L2 norm.
+
+    Parameters
+    ----------
+    embeddings : np.ndarray
+        Face embeddings, one per row. Shape: (N, D), dtype: float32 or float64.
+
+    Returns
+    -------
+    normalized : np.ndarray
+        Row-wise L2-normalized embeddings. Shape: (N, D), same dtype as input.
+
+    Raises
+    ------
+    RuntimeError
+        If any row has a zero norm or invalid input is provided.
+    """
+    try:
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        if np.any(norms == 0):
+            raise ValueError("Cannot normalize zero-vector.")
+        return embeddings / norms
+    except Exception as e:
+        raise RuntimeError(f"Failed to normalize embeddings: {e}")
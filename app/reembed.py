@@ -0,0 +1,162 @@
+import os
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Set, Tuple
+
+import numpy as np
+
+from app.config import CLIENT_FOLDER, EMBEDDING_DIM, EMBED_MAX_BATCH
+from app.utils import get_tenant_paths, save_labels, LABEL_DTYPE
+from app.executor import run_blocking, run_index_build
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process guard
+    fcntl = None
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+# Attempts before giving up when enrollments keep changing the image set
+MAX_ATTEMPTS = 3
+
+_reembed_tasks: Dict[int, asyncio.Task] = {}
+# Organizations whose re-embedding would have lost vectors; left to scripts/rebuild_index.py
+_refused: Set[int] = set()
+
+def list_images(organization_id: int) -> List[Tuple[str, int]]:
+    """All reference images of an organization as (path, identity_id), in a stable order."""
+    images_dir = os.path.join(CLIENT_FOLDER, str(organization_id), "images")
+    items = []
+    if not os.path.isdir(images_dir):
+        return items
+
+    for identity in sorted((name for name in os.listdir(images_dir) if name.isdigit()), key=int):
+        identity_dir = os.path.join(images_dir, identity)
+        if not os.path.isdir(identity_dir):
+            continue
+        for img_file in sorted(os.listdir(identity_dir)):
+            if img_file.lower().endswith(IMAGE_EXTENSIONS):
+                items.append((os.path.join(identity_dir, img_file), int(identity)))
+    return items
+
+def schedule_reembed(organization_id: int) -> None:
+    """
+    Re-embed an organization's reference images in the background.
+
+    Called when a tenant's stored vectors come from another embedding
+    pipeline (see `app.index_cache.TenantIndex.embedding_version`). The old
+    index keeps serving until the rebuilt one is swapped in. Does nothing if
+    a re-embed of the organization is already running or was refused.
+    """
+    task = _reembed_tasks.get(organization_id)
+    if organization_id in _refused or (task is not None and not task.done()):
+        return
+    task = asyncio.create_task(reembed_organization(organization_id))
+    _reembed_tasks[organization_id] = task
+    task.add_done_callback(lambda _: _reembed_tasks.pop(organization_id, None))
+
+async def reembed_organization(organization_id: int) -> bool:
+    """
+    Re-embed every reference image of an organization with the current pipeline and swap the index in.
+
+    Embeddings go through the shared embedding batcher, the index is built
+    on the index-build executor. Only one process re-embeds an organization
+    at a time; the others pick the result up when their cache reloads.
+
+    Returns
+    -------
+    bool
+        Whether the rebuilt index replaced the live one.
+    """
+    try:
+        with _reembed_lock(organization_id) as acquired:
+            if not acquired:
+                return False
+            for _ in range(MAX_ATTEMPTS):
+                items = await run_blocking(list_images, organization_id)
+                vectors, labels, paths = await _embed_images(items)
+                status = await run_index_build(_swap, organization_id, paths, vectors, labels)
+                if status == "swapped":
+                    print(f"[Reembed] Re-embedded {len(labels)} reference image(s) of organization {organization_id}")
+                    return True
+                if status == "refused":
+                    _refused.add(organization_id)
+                    return False
+            print(f"[Reembed] Reference images of organization {organization_id} kept changing, will retry later")
+            return False
+
+    except Exception as e:
+        print(f"[Reembed] Failed to re-embed organization {organization_id}: {e}")
+        return False
+
+async def _embed_images(items: List[Tuple[str, int]]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    import cv2
+    from app.embedder import embbeding_faces_batch
+
+    embeddings, labels = [], []
+    for start in range(0, len(items), EMBED_MAX_BATCH):
+        batch = items[start:start + EMBED_MAX_BATCH]
+        faces = await asyncio.gather(*(run_blocking(cv2.imread, path) for path, _ in batch))
+        readable = [(face, identity_id) for face, (path, identity_id) in zip(faces, batch) if face is not None]
+        if len(readable) < len(batch):
+            print(f"[Reembed] Skipped {len(batch) - len(readable)} unreadable reference image(s)")
+        if readable:
+            batch_embeddings, _ = await embbeding_faces_batch([face for face, _ in readable])
+            embeddings.append(batch_embeddings)
+            labels += [identity_id for _, identity_id in readable]
+
+    vectors = np.concatenate(embeddings) if embeddings else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    return vectors.astype(np.float32), np.asarray(labels, dtype=LABEL_DTYPE), [path for path, _ in items]
+
+def _swap(organization_id: int, paths: List[str], vectors: np.ndarray, labels: np.ndarray) -> str:
+    from app.index_cache import get_index_cache
+    from app.journal import get_journal_path, tenant_file_lock
+    from app.index_builder import (
+        build_index, load_index_config, target_index_type, write_index_atomic, write_embedding_version,
+        IVF_MIN_TRAINING_POINTS
+    )
+
+    kind = target_index_type(organization_id, len(vectors))
+    if kind == "ivf" and len(vectors) < IVF_MIN_TRAINING_POINTS:
+        kind = "flat"
+    index = build_index(kind, vectors, load_index_config(organization_id))
+
+    faiss_path, label_path = get_tenant_paths(organization_id)
+    with tenant_file_lock(organization_id):
+        # Enrollment writes images under this lock, so an unchanged list means nothing is missing
+        if [path for path, _ in list_images(organization_id)] != paths:
+            return "changed"
+
+        stored = len(get_index_cache().get(organization_id).labels)
+        if len(labels) < stored:
+            print(f"[Reembed] Organization {organization_id} has {stored} vectors but only {len(labels)} readable "
+                  f"reference images; run scripts/rebuild_index.py --org {organization_id} --swap to accept the loss")
+            return "refused"
+
+        # Index, labels, journal, then version: a crash before the version is written only repeats the re-embed
+        write_index_atomic(index, faiss_path)
+        save_labels(labels, label_path)
+        with open(get_journal_path(organization_id), "wb"):
+            pass
+        write_embedding_version(organization_id)
+        get_index_cache().invalidate(organization_id)
+    return "swapped"
+
+@contextmanager
+def _reembed_lock(organization_id: int) -> Iterator[bool]:
+    """Try to take a cross-process lock on re-embedding an organization; yields whether it was taken."""
+    if fcntl is None:
+        yield True
+        return
+
+    faiss_path, _ = get_tenant_paths(organization_id)
+    with open(os.path.join(os.path.dirname(faiss_path), "reembed.lock"), "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
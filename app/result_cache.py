@@ -0,0 +1,139 @@
+import copy
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import RESULT_CACHE_TTL_S, RESULT_CACHE_MAX_ENTRIES
+from app.model_manager import DetectorSettings
+
+class ResultCache:
+    """
+    Short-TTL, size-bounded cache of `get_id` results keyed by upload content.
+
+    Gateways that resend the identical JPEG of a static scene get the
+    previous result back without decoding, detection, embedding or search.
+    The key is a hash of the raw upload bytes plus the organization ID and
+    detector settings, so a byte-identical image is never answered from
+    another tenant's result or from a differently configured camera.
+    """
+
+    def __init__(self, ttl_s: float = RESULT_CACHE_TTL_S, max_entries: int = RESULT_CACHE_MAX_ENTRIES):
+        """Initialize an empty cache; ``max_entries`` of 0 disables caching."""
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(organization_id: int, image_bytes: bytes, settings: tuple = ()) -> tuple:
+        """Cache key of an upload for an organization and detector settings."""
+        return organization_id, tuple(settings), hashlib.blake2b(image_bytes, digest_size=16).digest()
+
+    def get(self, organization_id: int, image_bytes: bytes, settings: tuple = ()) -> Optional[dict]:
+        """
+        Look up the result of an identical upload.
+
+        Returns
+        -------
+        dict or None
+            Copy of the cached `get_id` result, or None on a miss or expiry.
+        """
+        if self.max_entries <= 0:
+            return None
+
+        key = self.key(organization_id, image_bytes, settings)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() >= entry[1]:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return copy.deepcopy(entry[0])
+
+    def put(self, organization_id: int, image_bytes: bytes, result: dict, settings: tuple = ()) -> None:
+        """Cache a `get_id` result; only successful results are stored."""
+        if self.max_entries <= 0 or result.get("status") != "success":
+            return
+
+        key = self.key(organization_id, image_bytes, settings)
+        with self._lock:
+            self._entries[key] = (copy.deepcopy(result), time.monotonic() + self.ttl_s)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        """Entry count, bounds and hit / miss counters."""
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+# Global result cache instance
+result_cache = ResultCache()
+
+def get_result_cache() -> ResultCache:
+    """
+    Get the global result cache instance.
+
+    Returns
+    -------
+    ResultCache
+        The global result cache.
+    """
+    return result_cache
+
+async def get_id_cached(image_bytes: bytes, organization_id: int,
+                        detector_settings: Optional[DetectorSettings] = None) -> tuple[Optional[dict], bool]:
+    """
+    Run `get_id` on an encoded upload, reusing the result of an identical recent upload.
+
+    The upload is decoded at reduced resolution for detection when it is
+    much larger than the camera's detector input (see `decode_image_reduced`).
+
+    Parameters
+    ----------
+    image_bytes : bytes
+        Encoded image (JPEG, PNG) as uploaded.
+
+    organization_id : int
+        Organization ID to search against.
+
+    detector_settings : DetectorSettings, optional
+        Detector input size and mode of the camera. Default: DETECT_IMGSZ, single pass.
+
+    Returns
+    -------
+    result : dict or None
+        `get_id` result, or None if the image could not be decoded. Its
+        ``timings`` include the decode time.
+
+    cached : bool
+        Whether the result came from the cache.
+    """
+    from app import get_id, decode_image_reduced
+
+    detector_settings = detector_settings or DetectorSettings()
+    result = result_cache.get(organization_id, image_bytes, detector_settings)
+    if result is not None:
+        return result, True
+
+    decode_start = time.perf_counter()
+    img, scale = await decode_image_reduced(image_bytes, detector_settings.decode_side())
+    decode_ms = (time.perf_counter() - decode_start) * 1000
+    if img is None:
+        return None, False
+
+    result = await get_id(img, organization_id, image_bytes=image_bytes, scale=scale, detector_settings=detector_settings)
+    result.setdefault("timings", {})["decode_ms"] = decode_ms
+    result_cache.put(organization_id, image_bytes, result, detector_settings)
+    return result, False
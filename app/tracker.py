@@ -0,0 +1,138 @@
+import time
+import itertools
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.config import TRACK_IOU_THRESHOLD, TRACK_REEMBED_IOU, TRACK_MAX_AGE_S
+
+def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise intersection-over-union of two sets of boxes.
+
+    Parameters
+    ----------
+    boxes_a : np.ndarray
+        Boxes [x1, y1, x2, y2]. Shape: (N, 4).
+
+    boxes_b : np.ndarray
+        Boxes [x1, y1, x2, y2]. Shape: (M, 4).
+
+    Returns
+    -------
+    np.ndarray
+        IoU of every pair. Shape: (N, M), dtype: float64.
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)[:, None, :]
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)[None, :, :]
+
+    inter_w = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    inter_h = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = inter_w * inter_h
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    union = area_a + area_b - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+class Track:
+    """One face followed across frames, with its last identity decision."""
+
+    def __init__(self, track_id: int, box: np.ndarray, now: float):
+        self.track_id = track_id
+        self.box = box
+        self.last_seen = now
+        self.result: Optional[dict] = None
+        self.decision_box: Optional[np.ndarray] = None
+
+    def needs_embedding(self, reembed_iou: float) -> bool:
+        """Whether the face must be embedded again instead of reusing the last decision."""
+        if self.result is None or self.result.get("status") != "ok":
+            return True
+        return bool(iou_matrix(self.box, self.decision_box)[0, 0] < reembed_iou)
+
+class FaceTracker:
+    """
+    IoU tracker associating the face boxes of consecutive frames of one camera.
+
+    A tracked face keeps the identity decided when it was last embedded. It
+    is only embedded again when its track is new, its last result was below
+    VOTE_THRESHOLD, or its box moved so that the IoU with the box of the last
+    decision fell below ``reembed_iou``.
+    """
+
+    def __init__(self, iou_threshold: float = TRACK_IOU_THRESHOLD, reembed_iou: float = TRACK_REEMBED_IOU,
+                 max_age_s: float = TRACK_MAX_AGE_S):
+        """Initialize a tracker without tracks."""
+        self.iou_threshold = iou_threshold
+        self.reembed_iou = reembed_iou
+        self.max_age_s = max_age_s
+        self.tracks: List[Track] = []
+        self._ids = itertools.count(1)
+        self.embedded = 0
+        self.reused = 0
+
+    def update(self, boxes, now: Optional[float] = None) -> List[Tuple[Track, bool]]:
+        """
+        Associate the boxes of a new frame with existing tracks.
+
+        Boxes are greedily matched to the unmatched track of highest IoU above
+        ``iou_threshold``; unmatched boxes start new tracks and tracks not seen
+        for ``max_age_s`` are dropped.
+
+        Parameters
+        ----------
+        boxes : list or np.ndarray
+            Face boxes [x1, y1, x2, y2] of the frame. Shape: (N, 4).
+
+        now : float, optional
+            Frame time in seconds. Default: `time.monotonic()`.
+
+        Returns
+        -------
+        list of (Track, bool)
+            Track of every box, in box order, and whether the face needs embedding.
+        """
+        now = time.monotonic() if now is None else now
+        self.tracks = [track for track in self.tracks if now - track.last_seen <= self.max_age_s]
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+        assigned: List[Optional[Track]] = [None] * len(boxes)
+        if len(boxes) and self.tracks:
+            ious = iou_matrix(boxes, np.stack([track.box for track in self.tracks]))
+            # Highest-IoU pairs first; each box and track is used once
+            used_tracks = set()
+            for flat in np.argsort(-ious, axis=None):
+                box_idx, track_idx = np.unravel_index(flat, ious.shape)
+                if ious[box_idx, track_idx] < self.iou_threshold:
+                    break
+                if assigned[box_idx] is None and track_idx not in used_tracks:
+                    assigned[box_idx] = self.tracks[track_idx]
+                    used_tracks.add(track_idx)
+
+        result = []
+        for box, track in zip(boxes, assigned):
+            if track is None:
+                track = Track(next(self._ids), box, now)
+                self.tracks.append(track)
+            track.box = box
+            track.last_seen = now
+            needs_embedding = track.needs_embedding(self.reembed_iou)
+            if needs_embedding:
+                self.embedded += 1
+            else:
+                self.reused += 1
+            result.append((track, needs_embedding))
+        return result
+
+    def record(self, track: Track, result: dict) -> None:
+        """Store the identity decision made for a track's current box."""
+        track.result = dict(result)
+        track.decision_box = track.box
+
+    def stats(self) -> dict:
+        """Active track count and embedded / reused face counters."""
+        return {
+            "tracks": len(self.tracks),
+            "embedded": self.embedded,
+            "reused": self.reused,
+        }
@@ -1,62 +1,195 @@
 import os
-import faiss
 import pickle
 import numpy as np
 import cv2
 from fastapi import UploadFile
-from app.config import EMBEDDING_DIM
+from app.config import CLIENT_FOLDER, MAX_UPLOAD_BYTES, DECODE_TARGET_SIDE
+from app.executor import run_blocking
 
-def load_faiss(faiss_path, label_path):
+# Identity IDs are stored as a flat int32 array parallel to the FAISS index
+LABEL_DTYPE = np.int32
+
+def get_tenant_paths(organization_id: int) -> tuple[str, str]:
     """
-    Load or initialize FAISS index and labels for face similarity search.
+    Build the FAISS index and labels file paths of an organization.
 
     Parameters
     ----------
+    organization_id : int
+        Organization ID owning the index.
+
+    Returns
+    -------
     faiss_path : str
-        Path to the FAISS index file.
+        Path to the organization's FAISS index file.
+
+    label_path : str
+        Path to the organization's labels ``.npy`` file.
+
+    Raises
+    ------
+    ValueError
+        If CLIENT_FOLDER is not set.
+    """
+    if CLIENT_FOLDER is None:
+        raise ValueError("CLIENT_FOLDER is not set or is None")
+
+    weights_dir = os.path.join(CLIENT_FOLDER, str(organization_id), "weights")
+    faiss_path = os.path.join(weights_dir, f"client_{organization_id}.faiss")
+    label_path = os.path.join(weights_dir, f"client_{organization_id}.labels.npy")
+    return faiss_path, label_path
+
+def get_legacy_label_path(label_path: str) -> str:
+    """Path of the pickled label list that preceded a ``.labels.npy`` file."""
+    return label_path[:-len(".labels.npy")] + ".pkl"
+
+def save_labels(labels: np.ndarray, label_path: str) -> None:
+    """
+    Atomically write identity labels as an int32 ``.npy`` file.
+
+    Parameters
+    ----------
+    labels : np.ndarray
+        Identity ID of each vector in the FAISS index. Shape: (N,).
 
     label_path : str
-        Path to the labels pickle file.
+        Destination ``.npy`` path.
+    """
+    tmp_path = f"{label_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.asarray(labels, dtype=LABEL_DTYPE))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, label_path)
+    fsync_directory(label_path)
+
+def fsync_directory(path: str) -> None:
+    """
+    Flush the directory entry of ``path`` so a rename onto it survives a crash.
+
+    Parameters
+    ----------
+    path : str
+        File whose parent directory is flushed.
+    """
+    if os.name != "posix":
+        return  # Directories cannot be opened for fsync on Windows
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def load_labels(label_path: str) -> np.ndarray:
+    """
+    Load identity labels, migrating a legacy pickled list when needed.
+
+    Parameters
+    ----------
+    label_path : str
+        Path to the labels ``.npy`` file.
 
     Returns
     -------
-    index : faiss.IndexFlatIP
-        FAISS index object for inner product similarity search.
-
-    labels : list
-        List of identity labels corresponding to each embedding in the FAISS index.
+    labels : np.ndarray
+        Identity ID of each vector in the FAISS index. Shape: (N,), dtype: int32.
+        Memory-mapped read-only on POSIX systems; empty if no labels exist yet.
 
     Raises
     ------
     RuntimeError
-        If fail to load or initialize FAISS index and labels.
+        If the labels cannot be read or converted.
     """
     try:
-        # Load or initialize FAISS index and labels
-        if os.path.exists(faiss_path) and os.path.exists(label_path):
-            index = faiss.read_index(faiss_path)
-            with open(label_path, "rb") as f:
-                labels = pickle.load(f)
-        else:
-            index = faiss.IndexFlatIP(EMBEDDING_DIM)   
-            faiss.write_index(index, faiss_path)
-            labels = []
-            with open(label_path, "wb") as f:
-                pickle.dump(labels, f)
-
-        return index, labels
+        if not os.path.exists(label_path):
+            legacy_path = get_legacy_label_path(label_path)
+            if not os.path.exists(legacy_path):
+                return np.empty(0, dtype=LABEL_DTYPE)
+
+            with open(legacy_path, "rb") as f:
+                save_labels(np.asarray(pickle.load(f), dtype=LABEL_DTYPE), label_path)
+            print(f"[Labels] Migrated {legacy_path} to {label_path}")
+
+        return np.load(label_path, mmap_mode="r" if os.name == "posix" else None)
 
     except Exception as e:
-        raise RuntimeError(f"Failed to load faiss and labels: {e}")
+        raise RuntimeError(f"Failed to load labels: {e}")
 
-async def read_image(image: UploadFile) -> np.ndarray | None:
+# JPEG start-of-frame markers carrying the image size (not DHT, JPG or DAC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_REDUCED_DECODE_FLAGS = ((8, cv2.IMREAD_REDUCED_COLOR_8), (4, cv2.IMREAD_REDUCED_COLOR_4), (2, cv2.IMREAD_REDUCED_COLOR_2))
+
+def jpeg_size(image_bytes: bytes) -> tuple[int, int] | None:
     """
-    Read and decode an image from an UploadFile object to numpy array.
+    Read the width and height of a JPEG from its header without decoding it.
+
+    Returns
+    -------
+    tuple of int or None
+        (width, height), or None if the bytes are not a parseable JPEG.
+    """
+    if image_bytes[:2] != b"\xff\xd8":
+        return None
+
+    pos = 2
+    while pos + 4 <= len(image_bytes):
+        if image_bytes[pos] != 0xFF:
+            return None
+        marker = image_bytes[pos + 1]
+        if marker == 0xFF:  # Fill byte
+            pos += 1
+            continue
+        if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # Markers without a segment
+            pos += 2
+            continue
+
+        length = int.from_bytes(image_bytes[pos + 2:pos + 4], "big")
+        if marker in _JPEG_SOF_MARKERS:
+            if pos + 9 > len(image_bytes):
+                return None
+            height = int.from_bytes(image_bytes[pos + 5:pos + 7], "big")
+            width = int.from_bytes(image_bytes[pos + 7:pos + 9], "big")
+            return (width, height) if width and height else None
+        if marker == 0xDA:  # Start of scan before any frame header
+            return None
+        pos += 2 + length
+    return None
+
+def reduced_decode_factor(size: tuple[int, int], target_side: int) -> int:
+    """
+    Largest JPEG decode scale (1, 2, 4 or 8) keeping the long side at least ``target_side``.
+
+    The detector resizes its input to ``target_side`` anyway, so decoding
+    more pixels than that only costs time.
+    """
+    if target_side <= 0:
+        return 1
+    for factor, _ in _REDUCED_DECODE_FLAGS:
+        if max(size) // factor >= target_side:
+            return factor
+    return 1
+
+def _imdecode_reduced(image_bytes: bytes, target_side: int) -> tuple[np.ndarray | None, float]:
+    np_arr = np.frombuffer(image_bytes, np.uint8)
+    size = jpeg_size(image_bytes)
+    factor = reduced_decode_factor(size, target_side) if size is not None else 1
+    if factor == 1:
+        return cv2.imdecode(np_arr, cv2.IMREAD_COLOR), 1.0
+
+    img = cv2.imdecode(np_arr, dict(_REDUCED_DECODE_FLAGS)[factor])
+    if img is None:
+        return None, 1.0
+    # Measured on the long side, which EXIF rotation does not change
+    return img, max(size) / max(img.shape[:2])
+
+async def decode_image(image_bytes: bytes) -> np.ndarray | None:
+    """
+    Decode encoded image bytes (JPEG, PNG, ...) to a numpy array at full resolution.
 
     Parameters
     ----------
-    image : UploadFile
-        The uploaded image file from FastAPI.
+    image_bytes : bytes
+        Encoded image.
 
     Returns
     -------
@@ -65,11 +198,96 @@ async def read_image(image: UploadFile) -> np.ndarray | None:
         Shape: (H, W, 3), dtype: uint8.
     """
     try:
-        image_bytes = await image.read()
         np_arr = np.frombuffer(image_bytes, np.uint8)
-        img = cv2.imdecode(np_arr, cv2.IMREAD_COLOR)
+        img = await run_blocking(cv2.imdecode, np_arr, cv2.IMREAD_COLOR)
 
         return img if img is not None else None
+    except Exception as e:
+        print(f"[decode_image] Error decoding image: {e}")
+        return None
+
+async def decode_image_reduced(image_bytes: bytes, target_side: int = DECODE_TARGET_SIDE) -> tuple[np.ndarray | None, float]:
+    """
+    Decode an image for detection, at reduced resolution when it is much larger than the detector input.
+
+    JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale (libjpeg DCT
+    scaling), choosing the smallest decode whose long side is still at least
+    ``target_side``; other formats and small images are decoded at full
+    resolution.
+
+    Parameters
+    ----------
+    image_bytes : bytes
+        Encoded image.
+
+    target_side : int, optional
+        Detector input size. Default: DECODE_TARGET_SIDE.
+
+    Returns
+    -------
+    img : np.ndarray | None
+        Decoded image array in BGR format, or None if decoding fails.
+        Shape: (H, W, 3), dtype: uint8.
+
+    scale : float
+        Full-resolution size divided by decoded size (1.0 for a full decode).
+    """
+    try:
+        return await run_blocking(_imdecode_reduced, image_bytes, target_side)
+    except Exception as e:
+        print(f"[decode_image_reduced] Error decoding image: {e}")
+        return None, 1.0
+
+async def read_upload(image: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    """
+    Read an uploaded file, refusing files larger than ``max_bytes``.
+
+    Parameters
+    ----------
+    image : UploadFile
+        The uploaded file from FastAPI.
+
+    max_bytes : int, optional
+        Largest accepted upload. Default: MAX_UPLOAD_BYTES.
+
+    Returns
+    -------
+    bytes
+        Content of the upload.
+
+    Raises
+    ------
+    ValueError
+        If the upload is larger than ``max_bytes``.
+    """
+    if image.size is not None and image.size > max_bytes:
+        raise ValueError(f"upload of {image.size} bytes exceeds the {max_bytes} byte limit")
+
+    # Never reads more than one byte past the limit
+    data = await image.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"upload exceeds the {max_bytes} byte limit")
+    return data
+
+async def read_image(image: UploadFile) -> np.ndarray | None:
+    """
+    Read and decode an image from an UploadFile object to numpy array.
+
+    Parameters
+    ----------
+    image : UploadFile
+        The uploaded image file from FastAPI.
+
+    Returns
+    -------
+    np.ndarray | None
+        Decoded image array in BGR format, or None if the upload is larger
+        than MAX_UPLOAD_BYTES or decoding fails.
+        Shape: (H, W, 3), dtype: uint8.
+    """
+    try:
+        image_bytes = await read_upload(image)
+        return await decode_image(image_bytes)
     except Exception as e:
         print(f"[read_image] Error reading image: {e}")
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,179 @@
+import time
+import asyncio
+from typing import Dict, List, Optional
+
+from app.config import PRELOAD_TENANTS, PRELOAD_RECENT_EVENTS, CAMERA_INGEST_ENABLED
+from app.metrics import observe_db
+from database.connection import get_pool
+
+# Components that must be up before the service accepts traffic
+REQUIRED_COMPONENTS = ("database", "models")
+
+async def hot_tenant_ids(limit: int = PRELOAD_TENANTS) -> List[int]:
+    """
+    Rank organizations by their share of the latest PRELOAD_RECENT_EVENTS access logs.
+
+    Parameters
+    ----------
+    limit : int, optional
+        Number of organizations to return; 0 returns none. Default: PRELOAD_TENANTS.
+
+    Returns
+    -------
+    list of int
+        IDs of the busiest organizations, busiest first.
+
+    Raises
+    ------
+    ValueError
+        If the database pool is not available.
+    """
+    if limit <= 0:
+        return []
+
+    pool = await get_pool()
+    if pool is None:
+        raise ValueError("Database connection pool is not available")
+    with observe_db("hot_tenant_ids"):
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT cam.client_id, count(*) AS events
+                FROM (SELECT camera_id FROM access_logs ORDER BY id DESC LIMIT $1) recent
+                JOIN cameras cam ON cam.id = recent.camera_id
+                GROUP BY cam.client_id
+                ORDER BY events DESC
+                LIMIT $2
+            """, PRELOAD_RECENT_EVENTS, limit)
+    return [int(row["client_id"]) for row in rows]
+
+async def preload_hot_tenants(limit: int = PRELOAD_TENANTS) -> List[int]:
+    """
+    Load the FAISS indices and identity names of the busiest organizations.
+
+    Organizations (see `hot_tenant_ids`) are loaded least busy first, so the
+    busiest ones are the most recently used entries should the index cache
+    budget be exceeded.
+
+    Parameters
+    ----------
+    limit : int, optional
+        Number of organizations to load; 0 loads none. Default: PRELOAD_TENANTS.
+
+    Returns
+    -------
+    list of int
+        IDs of the loaded organizations, busiest first.
+
+    Raises
+    ------
+    ValueError
+        If the database pool is not available.
+    """
+    from app.executor import run_blocking
+    from app.index_cache import get_index_cache
+    from app.identity_directory import get_identity_directory
+
+    organization_ids = await hot_tenant_ids(limit)
+    for organization_id in reversed(organization_ids):
+        await run_blocking(get_index_cache().get, organization_id)
+        await get_identity_directory().get_names(organization_id, [])
+    return organization_ids
+
+class Warmup:
+    """
+    Concurrent startup of the service and the readiness derived from it.
+
+    The database pool and both models (each loaded and run once on a dummy
+    input) come up concurrently in the background, followed by the busiest
+    tenants' indices once the pool is open, so the server answers liveness
+    probes at once and reports ready when the database and every model are
+    usable. Index preloading only speeds up first requests and is not required.
+    """
+
+    def __init__(self):
+        """Initialize with every component pending."""
+        self.components: Dict[str, str] = {"database": "pending", "models": "pending", "indices": "pending"}
+        self.errors: Dict[str, str] = {}
+        self.durations_s: Dict[str, float] = {}
+        self.preloaded: List[int] = []
+        # Only one process of a multi-worker server ingests the camera streams
+        self.camera_ingest = CAMERA_INGEST_ENABLED
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the warm-up in the background of the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel a warm-up that is still running."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _run(self) -> None:
+        from app.model_manager import initialize_models
+
+        start = time.perf_counter()
+        await asyncio.gather(self._step("models", initialize_models), self._database_and_indices())
+        self.durations_s["total"] = round(time.perf_counter() - start, 3)
+        print(f"[Startup] Warm-up finished in {self.durations_s['total']}s: {self.components}")
+
+        if self.ready and self.camera_ingest:
+            from app.camera import get_camera_ingestor
+            await get_camera_ingestor().start()
+
+    async def _database_and_indices(self) -> None:
+        if await self._step("database", get_pool):
+            await self._step("indices", self._preload)
+
+    async def _preload(self) -> None:
+        self.preloaded = await preload_hot_tenants()
+
+    async def _step(self, name: str, func) -> bool:
+        start = time.perf_counter()
+        try:
+            await func()
+            self.components[name] = "ready"
+            return True
+        except Exception as e:
+            self.components[name] = "failed"
+            self.errors[name] = str(e)
+            print(f"[Startup] Failed to warm up {name}: {e}")
+            return False
+        finally:
+            self.durations_s[name] = round(time.perf_counter() - start, 3)
+
+    @property
+    def ready(self) -> bool:
+        """Whether every required component is up."""
+        return all(self.components[name] == "ready" for name in REQUIRED_COMPONENTS)
+
+    @property
+    def failed(self) -> bool:
+        """Whether a required component failed and the process will never become ready."""
+        return any(self.components[name] == "failed" for name in REQUIRED_COMPONENTS)
+
+    def stats(self) -> dict:
+        """Component states, errors, step durations and preloaded organizations."""
+        return {
+            "ready": self.ready,
+            "components": dict(self.components),
+            "errors": dict(self.errors),
+            "durations_s": dict(self.durations_s),
+            "preloaded_organizations": list(self.preloaded),
+        }
+
+# Global warm-up instance
+warmup = Warmup()
+
+def get_warmup() -> Warmup:
+    """
+    Get the global warm-up instance.
+
+    Returns
+    -------
+    Warmup
+        The global warm-up started with the server.
+    """
+    return warmup
@@ -1,4 +1,4 @@
 # Expose API
-from .detector import detect_faces
+from .detector import detect_faces, detect_faces_batch
 
-__all__ = ["detect_faces"]
+__all__ = ["detect_faces", "detect_faces_batch"]
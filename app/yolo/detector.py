@@ -1,8 +1,10 @@
 import time
+from typing import Optional
 import numpy as np
-from app.model_manager import get_model_manager
+from app.model_manager import ensure_models, detection_batcher, DetectorSettings
 
-async def detect_faces(image: np.ndarray, conf_threshold: float = 0.7) -> tuple[np.ndarray, float]:
+async def detect_faces(image: np.ndarray, conf_threshold: float = 0.7,
+                       settings: Optional[DetectorSettings] = None) -> tuple[np.ndarray, float]:
     """
     Detect faces in an image using YOLO model and filter by confidence threshold.
 
@@ -14,6 +16,10 @@ async def detect_faces(image: np.ndarray, conf_threshold: float = 0.7) -> tuple[
     conf_threshold : float, optional
         Minimum confidence threshold for face detection. Default: 0.7.
 
+    settings : DetectorSettings, optional
+        Detector input size and mode of the camera the image comes from.
+        Default: DETECT_IMGSZ, single pass.
+
     Returns
     -------
     boxes : np.ndarray
@@ -28,8 +34,43 @@ async def detect_faces(image: np.ndarray, conf_threshold: float = 0.7) -> tuple[
         If face detection or post-processing fails.
     """
     try:
-        model_manager = await get_model_manager()
-        return model_manager.detect_faces(image, conf_threshold)
+        await ensure_models()
+        return (await detection_batcher.submit([(image, conf_threshold, settings or DetectorSettings())]))[0]
+
+    except Exception as e:
+        raise RuntimeError(f"Failed to extract bounding boxes: {e}")
+
+async def detect_faces_batch(images: list[np.ndarray], conf_threshold: float = 0.7,
+                             settings: Optional[DetectorSettings] = None) -> list[tuple[np.ndarray, float]]:
+    """
+    Detect faces in several images with one submission to the detection batcher.
+
+    Parameters
+    ----------
+    images : list of np.ndarray
+        Input images in BGR format. Each shape: (H, W, 3), dtype: uint8.
+
+    conf_threshold : float, optional
+        Minimum confidence threshold for face detection. Default: 0.7.
+
+    settings : DetectorSettings, optional
+        Detector input size and mode used for every image. Default: DETECT_IMGSZ, single pass.
+
+    Returns
+    -------
+    list of (np.ndarray, float)
+        Bounding boxes (Shape: (N, 4), format: [x1, y1, x2, y2]) and average
+        inference time per face in milliseconds, for every image in order.
+
+    Raises
+    ------
+    RuntimeError
+        If face detection or post-processing fails.
+    """
+    try:
+        await ensure_models()
+        settings = settings or DetectorSettings()
+        return await detection_batcher.submit([(image, conf_threshold, settings) for image in images])
 
     except Exception as e:
         raise RuntimeError(f"Failed to extract bounding boxes: {e}")
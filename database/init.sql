@@ -22,6 +22,9 @@ CREATE TABLE cameras (
     gate TEXT NOT NULL,
     roll TEXT NOT NULL CHECK (roll IN ('entry', 'exit')),
     camera_location TEXT,
+    stream_url TEXT,
+    detector_imgsz INTEGER CHECK (detector_imgsz IS NULL OR detector_imgsz % 32 = 0),
+    detector_two_pass BOOLEAN NOT NULL DEFAULT FALSE,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE (client_id, gate, roll)
 );
@@ -31,7 +34,7 @@ CREATE TABLE access_logs  (
     id SERIAL PRIMARY KEY,
     identity_id INTEGER REFERENCES identities(id) ON DELETE CASCADE,
     camera_id INTEGER REFERENCES cameras(id) ON DELETE SET NULL,
-    access_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    access_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     detection_confidence REAL NOT NULL,
     processing_time_ms REAL NOT NULL
 );
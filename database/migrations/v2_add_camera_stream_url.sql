@@ -0,0 +1,2 @@
+-- Video source (RTSP URL or local file) ingested server-side for a camera
+ALTER TABLE cameras ADD COLUMN stream_url TEXT;
@@ -0,0 +1,3 @@
+-- Per-camera detector input size (NULL uses DETECT_IMGSZ) and two-pass refinement
+ALTER TABLE cameras ADD COLUMN detector_imgsz INTEGER CHECK (detector_imgsz IS NULL OR detector_imgsz % 32 = 0);
+ALTER TABLE cameras ADD COLUMN detector_two_pass BOOLEAN NOT NULL DEFAULT FALSE;
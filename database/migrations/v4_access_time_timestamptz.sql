@@ -0,0 +1,2 @@
+-- Access times are written by the API as UTC instants; existing values were stored in the server time zone
+ALTER TABLE access_logs ALTER COLUMN access_time TYPE TIMESTAMPTZ USING access_time AT TIME ZONE current_setting('TimeZone');
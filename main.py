@@ -1 +1,332 @@
 # Entry point of the app
+import os
+import gc
+import sys
+import glob
+import time
+import shutil
+import signal
+import socket
+import asyncio
+import argparse
+import tempfile
+from importlib import import_module
+from typing import Dict, Optional
+
+# Fields of /proc/<pid>/smaps_rollup reported per process, in kB
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+# Libraries imported by the models of each inference backend
+BACKEND_MODULES = {"torch": ("torch", "ultralytics"), "onnx": ("onnxruntime",)}
+
+# Request-path modules the endpoints only import on first use
+APP_MODULES = ("app.get_id", "app.result_cache", "app.metadata_cache", "app.tracker", "app.journal", "app.camera")
+
+# Workers exiting sooner than this after their start are restarted after a pause
+MIN_WORKER_UPTIME_S = 5.0
+
+def read_memory(pid: int) -> Optional[Dict[str, float]]:
+    """
+    Measure the memory of a process from /proc.
+
+    Returns
+    -------
+    dict or None
+        ``rss``, ``pss``, ``shared`` and ``private`` in MB, or None if the
+        process is gone or /proc is not available. PSS splits every shared
+        page evenly between the processes mapping it, so the PSS of all
+        processes adds up to their real footprint.
+    """
+    values = dict.fromkeys(MEMORY_FIELDS, 0)
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in values:
+                    values[name] = int(rest.split()[0])
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        return None
+
+    return {
+        "rss": values["Rss"] / 1024,
+        "pss": values["Pss"] / 1024,
+        "shared": (values["Shared_Clean"] + values["Shared_Dirty"]) / 1024,
+        "private": (values["Private_Clean"] + values["Private_Dirty"]) / 1024,
+    }
+
+def memory_report(parent_pid: int, workers: Dict[int, int]) -> str:
+    """
+    Format the memory of the launcher and its workers.
+
+    Parameters
+    ----------
+    parent_pid : int
+        Launcher process holding the preloaded models.
+
+    workers : dict
+        Worker slot per worker PID.
+
+    Returns
+    -------
+    str
+        One line per process plus the total footprint and the cost of one more worker.
+    """
+    lines = [f"{'process':<22}{'RSS MB':>10}{'PSS MB':>10}{'shared MB':>11}{'private MB':>12}"]
+    processes = [("launcher", parent_pid)] + [(f"worker {slot}", pid) for pid, slot in sorted(workers.items(), key=lambda w: w[1])]
+    total_pss = 0.0
+    private = []
+    for name, pid in processes:
+        memory = read_memory(pid)
+        if memory is None:
+            lines.append(f"{name + f' ({pid})':<22}{'n/a':>10}")
+            continue
+        total_pss += memory["pss"]
+        if pid != parent_pid:
+            private.append(memory["private"])
+        lines.append(f"{name + f' ({pid})':<22}{memory['rss']:>10.1f}{memory['pss']:>10.1f}"
+                     f"{memory['shared']:>11.1f}{memory['private']:>12.1f}")
+
+    lines.append(f"Total footprint (PSS): {total_pss:.1f} MB for {len(workers)} worker(s)")
+    if private:
+        lines.append(f"Each additional worker: ~{sum(private) / len(private):.1f} MB private memory")
+    return "\n".join(lines)
+
+def preload_tenant_indices(limit: int) -> list:
+    """Load the FAISS indices of the busiest organizations into the launcher's index cache."""
+    from app.warmup import hot_tenant_ids
+    from app.index_cache import get_index_cache
+    from database import connection
+
+    async def ranked() -> list:
+        try:
+            return await hot_tenant_ids(limit)
+        finally:
+            # Connections must not be inherited by the workers
+            if connection.pool is not None:
+                await connection.pool.close()
+                connection.pool = None
+
+    organization_ids = asyncio.run(ranked())
+    for organization_id in reversed(organization_ids):
+        get_index_cache().get(organization_id)
+    return organization_ids
+
+class Launcher:
+    """
+    Preload-and-fork server: one launcher process, several uvicorn workers.
+
+    The launcher imports the application and loads and warms up the models
+    (and, optionally, the busiest tenants' FAISS indices) once, freezes the
+    garbage collector's heap and forks the workers, which share the loaded
+    weights copy-on-write instead of each holding its own copy. All workers
+    accept connections from one listening socket. The launcher restarts
+    workers that die by forking again from the preloaded state.
+    """
+
+    def __init__(self, args: argparse.Namespace):
+        """Bind the listening socket; nothing is loaded yet."""
+        self.args = args
+        self.workers: Dict[int, int] = {}
+        self.started: Dict[int, float] = {}
+        self.pid = os.getpid()
+        self.stopping = False
+        self.report_requested = False
+        self.socket = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((args.host, args.port))
+        self.socket.listen(2048)
+        self.socket.set_inheritable(True)
+
+    def preload(self) -> None:
+        """Import the application and load what the workers will share."""
+        start = time.perf_counter()
+        # Objects created while preloading are never collected in the launcher; they are frozen below
+        gc.disable()
+
+        import cv2
+        from api.main import app as api
+        from app.config import INFERENCE_BACKEND, EMBEDDING_MODEL
+        self.api = api
+
+        mode = self.args.preload
+        if mode == "models" and (INFERENCE_BACKEND == "onnx" or EMBEDDING_MODEL != "SFace"):
+            # ONNX Runtime sessions and TensorFlow keep thread pools that do not survive fork
+            print("[Launcher] The configured models are not fork-safe, workers load their own models")
+            mode = "imports"
+
+        for name in APP_MODULES + BACKEND_MODULES.get(INFERENCE_BACKEND, ()):
+            import_module(name)
+
+        if mode == "models":
+            # Warm up single-threaded so no OpenMP / OpenCV worker threads exist at fork time
+            cv2.setNumThreads(1)
+            if INFERENCE_BACKEND == "torch":
+                import torch
+                torch.set_num_threads(1)
+            from app.model_manager import model_manager
+            model_manager.load()
+
+            if self.args.preload_tenants:
+                try:
+                    loaded = preload_tenant_indices(self.args.preload_tenants)
+                    print(f"[Launcher] Preloaded the indices of organizations {loaded}")
+                except Exception as e:
+                    print(f"[Launcher] Failed to preload tenant indices: {e}")
+
+        gc.collect()
+        gc.freeze()
+        print(f"[Launcher] Preloaded {mode} in {time.perf_counter() - start:.1f}s")
+
+    def spawn(self, slot: int) -> None:
+        """Fork the worker for a slot."""
+        # Unflushed output would otherwise be written by both processes
+        sys.stdout.flush()
+        sys.stderr.flush()
+        pid = os.fork()
+        if pid:
+            self.workers[pid] = slot
+            self.started[pid] = time.monotonic()
+            return
+
+        # --- worker process ---
+        code = 1
+        try:
+            self._serve(slot)
+            code = 0
+        except BaseException as e:
+            print(f"[Launcher] Worker {slot} failed: {e}")
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def _serve(self, slot: int) -> None:
+        import cv2
+        import uvicorn
+        from app.warmup import get_warmup
+
+        # Out of the terminal's process group: the launcher forwards shutdown signals once
+        os.setpgid(0, 0)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+        gc.enable()
+
+        cv2.setNumThreads(self.args.threads_per_worker)
+        if "torch" in sys.modules:
+            sys.modules["torch"].set_num_threads(self.args.threads_per_worker)
+        get_warmup().camera_ingest = get_warmup().camera_ingest and slot == 0
+
+        config = uvicorn.Config(self.api, log_level=self.args.log_level, timeout_graceful_shutdown=self.args.graceful_timeout)
+        uvicorn.Server(config).run(sockets=[self.socket])
+
+    def run(self) -> int:
+        """
+        Preload, fork the workers and supervise them until shut down.
+
+        Returns
+        -------
+        int
+            Process exit code.
+        """
+        self.preload()
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGUSR1, self._request_report)
+
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+        print(f"[Launcher] Serving on {self.args.host}:{self.args.port} with {self.args.workers} worker(s) "
+              f"of {self.args.threads_per_worker} thread(s) each")
+
+        report_at = time.monotonic() + self.args.report_after if self.args.report_after > 0 else None
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+
+            if pid:
+                slot = self.workers.pop(pid)
+                uptime = time.monotonic() - self.started.pop(pid)
+                if not self.stopping:
+                    print(f"[Launcher] Worker {slot} (pid {pid}) exited with status {status}, restarting")
+                    if uptime < MIN_WORKER_UPTIME_S:
+                        time.sleep(1.0)
+                    self.spawn(slot)
+                continue
+
+            if self.report_requested or (report_at is not None and time.monotonic() >= report_at):
+                print(memory_report(os.getpid(), self.workers), flush=True)
+                self.report_requested = False
+                report_at = None
+            time.sleep(0.2)
+
+        self.socket.close()
+        print("[Launcher] Stopped")
+        return 0
+
+    def _stop(self, signum, frame) -> None:
+        if self.stopping or os.getpid() != self.pid:
+            return
+        self.stopping = True
+        print("[Launcher] Shutting down workers...")
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def _request_report(self, signum, frame) -> None:
+        self.report_requested = True
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Serve the Face ID API from workers forked after loading the models once.")
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address")
+    parser.add_argument("--port", type=int, default=8000, help="Bind port")
+    parser.add_argument("--workers", type=int, default=cpus, help="Worker processes (default: one per core)")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="Inference threads of each worker (default: cores / workers, at least 1)")
+    parser.add_argument("--preload", choices=("models", "imports"), default="models",
+                        help="Share loaded models with the workers, or only the imported libraries")
+    parser.add_argument("--preload-tenants", type=int, default=None,
+                        help="Busiest organizations whose indices are shared with the workers (default: PRELOAD_TENANTS)")
+    parser.add_argument("--report-after", type=float, default=60,
+                        help="Seconds after start to print the memory report, 0 disables; send SIGUSR1 for one at any time")
+    parser.add_argument("--graceful-timeout", type=int, default=30, help="Seconds a worker waits for requests on shutdown")
+    parser.add_argument("--log-level", default="info", help="uvicorn log level")
+    args = parser.parse_args()
+
+    args.workers = max(1, args.workers)
+    if args.threads_per_worker is None:
+        args.threads_per_worker = max(1, cpus // args.workers)
+
+    # Must be set before the application is imported
+    os.environ.setdefault("INFERENCE_WORKERS", str(args.threads_per_worker))
+    os.environ.setdefault("ONNX_INTRA_OP_THREADS", str(args.threads_per_worker))
+    # Workers write their metrics to files that /metrics merges
+    metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if metrics_dir:
+        # Metric files of a previous run would be merged into this one's; the directory may hold anything else
+        os.makedirs(metrics_dir, exist_ok=True)
+        for path in glob.glob(os.path.join(metrics_dir, "*.db")):
+            os.remove(path)
+        own_metrics_dir = False
+    else:
+        metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="face_id_metrics_")
+        own_metrics_dir = True
+
+    if args.preload_tenants is None:
+        from app.config import PRELOAD_TENANTS
+        args.preload_tenants = PRELOAD_TENANTS
+
+    try:
+        sys.exit(Launcher(args).run())
+    finally:
+        if own_metrics_dir:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
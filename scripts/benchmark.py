@@ -0,0 +1,359 @@
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import datetime
+import numpy as np
+import cv2
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Synthetic tenants are registered under a scratch CLIENT_FOLDER, never the real one
+os.environ["CLIENT_FOLDER"] = tempfile.mkdtemp(prefix="face_id_bench_")
+
+from fastapi import UploadFile
+
+from app.config import EMBEDDING_DIM, INFERENCE_BACKEND
+from app import read_image, decode_image_reduced, crop_face, resize_face, detect_faces, embbeding_faces_batch, faiss_search_batch
+from app.model_manager import get_model_manager, DetectorSettings
+from app.index_cache import get_index_cache
+from app.index_builder import build_index, load_index_config
+from app.faiss_search import weighted_vote
+from app.access_log import AccessLogWriter
+import database.connection
+
+STAGES = ("decode", "detect", "crop", "embed", "search", "vote", "access_log")
+FACES_PER_IDENTITY = 10
+
+class InMemoryConnection:
+    """Stand-in for an asyncpg connection answering the queries the pipeline issues."""
+
+    def __init__(self, pool: "InMemoryPool"):
+        self.pool = pool
+
+    async def fetch(self, query: str, *args):
+        if "FROM identities" in query:
+            return [{"id": identity_id, "full_name": f"identity {identity_id}"}
+                    for identity_id in range(self.pool.identities.get(args[0], 0))]
+        return []
+
+    async def fetchrow(self, query: str, *args):
+        return None
+
+    async def execute(self, query: str, *args):
+        return "OK"
+
+    async def copy_records_to_table(self, table: str, records, columns=None):
+        if self.pool.copy_latency_ms:
+            await asyncio.sleep(self.pool.copy_latency_ms / 1000)
+        self.pool.copied[table] = self.pool.copied.get(table, 0) + len(records)
+
+class _Acquire:
+    def __init__(self, pool: "InMemoryPool"):
+        self.pool = pool
+
+    async def __aenter__(self) -> InMemoryConnection:
+        return InMemoryConnection(self.pool)
+
+    async def __aexit__(self, *exc) -> None:
+        return None
+
+class InMemoryPool:
+    """
+    Stand-in for the asyncpg pool, so the benchmark runs without PostgreSQL.
+
+    Synthetic organizations report ``identities[organization_id]`` identities
+    and COPY writes are counted, optionally after a simulated round trip.
+    """
+
+    def __init__(self, copy_latency_ms: float = 0.0):
+        self.copy_latency_ms = copy_latency_ms
+        self.identities: dict = {}
+        self.copied: dict = {}
+
+    def acquire(self) -> _Acquire:
+        return _Acquire(self)
+
+    async def close(self) -> None:
+        return None
+
+def summarize(samples_ms: list[float]) -> dict:
+    """Latency statistics of a list of samples in milliseconds."""
+    samples = np.asarray(samples_ms)
+    return {
+        "repeat": len(samples),
+        "mean_ms": round(float(samples.mean()), 4),
+        "p50_ms": round(float(np.percentile(samples, 50)), 4),
+        "p95_ms": round(float(np.percentile(samples, 95)), 4),
+        "min_ms": round(float(samples.min()), 4),
+        "max_ms": round(float(samples.max()), 4),
+    }
+
+async def measure(fn, repeat: int, warmup: int) -> dict:
+    """Time ``await fn()`` ``repeat`` times after ``warmup`` untimed calls."""
+    for _ in range(warmup):
+        await fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+def synthetic_frame(width: int, height: int, rng: np.random.Generator) -> np.ndarray:
+    """Smooth gradient plus noise, so JPEG sizes resemble camera frames rather than pure noise."""
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)[:, None]
+    base = np.stack([x + 0 * y, y + 0 * x, (x + y) / 2], axis=2)
+    noise = rng.normal(0, 12, (height, width, 3))
+    return np.clip(base + noise, 0, 255).astype(np.uint8)
+
+def synthetic_boxes(width: int, height: int, faces: int, rng: np.random.Generator) -> np.ndarray:
+    """Face boxes of about an eighth of the frame height at random positions."""
+    side = max(height // 8, 24)
+    x1 = rng.integers(0, max(width - side, 1), faces)
+    y1 = rng.integers(0, max(height - side, 1), faces)
+    return np.stack([x1, y1, x1 + side, y1 + side], axis=1).astype(np.float32)
+
+def synthetic_tenant(size: int, rng: np.random.Generator) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Clustered embeddings of ``size / FACES_PER_IDENTITY`` identities.
+
+    Returns
+    -------
+    vectors : np.ndarray
+        L2-normalized embeddings. Shape: (size, EMBEDDING_DIM), dtype: float32.
+
+    labels : np.ndarray
+        Identity ID of each vector. Shape: (size,), dtype: int32.
+
+    centers : np.ndarray
+        L2-normalized identity centers, used to draw queries.
+    """
+    identities = max(size // FACES_PER_IDENTITY, 1)
+    centers = rng.standard_normal((identities, EMBEDDING_DIM), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    labels = (np.arange(size) % identities).astype(np.int32)
+    vectors = centers[labels] + 0.05 * rng.standard_normal((size, EMBEDDING_DIM), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors, labels, centers
+
+def queries_near(centers: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    queries = centers[rng.integers(0, len(centers), count)] + 0.05 * rng.standard_normal((count, EMBEDDING_DIM), dtype=np.float32)
+    return np.ascontiguousarray(queries / np.linalg.norm(queries, axis=1, keepdims=True), dtype=np.float32)
+
+def parse_sizes(value: str) -> list[tuple[int, int]]:
+    return [tuple(int(v) for v in size.lower().split("x")) for size in value.split(",")]
+
+def parse_ints(value: str) -> list[int]:
+    return [int(v) for v in value.split(",")]
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+async def bench_decode(args, rng, record) -> None:
+    for width, height in args.frame_sizes:
+        _, encoded = cv2.imencode(".jpg", synthetic_frame(width, height, rng), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        data = encoded.tobytes()
+        frame = f"{width}x{height}"
+
+        async def full():
+            await read_image(UploadFile(io.BytesIO(data), size=len(data)))
+        stats = await measure(full, args.repeat, args.warmup)
+        record("decode", {"frame": frame, "mode": "read_image"}, {**stats, "jpeg_bytes": len(data)})
+
+        for imgsz in args.imgsz:
+            async def reduced():
+                await decode_image_reduced(data, imgsz)
+            stats = await measure(reduced, args.repeat, args.warmup)
+            record("decode", {"frame": frame, "mode": "reduced", "imgsz": imgsz}, {**stats, "jpeg_bytes": len(data)})
+
+async def bench_detect(args, rng, record) -> None:
+    for width, height in args.frame_sizes:
+        frame = synthetic_frame(width, height, rng)
+        for imgsz in args.imgsz:
+            for two_pass in (False, True) if args.two_pass else (False,):
+                settings = DetectorSettings(imgsz=imgsz, two_pass=two_pass)
+
+                async def detect():
+                    await detect_faces(frame, settings=settings)
+                record("detect", {"frame": f"{width}x{height}", "imgsz": imgsz, "two_pass": two_pass},
+                       await measure(detect, args.repeat, args.warmup))
+
+async def bench_crop(args, rng, record) -> None:
+    for width, height in args.frame_sizes:
+        frame = synthetic_frame(width, height, rng)
+        for faces in args.faces:
+            boxes = synthetic_boxes(width, height, faces, rng)
+
+            async def crop():
+                for box in boxes:
+                    resize_face(crop_face(frame, box)[0], (112, 112))
+            record("crop", {"frame": f"{width}x{height}", "faces": faces}, await measure(crop, args.repeat, args.warmup))
+
+async def bench_embed(args, rng, record) -> None:
+    for faces in args.faces:
+        crops = [rng.integers(0, 255, (112, 112, 3), dtype=np.uint8) for _ in range(faces)]
+
+        async def embed():
+            await embbeding_faces_batch(crops)
+        record("embed", {"faces": faces}, await measure(embed, args.repeat, args.warmup))
+
+async def bench_search(args, rng, record, pool: InMemoryPool) -> None:
+    for organization_id, size in enumerate(args.index_sizes, start=1):
+        vectors, labels, centers = synthetic_tenant(size, rng)
+        pool.identities[organization_id] = len(centers)
+        config = load_index_config(organization_id)
+
+        for kind in args.index_types:
+            build_start = time.perf_counter()
+            index = build_index(kind, vectors, config)
+            build_ms = (time.perf_counter() - build_start) * 1000
+            get_index_cache().update(organization_id, index, labels)
+
+            for faces in args.faces:
+                queries = queries_near(centers, faces, rng)
+
+                async def search():
+                    await faiss_search_batch(queries, organization_id)
+                stats = await measure(search, args.repeat, args.warmup)
+                record("search", {"index_size": size, "index_type": kind, "faces": faces}, {**stats, "build_ms": round(build_ms, 2)})
+
+                if "vote" in args.stages:
+                    distances, indices = index.search(queries, 10)
+
+                    async def vote():
+                        weighted_vote(distances, indices, labels)
+                    record("vote", {"index_size": size, "index_type": kind, "faces": faces},
+                           await measure(vote, args.repeat, args.warmup))
+            get_index_cache().invalidate(organization_id)
+
+async def bench_access_log(args, rng, record, pool: InMemoryPool) -> None:
+    for batch_size in args.log_batch_sizes:
+        writer = AccessLogWriter(max_queue=args.log_events, batch_size=batch_size, flush_interval_ms=50)
+        writer.start()
+        enqueue_ms = []
+        start = time.perf_counter()
+        for i in range(args.log_events):
+            enqueue_start = time.perf_counter()
+            writer.enqueue(i % 1000, 1, 0.9, 50.0)
+            enqueue_ms.append((time.perf_counter() - enqueue_start) * 1000)
+            if i % 256 == 0:
+                await asyncio.sleep(0)  # Let the writer run, as request handlers would
+        await writer.stop()
+        total_s = time.perf_counter() - start
+
+        stats = summarize(enqueue_ms)
+        stats.update({
+            "events_per_s": round(writer.written / total_s, 1),
+            "flushes": writer.flushes,
+            "dropped": writer.dropped,
+            "max_flush_ms": round(writer.max_flush_ms, 3),
+        })
+        record("access_log", {"events": args.log_events, "batch_size": batch_size, "copy_latency_ms": args.db_latency_ms}, stats)
+
+def compare(results: list[dict], baseline_path: str) -> None:
+    """Print the p50 change of every benchmark also present in a previous run."""
+    with open(baseline_path, "r") as f:
+        baseline = {(r["stage"], json.dumps(r["params"], sort_keys=True)): r for r in json.load(f)["results"]}
+
+    print(f"\n--- Compared with {baseline_path} (p50) ---")
+    for result in results:
+        previous = baseline.get((result["stage"], json.dumps(result["params"], sort_keys=True)))
+        if previous is None:
+            continue
+        before, after = previous["p50_ms"], result["p50_ms"]
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"{result['stage']:<11} {json.dumps(result['params'], sort_keys=True)}: {before:.3f} -> {after:.3f} ms ({change:+.1f}%)")
+
+async def run(args) -> list[dict]:
+    rng = np.random.default_rng(args.seed)
+    pool = InMemoryPool(copy_latency_ms=args.db_latency_ms)
+    database.connection.pool = pool  # get_pool() returns the stand-in
+
+    results = []
+    def record(stage: str, params: dict, stats: dict) -> None:
+        results.append({"stage": stage, "params": params, **stats})
+        extra = f", {stats['events_per_s']} events/s" if "events_per_s" in stats else ""
+        print(f"{stage:<11} {json.dumps(params, sort_keys=True)}: p50 {stats['p50_ms']:.3f} ms, p95 {stats['p95_ms']:.3f} ms{extra}")
+
+    if {"detect", "embed"} & set(args.stages):
+        try:
+            await get_model_manager()
+        except Exception as e:
+            print(f"[WARN] Models unavailable, skipping detect and embed: {e}")
+            args.stages = [stage for stage in args.stages if stage not in ("detect", "embed")]
+
+    if "decode" in args.stages:
+        await bench_decode(args, rng, record)
+    if "detect" in args.stages:
+        await bench_detect(args, rng, record)
+    if "crop" in args.stages:
+        await bench_crop(args, rng, record)
+    if "embed" in args.stages:
+        await bench_embed(args, rng, record)
+    if "search" in args.stages or "vote" in args.stages:
+        await bench_search(args, rng, record, pool)
+    if "access_log" in args.stages:
+        await bench_access_log(args, rng, record, pool)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark each recognition stage on synthetic frames and tenants.")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated stages out of {', '.join(STAGES)}")
+    parser.add_argument("--frame-sizes", type=parse_sizes, default=parse_sizes("640x480,1920x1080,3840x2160"), help="WIDTHxHEIGHT list")
+    parser.add_argument("--imgsz", type=parse_ints, default=[320, 640], help="Detector input sizes")
+    parser.add_argument("--two-pass", action="store_true", help="Also benchmark two-pass detection")
+    parser.add_argument("--faces", type=parse_ints, default=[1, 4, 16], help="Faces per frame")
+    parser.add_argument("--index-sizes", type=parse_ints, default=[1000, 10000, 100000, 1000000], help="Synthetic tenant sizes in vectors")
+    parser.add_argument("--index-types", default="flat", help="Comma-separated index types out of flat, ivf, hnsw")
+    parser.add_argument("--log-events", type=int, default=20000, help="Access-log events per run")
+    parser.add_argument("--log-batch-sizes", type=parse_ints, default=[100, 500], help="Access-log COPY batch sizes")
+    parser.add_argument("--db-latency-ms", type=float, default=1.0, help="Simulated COPY round trip of the in-memory pool")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per benchmark")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed runs per benchmark")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic data")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Results JSON of a previous run to compare against")
+    args = parser.parse_args()
+    args.stages = [stage for stage in args.stages.split(",") if stage]
+    args.index_types = args.index_types.split(",")
+
+    unknown = set(args.stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "inference_backend": INFERENCE_BACKEND,
+            "args": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Wrote {len(results)} result(s) to {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import os
+import sys
+import argparse
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.backends import create_backend
+from app.tracker import iou_matrix
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+def confident_boxes(detection: tuple, conf_threshold: float) -> np.ndarray:
+    """Boxes the service would keep at the given detection confidence threshold."""
+    boxes, confs, _ = detection
+    return boxes[confs >= conf_threshold]
+
+def normalize(embeddings: np.ndarray) -> np.ndarray:
+    return embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+
+def crop_faces(image: np.ndarray, boxes: np.ndarray, size: tuple[int, int]) -> list[np.ndarray]:
+    faces = []
+    for x1, y1, x2, y2 in boxes.astype(int):
+        face = image[max(y1, 0):y2, max(x1, 0):x2]
+        if face.size:
+            faces.append(cv2.resize(face, size))
+    return faces
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the onnx inference backend against the torch backend.")
+    parser.add_argument("--images", required=True, help="Directory of sample camera images")
+    parser.add_argument("--int8", action="store_true", help="Check the INT8-quantized exports")
+    parser.add_argument("--conf", type=float, default=0.7, help="Detection confidence threshold, as in detect_faces")
+    parser.add_argument("--min-box-recall", type=float, default=0.98, help="Minimum share of torch faces also found by onnx")
+    parser.add_argument("--min-cosine", type=float, default=0.99, help="Minimum cosine similarity between the two embeddings of a face")
+    args = parser.parse_args()
+
+    reference_detector, reference_embedder = create_backend("torch")
+    detector, embedder = create_backend("onnx", int8=args.int8)
+
+    reference_faces = matched_faces = extra_faces = 0
+    similarities = []
+    for name in sorted(os.listdir(args.images)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = cv2.imread(os.path.join(args.images, name))
+        if image is None:
+            print(f"[WARN] Could not read image: {name}")
+            continue
+
+        reference_boxes = confident_boxes(reference_detector.detect([image])[0], args.conf)
+        boxes = confident_boxes(detector.detect([image])[0], args.conf)
+        if len(reference_boxes) and len(boxes):
+            ious = iou_matrix(reference_boxes, boxes)
+            matched = int((ious.max(axis=1) >= 0.5).sum())
+        else:
+            matched = 0
+        reference_faces += len(reference_boxes)
+        matched_faces += matched
+        extra_faces += max(len(boxes) - matched, 0)
+
+        # Both embedders see the same crops, so only the model output differs
+        faces = crop_faces(image, reference_boxes, reference_embedder.input_size)
+        if faces:
+            batch = np.stack(faces)
+            cosine = (normalize(reference_embedder.forward(batch)) * normalize(embedder.forward(batch))).sum(axis=1)
+            similarities.extend(cosine.tolist())
+
+    box_recall = matched_faces / reference_faces if reference_faces else 1.0
+    print(f"Faces: {reference_faces} (torch), recall {box_recall:.4f}, {extra_faces} extra onnx detection(s)")
+    if similarities:
+        print(f"Embedding cosine: mean {np.mean(similarities):.4f}, min {np.min(similarities):.4f} over {len(similarities)} face(s)")
+
+    if box_recall < args.min_box_recall or (similarities and min(similarities) < args.min_cosine):
+        print("❌ The onnx backend does not match the torch backend closely enough.")
+        sys.exit(1)
+    print("✅ The onnx backend matches the torch backend.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import shutil
+import argparse
+import cv2
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import YOLO_MODEL_PATH, EMBEDDING_MODEL
+from app.backends import get_onnx_model_paths, get_sface_weights_path, letterbox, OnnxDetector
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+def export_detector(output_path: str, imgsz: int) -> None:
+    """Export the YOLO face detector to ONNX with a dynamic batch dimension."""
+    from ultralytics import YOLO
+
+    exported = YOLO(YOLO_MODEL_PATH).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    if os.path.abspath(exported) != os.path.abspath(output_path):
+        shutil.move(exported, output_path)
+    print(f"[Export] Detector -> {output_path}")
+
+def export_embedder(output_path: str) -> None:
+    """
+    Copy the SFace ONNX weights with a dynamic batch dimension.
+
+    The published graph has a fixed batch of one; if it does not run with a
+    larger batch once the dimension is relaxed, the fixed graph is kept and
+    the backend embeds one face per call.
+    """
+    import onnx
+    import onnxruntime as ort
+    from deepface import DeepFace
+
+    if not os.path.exists(get_sface_weights_path()):
+        DeepFace.build_model("SFace")  # Downloads the weights
+
+    model = onnx.load(get_sface_weights_path())
+    for value in list(model.graph.input) + list(model.graph.output):
+        value.type.tensor_type.shape.dim[0].dim_param = "batch"
+    onnx.save(model, output_path)
+
+    try:
+        session = ort.InferenceSession(output_path, providers=["CPUExecutionProvider"])
+        model_input = session.get_inputs()[0]
+        session.run(None, {model_input.name: np.zeros((2, 3, 112, 112), dtype=np.float32)})
+    except Exception:
+        shutil.copyfile(get_sface_weights_path(), output_path)
+        print("[Export] SFace graph does not support batching, kept a fixed batch of one")
+    print(f"[Export] Embedder -> {output_path}")
+
+class BlobReader:
+    """ONNX Runtime calibration data reader over preprocessed input blobs."""
+
+    def __init__(self, input_name: str, blobs: list[np.ndarray]):
+        self.input_name = input_name
+        self._blobs = iter(blobs)
+
+    def get_next(self):
+        blob = next(self._blobs, None)
+        return None if blob is None else {self.input_name: blob}
+
+def calibration_blobs(calibration_dir: str, detector_path: str, imgsz: int, limit: int) -> tuple[list, list]:
+    """Detector and embedder calibration inputs built from sample camera images."""
+    detector = OnnxDetector(detector_path)
+    detector_blobs, embedder_blobs = [], []
+    for name in sorted(os.listdir(calibration_dir))[:limit]:
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        image = cv2.imread(os.path.join(calibration_dir, name))
+        if image is None:
+            continue
+
+        canvas, _, _ = letterbox(image, detector.fixed_imgsz or imgsz)
+        detector_blobs.append(cv2.dnn.blobFromImage(canvas, 1 / 255.0, swapRB=True))
+
+        # Embedder calibration uses the faces the float detector finds
+        boxes, _, _ = detector.detect([image], imgsz)[0]
+        for x1, y1, x2, y2 in boxes.astype(int):
+            face = image[max(y1, 0):y2, max(x1, 0):x2]
+            if face.size:
+                embedder_blobs.append(cv2.dnn.blobFromImage(cv2.resize(face, (112, 112)), 1.0, (112, 112), (0, 0, 0), True, False))
+    return detector_blobs, embedder_blobs
+
+def quantize(model_path: str, output_path: str, blobs: list[np.ndarray] | None) -> None:
+    """
+    Quantize a model to INT8.
+
+    With calibration inputs, weights and activations are quantized statically
+    (QDQ, per channel); without them only the weights are quantized.
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import quantize_dynamic, quantize_static, QuantFormat, QuantType
+
+    if blobs:
+        input_name = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        quantize_static(model_path, output_path, BlobReader(input_name, blobs), quant_format=QuantFormat.QDQ,
+                        per_channel=True, weight_type=QuantType.QInt8, activation_type=QuantType.QUInt8)
+        mode = f"static, {len(blobs)} calibration inputs"
+    else:
+        quantize_dynamic(model_path, output_path, weight_type=QuantType.QInt8)
+        mode = "dynamic, weights only"
+    print(f"[Export] INT8 ({mode}) -> {output_path}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the detector and embedder for the onnx inference backend.")
+    parser.add_argument("--imgsz", type=int, default=640, help="Detector input size")
+    parser.add_argument("--int8", action="store_true", help="Also write INT8-quantized models")
+    parser.add_argument("--calibration-dir", help="Sample camera images for static INT8 calibration")
+    parser.add_argument("--calibration-limit", type=int, default=200, help="Maximum calibration images")
+    args = parser.parse_args()
+
+    if YOLO_MODEL_PATH is None or not os.path.exists(YOLO_MODEL_PATH):
+        print(f"❌ YOLO model file not found: {YOLO_MODEL_PATH}")
+        return
+    if EMBEDDING_MODEL != "SFace":
+        print(f"❌ Only the SFace embedder can be exported, EMBEDDING_MODEL is {EMBEDDING_MODEL}")
+        return
+
+    detector_path, embedder_path = get_onnx_model_paths(int8=False)
+    export_detector(detector_path, args.imgsz)
+    export_embedder(embedder_path)
+
+    if args.int8:
+        detector_blobs, embedder_blobs = None, None
+        if args.calibration_dir:
+            detector_blobs, embedder_blobs = calibration_blobs(args.calibration_dir, detector_path, args.imgsz, args.calibration_limit)
+        int8_detector_path, int8_embedder_path = get_onnx_model_paths(int8=True)
+        quantize(detector_path, int8_detector_path, detector_blobs)
+        quantize(embedder_path, int8_embedder_path, embedder_blobs)
+
+    print("✅ Export done. Run scripts/check_backend_parity.py before switching INFERENCE_BACKEND to onnx.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import CLIENT_FOLDER
+from app.utils import get_tenant_paths, get_legacy_label_path, load_labels
+
+def migrate_labels():
+    """Convert every organization's pickled label list in CLIENT_FOLDER to an int32 .npy file."""
+    if CLIENT_FOLDER is None or not os.path.isdir(CLIENT_FOLDER):
+        print(f"❌ CLIENT_FOLDER is not set or missing: {CLIENT_FOLDER}")
+        return
+
+    migrated = 0
+    for organization_id in sorted(os.listdir(CLIENT_FOLDER)):
+        if not organization_id.isdigit():
+            continue
+
+        _, label_path = get_tenant_paths(int(organization_id))
+        legacy_path = get_legacy_label_path(label_path)
+        if os.path.exists(label_path) or not os.path.exists(legacy_path):
+            continue
+
+        labels = load_labels(label_path)
+        migrated += 1
+        print(f"[{organization_id}] {len(labels)} labels -> {label_path}")
+
+    print(f"✅ Migrated {migrated} organization(s). The old .pkl files were left in place and can be removed.")
+
+
+if __name__ == "__main__":
+    migrate_labels()
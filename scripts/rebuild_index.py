@@ -1,53 +1,186 @@
 import os
 import sys
+import shutil
+import argparse
+import multiprocessing
+from multiprocessing.pool import Pool
 import cv2
-import faiss
-import pickle
 import numpy as np
 from tqdm import tqdm
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from app.config import EMBEDDING_DIM, FAISS_INDEX_PATH, LABELS_PATH, DATASET_DIR
-from app import embbeding_face
+from app.config import CLIENT_FOLDER, EMBEDDING_DIM, EMBED_MAX_BATCH, INFERENCE_WORKERS
+from app.utils import get_tenant_paths, save_labels, LABEL_DTYPE
+from app.index_builder import (
+    load_index_config, target_index_type, build_index, write_index_atomic, write_embedding_version,
+    IVF_MIN_TRAINING_POINTS
+)
+from app.journal import get_journal_path, tenant_file_lock
+from app.reembed import list_images
 
-def rebuild_faiss_index():
-    print("🧹 Rebuilding FAISS index from dataset...")
-    
-    # Initialize FAISS index and label list
-    index = faiss.IndexFlatIP(EMBEDDING_DIM)
-    labels = []
+def get_rebuild_paths(organization_id: int) -> tuple[str, str, str]:
+    """Rebuilt index path, rebuilt labels path and progress directory, next to the live index."""
+    faiss_path, label_path = get_tenant_paths(organization_id)
+    weights_dir = os.path.dirname(faiss_path)
+    return (
+        os.path.join(weights_dir, f"client_{organization_id}.rebuild.faiss"),
+        os.path.join(weights_dir, f"client_{organization_id}.rebuild.labels.npy"),
+        os.path.join(weights_dir, PROGRESS_DIR),
+    )
 
-    # Loop over dataset folders
-    identities = [d for d in os.listdir(DATASET_DIR) if os.path.isdir(os.path.join(DATASET_DIR, d))]
+def embed_batch(paths: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Embed a batch of stored reference faces in a worker process.
 
-    for identity in tqdm(identities, desc="Processing identities"):
-        person_folder = os.path.join(DATASET_DIR, identity)
-        image_files = [f for f in os.listdir(person_folder) if f.lower().endswith((".jpg", ".png", ".jpeg"))]
+    Returns
+    -------
+    embeddings : np.ndarray
+        Embeddings of the readable images. Shape: (M, D), dtype: float32.
 
-        for img_file in image_files:
-            img_path = os.path.join(person_folder, img_file)
-            image = cv2.imread(img_path)
+    readable : np.ndarray
+        Whether each path could be read. Shape: (N,), dtype: bool.
+    """
+    from app.model_manager import generate_embeddings_job
 
-            if image is None:
-                print(f"[WARN] Could not read image: {img_path}")
-                continue
+    faces = [cv2.imread(path) for path in paths]
+    readable = np.array([face is not None for face in faces], dtype=bool)
+    faces = [face for face in faces if face is not None]
+    if not faces:
+        return np.empty((0, EMBEDDING_DIM), dtype=np.float32), readable
+    embeddings = np.stack([embedding for embedding, _ in generate_embeddings_job(faces)])
+    return embeddings.astype(np.float32), readable
 
-            try:
-                embedding, _ = embbeding_face(image)
-                index.add(np.expand_dims(embedding, axis=0))
-                labels.append(identity)
-            except Exception as e:
-                print(f"[ERROR] Failed to process {img_path}: {e}")
+def load_batch(progress_dir: str, batch_id: int, paths: list[str]):
+    """Load a finished batch from a previous run, or None if it must be (re)computed."""
+    batch_path = os.path.join(progress_dir, f"batch_{batch_id:06d}.npz")
+    if not os.path.exists(batch_path):
+        return None
+    with np.load(batch_path) as saved:
+        if saved["paths"].tolist() != paths:
+            return None  # Images changed since that batch was written
+        return saved["embeddings"], saved["labels"]
 
-    # Save index and labels
-    os.makedirs(os.path.dirname(FAISS_INDEX_PATH), exist_ok=True)
-    faiss.write_index(index, FAISS_INDEX_PATH)
-    with open(LABELS_PATH, "wb") as f:
-        pickle.dump(labels, f)
+def save_batch(progress_dir: str, batch_id: int, paths: list[str], embeddings: np.ndarray, labels: np.ndarray) -> None:
+    """Atomically record a finished batch."""
+    batch_path = os.path.join(progress_dir, f"batch_{batch_id:06d}.npz")
+    tmp_path = f"{batch_path}.tmp.npz"
+    np.savez(tmp_path, paths=np.array(paths), embeddings=embeddings, labels=labels)
+    os.replace(tmp_path, batch_path)
 
-    print(f"✅ Rebuilt FAISS index with {len(labels)} entries from {len(identities)} identities.")
+def rebuild_organization(organization_id: int, pool: Pool, batch_size: int, fresh: bool) -> tuple[int, list[str]]:
+    """
+    Embed every reference image of an organization and write the rebuilt index next to the live one.
+
+    Finished batches are kept in ``weights/rebuild/`` so an interrupted run
+    resumes where it stopped; the directory is removed when the rebuilt index
+    is swapped in.
+
+    Returns
+    -------
+    count : int
+        Number of vectors in the rebuilt index.
+
+    paths : list of str
+        Images the rebuilt index was built from.
+    """
+    index_path, labels_path, progress_dir = get_rebuild_paths(organization_id)
+    if fresh:
+        shutil.rmtree(progress_dir, ignore_errors=True)
+    os.makedirs(progress_dir, exist_ok=True)
+
+    items = list_images(organization_id)
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    results = [None] * len(batches)
+    pending = []
+    for batch_id, batch in enumerate(batches):
+        results[batch_id] = load_batch(progress_dir, batch_id, [path for path, _ in batch])
+        if results[batch_id] is None:
+            pending.append(batch_id)
+
+    print(f"[{organization_id}] {len(items)} images in {len(batches)} batches, {len(batches) - len(pending)} already done")
+    jobs = pool.imap(embed_batch, [[path for path, _ in batches[batch_id]] for batch_id in pending])
+    for batch_id, (embeddings, readable) in tqdm(zip(pending, jobs), total=len(pending), desc=f"Organization {organization_id}"):
+        batch = batches[batch_id]
+        for (path, _), ok in zip(batch, readable):
+            if not ok:
+                print(f"[WARN] Could not read image: {path}")
+        labels = np.array([identity_id for (_, identity_id), ok in zip(batch, readable) if ok], dtype=LABEL_DTYPE)
+        save_batch(progress_dir, batch_id, [path for path, _ in batch], embeddings, labels)
+        results[batch_id] = (embeddings, labels)
+
+    vectors = np.concatenate([embeddings for embeddings, _ in results]) if results else np.empty((0, EMBEDDING_DIM), dtype=np.float32)
+    labels = np.concatenate([labels for _, labels in results]) if results else np.empty(0, dtype=LABEL_DTYPE)
+
+    kind = target_index_type(organization_id, len(vectors))
+    if kind == "ivf" and len(vectors) < IVF_MIN_TRAINING_POINTS:
+        kind = "flat"
+    index = build_index(kind, vectors, load_index_config(organization_id))
+
+    # Index first, then labels, like a journal checkpoint
+    write_index_atomic(index, index_path)
+    save_labels(labels, labels_path)
+    print(f"[{organization_id}] Wrote {kind} index with {len(labels)} vectors to {index_path}")
+    return len(labels), [path for path, _ in items]
+
+def swap_organization(organization_id: int, paths: list[str]) -> bool:
+    """
+    Replace the live index and labels with the rebuilt ones and clear the journal.
+
+    Refused if reference images were added or removed since the rebuild
+    started, since the rebuilt index would miss them; re-running resumes
+    from the finished batches. Enrollment writes an image and its journal
+    record under the same tenant lock, so an unchanged image list means the
+    journal holds nothing the rebuilt index lacks.
+    """
+    index_path, labels_path, progress_dir = get_rebuild_paths(organization_id)
+    faiss_path, label_path = get_tenant_paths(organization_id)
+
+    with tenant_file_lock(organization_id):
+        if [path for path, _ in list_images(organization_id)] != paths:
+            print(f"[{organization_id}] Images changed during the rebuild, live index left unchanged; run again")
+            return False
+
+        # The rebuilt index already holds every journaled enrollment
+        with open(get_journal_path(organization_id), "wb"):
+            pass
+        os.replace(index_path, faiss_path)
+        os.replace(labels_path, label_path)
+        write_embedding_version(organization_id)
+
+    shutil.rmtree(progress_dir, ignore_errors=True)
+    print(f"[{organization_id}] Live index replaced")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild tenant FAISS indices from their stored reference images.")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--org", type=int, action="append", dest="organization_ids", help="Organization ID to rebuild (repeatable)")
+    target.add_argument("--all", action="store_true", help="Rebuild every organization in CLIENT_FOLDER")
+    parser.add_argument("--workers", type=int, default=INFERENCE_WORKERS, help="Embedding worker processes")
+    parser.add_argument("--batch-size", type=int, default=EMBED_MAX_BATCH, help="Images embedded per model call")
+    parser.add_argument("--fresh", action="store_true", help="Discard progress of an interrupted rebuild")
+    parser.add_argument("--swap", action="store_true", help="Replace the live index once the rebuild is written")
+    args = parser.parse_args()
+
+    if CLIENT_FOLDER is None or not os.path.isdir(CLIENT_FOLDER):
+        print(f"❌ CLIENT_FOLDER is not set or missing: {CLIENT_FOLDER}")
+        return
+
+    organization_ids = args.organization_ids or sorted(int(name) for name in os.listdir(CLIENT_FOLDER) if name.isdigit())
+
+    from app.model_manager import init_worker_process
+
+    # Spawned workers each load their own copy of the models
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(max(1, args.workers), initializer=init_worker_process) as pool:
+        for organization_id in organization_ids:
+            _, paths = rebuild_organization(organization_id, pool, max(1, args.batch_size), args.fresh)
+            if args.swap:
+                swap_organization(organization_id, paths)
+
+    print(f"✅ Rebuilt {len(organization_ids)} organization(s).")
 
 
 if __name__ == "__main__":
-    rebuild_faiss_index()
+    main()
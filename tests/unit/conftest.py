@@ -0,0 +1,38 @@
+import os
+import sys
+import itertools
+import tempfile
+
+import pytest
+
+# Must be set before app.config is imported; synthetic tenants live in a throwaway folder
+os.environ["CLIENT_FOLDER"] = tempfile.mkdtemp(prefix="face_id_tests_")
+os.environ.setdefault("EMBEDDING_MODEL", "SFace")
+os.environ.setdefault("EMBEDDING_DIM", "128")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+_organization_ids = itertools.count(1000)
+
+def _new_organization() -> int:
+    organization_id = next(_organization_ids)
+    root = os.path.join(os.environ["CLIENT_FOLDER"], str(organization_id))
+    os.makedirs(os.path.join(root, "weights"))
+    os.makedirs(os.path.join(root, "images"))
+    return organization_id
+
+@pytest.fixture
+def organization_id() -> int:
+    """A fresh organization with empty ``weights`` and ``images`` folders."""
+    return _new_organization()
+
+@pytest.fixture
+def make_organization():
+    """Factory of fresh organizations, for tests that need several."""
+    return _new_organization
+
+@pytest.fixture(autouse=True)
+def _fresh_executors():
+    """Executors hold asyncio primitives, so each test's event loop gets its own."""
+    yield
+    from app.executor import shutdown_executors
+    shutdown_executors()
@@ -0,0 +1,67 @@
+import asyncio
+import datetime
+
+import asyncpg
+
+from app import access_log
+from app.access_log import AccessLogWriter, ACCESS_LOG_COLUMNS
+
+class RecordingPool:
+    """Pool whose COPY fails with ``copy_error`` and whose row inserts are recorded."""
+
+    def __init__(self, copy_error=None):
+        self.copy_error = copy_error
+        self.copied = []
+        self.inserted = []
+
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    async def copy_records_to_table(self, table, records, columns):
+        assert columns == ACCESS_LOG_COLUMNS
+        if self.copy_error is not None:
+            raise self.copy_error
+        self.copied += records
+
+    async def execute(self, query, *args):
+        assert query.count("$") == len(args) == len(ACCESS_LOG_COLUMNS)
+        self.inserted.append(args)
+
+def write_events(pool, monkeypatch):
+    async def get_pool():
+        return pool
+    monkeypatch.setattr(access_log, "get_pool", get_pool)
+
+    async def run():
+        writer = AccessLogWriter(flush_interval_ms=5)
+        writer.start()
+        before = datetime.datetime.now(datetime.timezone.utc)
+        writer.enqueue(1, 2, 0.9, 40.0)
+        await asyncio.sleep(0.05)  # Flush delay must not move the timestamp
+        writer.enqueue(3, 2, 0.8, 35.0)
+        await writer.stop()
+        return before, writer
+    return asyncio.run(run())
+
+def test_access_time_is_captured_at_enqueue(monkeypatch):
+    pool = RecordingPool()
+    before, writer = write_events(pool, monkeypatch)
+
+    assert writer.written == 2
+    first, second = pool.copied
+    assert first[-1].tzinfo is not None
+    assert before <= first[-1] < second[-1]
+    assert second[-1] - first[-1] >= datetime.timedelta(milliseconds=40)
+
+def test_row_fallback_writes_access_time(monkeypatch):
+    pool = RecordingPool(copy_error=asyncpg.DataError("rejected"))
+    _, writer = write_events(pool, monkeypatch)
+
+    assert writer.written == 2
+    assert all(row[-1].tzinfo is datetime.timezone.utc for row in pool.inserted)
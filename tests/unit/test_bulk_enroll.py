@@ -0,0 +1,46 @@
+import io
+import asyncio
+import zipfile
+
+import pytest
+
+from api.endpoints import enroll_refrence_images_bulk as bulk
+
+class Upload:
+    """The parts of a spooled UploadFile the helpers use."""
+
+    def __init__(self, data: bytes):
+        self.file = io.BytesIO(data)
+
+def make_archive(members: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+def test_archive_is_listed_then_read_per_chunk():
+    archive = Upload(make_archive({"Ann/a.jpg": b"a" * 10, "Bob/b.png": b"b" * 20, "notes.txt": b"x", "c.jpg": b"c"}))
+
+    entries = bulk._list_archive(archive.file, max_images=10)
+    assert [(name, info.filename) for name, info in entries] == [("Ann", "Ann/a.jpg"), ("Bob", "Bob/b.png")]
+
+    chunk = [(name, info.filename, info) for name, info in entries[1:]]
+    assert asyncio.run(bulk._load_chunk(chunk, archive)) == [b"b" * 20]
+
+def test_archive_decompressed_budget(monkeypatch):
+    # Highly compressible members: small archive, large decompressed total
+    archive = make_archive({f"Ann/{i}.jpg": bytes(1000) for i in range(5)})
+    monkeypatch.setattr(bulk, "BULK_ENROLL_MAX_BYTES", 4500)
+
+    assert len(archive) < 4500
+    with pytest.raises(ValueError, match="decompress"):
+        bulk._list_archive(io.BytesIO(archive), max_images=10)
+
+def test_oversized_members_are_not_extracted(monkeypatch):
+    archive = Upload(make_archive({"Ann/big.jpg": bytes(200), "Ann/small.jpg": b"ok"}))
+    monkeypatch.setattr(bulk, "MAX_UPLOAD_BYTES", 100)
+
+    entries = bulk._list_archive(archive.file, max_images=10)
+    chunk = [(name, info.filename, info) for name, info in entries]
+    assert asyncio.run(bulk._load_chunk(chunk, archive)) == [None, b"ok"]
@@ -0,0 +1,106 @@
+import os
+import asyncio
+
+import cv2
+import faiss
+import numpy as np
+import pytest
+
+from app.config import EMBEDDING_DIM, EMBEDDING_VERSION, LEGACY_EMBEDDING_VERSION
+from app.index_builder import read_embedding_version
+from app.index_cache import get_index_cache
+from app.model_manager import ModelManager
+from app.utils import get_tenant_paths, save_labels
+
+class ProjectionEmbedder:
+    """Deterministic stand-in for SFace: a fixed random projection of the pixels."""
+
+    input_size = (112, 112)
+
+    def __init__(self):
+        rng = np.random.default_rng(0)
+        self.weights = rng.standard_normal((112 * 112 * 3, EMBEDDING_DIM)).astype(np.float32)
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        return batch.reshape(len(batch), -1).astype(np.float32) @ self.weights
+
+def faces(count: int, seed: int = 1) -> list:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 255, (int(rng.integers(90, 160)), int(rng.integers(90, 160)), 3), dtype=np.uint8)
+            for _ in range(count)]
+
+def test_batch_embeddings_match_single_embeddings():
+    manager = ModelManager()
+    manager.embedder = ProjectionEmbedder()
+    manager._initialized = True
+
+    crops = faces(5)
+    batch, _ = manager.generate_embeddings_batch(crops)
+    for face, row in zip(crops, batch):
+        single, _ = manager.generate_embedding(face)
+        np.testing.assert_allclose(row, single, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(np.linalg.norm(batch, axis=1), 1.0, rtol=1e-5)
+
+def test_sface_batch_forward_matches_single_forward():
+    pytest.importorskip("deepface")
+    from app.backends import DeepFaceEmbedder, get_sface_weights_path
+    if not os.path.exists(get_sface_weights_path()):
+        pytest.skip("SFace weights are not downloaded")
+
+    embedder = DeepFaceEmbedder("SFace")
+    batch = np.stack([cv2.resize(face, embedder.input_size) for face in faces(4)])
+    together = embedder.forward(batch)
+    for i in range(len(batch)):
+        np.testing.assert_allclose(together[i], embedder.forward(batch[i:i + 1])[0], rtol=1e-4, atol=1e-5)
+
+def write_legacy_tenant(organization_id: int, count: int) -> np.ndarray:
+    """Index and labels as enrolled before embedding versions were recorded."""
+    vectors = np.random.default_rng(organization_id).standard_normal((count, EMBEDDING_DIM)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    index = faiss.IndexFlatIP(EMBEDDING_DIM)
+    index.add(vectors)
+    faiss_path, label_path = get_tenant_paths(organization_id)
+    faiss.write_index(index, faiss_path)
+    save_labels(np.arange(count) % 3 + 1, label_path)
+    return vectors
+
+def test_legacy_index_keeps_serving(organization_id):
+    vectors = write_legacy_tenant(organization_id, 6)
+
+    tenant = get_index_cache().get(organization_id)
+    assert tenant.embedding_version == LEGACY_EMBEDDING_VERSION
+    _, indices, _ = tenant.search(vectors[:1], 1)
+    assert indices[0, 0] == 0
+
+def test_reembed_swaps_in_current_version(organization_id, monkeypatch):
+    import app.embedder
+    from app.reembed import reembed_organization
+
+    write_legacy_tenant(organization_id, 3)
+    images_dir = os.path.join(os.environ["CLIENT_FOLDER"], str(organization_id), "images")
+    for i, face in enumerate(faces(4)):
+        identity_dir = os.path.join(images_dir, str(i % 2 + 1))
+        os.makedirs(identity_dir, exist_ok=True)
+        cv2.imwrite(os.path.join(identity_dir, f"{i}.jpg"), face)
+
+    async def embed(crops):
+        embeddings = np.random.default_rng(len(crops)).standard_normal((len(crops), EMBEDDING_DIM)).astype(np.float32)
+        faiss.normalize_L2(embeddings)
+        return embeddings, 0.0
+    monkeypatch.setattr(app.embedder, "embbeding_faces_batch", embed)
+
+    assert get_index_cache().get(organization_id).embedding_version == LEGACY_EMBEDDING_VERSION
+    assert asyncio.run(reembed_organization(organization_id))
+
+    tenant = get_index_cache().get(organization_id)
+    assert read_embedding_version(organization_id) == EMBEDDING_VERSION
+    assert tenant.embedding_version == EMBEDDING_VERSION
+    assert tenant.labels.tolist() == [1, 1, 2, 2]
+
+def test_reembed_refuses_to_drop_vectors(organization_id, monkeypatch):
+    from app.reembed import reembed_organization
+
+    write_legacy_tenant(organization_id, 5)  # No reference images on disk
+    assert not asyncio.run(reembed_organization(organization_id))
+    assert get_index_cache().get(organization_id).index.ntotal == 5
+    assert read_embedding_version(organization_id) is None
@@ -0,0 +1,56 @@
+import faiss
+import numpy as np
+
+from app.config import EMBEDDING_DIM
+from app.index_cache import IndexCache
+from app.journal import append_embeddings
+from app.utils import get_tenant_paths, save_labels
+
+# Resident size of one vector: float32 embedding plus int32 label
+VECTOR_BYTES = EMBEDDING_DIM * 4 + 4
+
+def write_tenant(organization_id: int, count: int) -> None:
+    vectors = np.random.default_rng(organization_id).standard_normal((count, EMBEDDING_DIM)).astype(np.float32)
+    index = faiss.IndexFlatIP(EMBEDDING_DIM)
+    index.add(vectors)
+    faiss_path, label_path = get_tenant_paths(organization_id)
+    faiss.write_index(index, faiss_path)
+    save_labels(np.ones(count, dtype=np.int32), label_path)
+
+def test_least_recently_used_tenant_is_evicted(make_organization):
+    a, b, c = make_organization(), make_organization(), make_organization()
+    for org in (a, b, c):
+        write_tenant(org, 10)
+    cache = IndexCache(max_bytes=int(2.5 * 10 * VECTOR_BYTES))
+
+    assert cache.get(a).nbytes == 10 * VECTOR_BYTES
+    cache.get(b)
+    cache.get(a)  # b becomes the least recently used
+    cache.get(c)
+
+    assert cache.organization_ids() == [a, c]
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["resident_bytes"] == 20 * VECTOR_BYTES
+    assert (stats["hits"], stats["misses"]) == (1, 3)
+
+def test_tenant_larger_than_budget_stays_resident(organization_id):
+    write_tenant(organization_id, 10)
+    cache = IndexCache(max_bytes=VECTOR_BYTES)
+
+    tenant = cache.get(organization_id)
+    assert cache.organization_ids() == [organization_id]
+    assert cache.get(organization_id) is tenant
+
+def test_files_changed_by_another_process_are_reloaded(organization_id):
+    write_tenant(organization_id, 4)
+    cache = IndexCache()
+    assert cache.get(organization_id).index.ntotal == 4
+
+    # Another process appends to the journal
+    append_embeddings(organization_id, np.ones((2, EMBEDDING_DIM), dtype=np.float32), [7, 7])
+
+    tenant = cache.get(organization_id)
+    assert tenant.index.ntotal == 6
+    assert tenant.labels.tolist()[-2:] == [7, 7]
+    assert cache.stats()["misses"] == 2
@@ -0,0 +1,79 @@
+import faiss
+import numpy as np
+import pytest
+
+from app.config import EMBEDDING_DIM
+from app.index_builder import write_index_atomic
+from app.index_cache import IndexCache, get_index_cache
+from app.journal import append_embeddings, checkpoint, get_journal_path, read_journal, record_dtype, replay_journal
+from app.utils import get_tenant_paths
+
+def unit_vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, EMBEDDING_DIM)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+def restart(organization_id: int):
+    """Load the tenant the way a freshly started process would."""
+    return IndexCache().get(organization_id)
+
+def assert_same_vectors(index, vectors):
+    np.testing.assert_array_equal(index.reconstruct_n(0, index.ntotal), vectors)
+
+def test_appended_records_survive_a_crash_before_checkpoint(organization_id):
+    vectors = unit_vectors(5)
+    append_embeddings(organization_id, vectors[:3], [1, 1, 2])
+    append_embeddings(organization_id, vectors[3:], [3, 3])
+
+    tenant = restart(organization_id)
+    assert tenant.labels.tolist() == [1, 1, 2, 3, 3]
+    assert_same_vectors(tenant.index, vectors)
+    assert read_journal(get_journal_path(organization_id))["seq"].tolist() == [0, 1, 2, 3, 4]
+
+def test_crash_between_index_and_labels_checkpoint(organization_id):
+    vectors = unit_vectors(5, seed=1)
+    append_embeddings(organization_id, vectors[:3], [1, 2, 3])
+    checkpoint(organization_id)
+    append_embeddings(organization_id, vectors[3:], [4, 5])
+
+    # Checkpoint interrupted after the index was written: labels and journal are stale
+    write_index_atomic(get_index_cache().get(organization_id).index, get_tenant_paths(organization_id)[0])
+
+    tenant = restart(organization_id)
+    assert tenant.labels.tolist() == [1, 2, 3, 4, 5]
+    assert_same_vectors(tenant.index, vectors)
+
+def test_torn_record_is_ignored_and_overwritten(organization_id):
+    vectors = unit_vectors(3, seed=2)
+    append_embeddings(organization_id, vectors[:2], [1, 2])
+    path = get_journal_path(organization_id)
+    with open(path, "ab") as f:
+        f.write(b"\x01" * (record_dtype().itemsize // 2))  # Crash mid-append
+
+    assert restart(organization_id).labels.tolist() == [1, 2]
+
+    append_embeddings(organization_id, vectors[2:], [3])
+    assert read_journal(path)["seq"].tolist() == [0, 1, 2]
+    tenant = restart(organization_id)
+    assert tenant.labels.tolist() == [1, 2, 3]
+    assert_same_vectors(tenant.index, vectors)
+
+def test_checkpoint_truncates_the_journal(organization_id):
+    vectors = unit_vectors(4, seed=3)
+    append_embeddings(organization_id, vectors, [1, 2, 3, 4])
+    checkpoint(organization_id)
+
+    assert len(read_journal(get_journal_path(organization_id))) == 0
+    tenant = restart(organization_id)
+    assert tenant.labels.tolist() == [1, 2, 3, 4]
+    assert_same_vectors(tenant.index, vectors)
+
+def test_journal_gap_is_refused(organization_id):
+    vectors = unit_vectors(4, seed=4)
+    append_embeddings(organization_id, vectors, [1, 2, 3, 4])
+
+    # The first record is lost: the journal no longer continues the empty checkpoint
+    path = get_journal_path(organization_id)
+    read_journal(path)[1:].tofile(path)
+    with pytest.raises(RuntimeError, match="starts at 1"):
+        replay_journal(faiss.IndexFlatIP(EMBEDDING_DIM), np.array([], dtype=np.int32), path)
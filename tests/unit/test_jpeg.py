@@ -0,0 +1,35 @@
+import cv2
+import numpy as np
+
+from app.utils import jpeg_size, reduced_decode_factor, _imdecode_reduced
+
+def encode(width: int, height: int, ext: str = ".jpg", params=()) -> bytes:
+    image = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    ok, encoded = cv2.imencode(ext, image, list(params))
+    assert ok
+    return encoded.tobytes()
+
+def test_jpeg_size_reads_baseline_and_progressive_headers():
+    assert jpeg_size(encode(640, 480)) == (640, 480)
+    assert jpeg_size(encode(333, 1001, params=(cv2.IMWRITE_JPEG_PROGRESSIVE, 1))) == (333, 1001)
+
+def test_jpeg_size_rejects_other_data():
+    jpeg = encode(64, 48)
+    assert jpeg_size(encode(64, 48, ".png")) is None
+    assert jpeg_size(jpeg[:20]) is None  # Truncated before the frame header
+    assert jpeg_size(b"") is None
+
+def test_reduced_decode_factor():
+    assert reduced_decode_factor((4000, 3000), 640) == 4
+    assert reduced_decode_factor((5120, 2880), 640) == 8
+    assert reduced_decode_factor((1280, 720), 640) == 2
+    assert reduced_decode_factor((1000, 700), 640) == 1
+    assert reduced_decode_factor((4000, 3000), 0) == 1
+
+def test_reduced_decode_scale_matches_decoded_size():
+    image, scale = _imdecode_reduced(encode(2560, 1920), 640)
+    assert image.shape == (480, 640, 3)
+    assert scale == 4.0
+
+    image, scale = _imdecode_reduced(encode(800, 600, ".png"), 640)
+    assert image.shape == (600, 800, 3) and scale == 1.0
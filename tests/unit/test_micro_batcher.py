@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from app.model_manager import MicroBatcher
+
+def square_job(items):
+    if any(item < 0 for item in items):
+        raise ValueError("negative item")
+    return [item * item for item in items]
+
+async def submit_together(batcher, *callers):
+    return await asyncio.gather(*(batcher.submit(items) for items in callers), return_exceptions=True)
+
+def test_failing_caller_does_not_fail_the_batch():
+    batcher = MicroBatcher("test", square_job, max_batch_size=16, max_wait_ms=50)
+    good, bad, other = asyncio.run(submit_together(batcher, [1, 2], [3, -1], [4]))
+
+    assert good == [1, 4]
+    assert isinstance(bad, ValueError)
+    assert other == [16]
+    assert batcher.failed_batches == 1
+
+def test_single_caller_failure_propagates():
+    batcher = MicroBatcher("test", square_job, max_batch_size=16, max_wait_ms=0)
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.submit([-2]))
+    assert batcher.failed_batches == 0
+
+batches = []
+
+def recording_job(items):
+    batches.append(list(items))
+    return [f"result {item}" for item in items]
+
+def test_results_are_split_back_in_caller_order():
+    batches.clear()
+    batcher = MicroBatcher("test", recording_job, max_batch_size=64, max_wait_ms=50)
+    results = asyncio.run(submit_together(batcher, ["a1", "a2", "a3"], ["b1"], ["c1", "c2"]))
+
+    assert results == [["result a1", "result a2", "result a3"], ["result b1"], ["result c1", "result c2"]]
+    assert batches == [["a1", "a2", "a3", "b1", "c1", "c2"]]
+    assert batcher.stats()["batch_size_counts"] == {6: 1}
+
+def test_full_batch_is_flushed_without_waiting():
+    batches.clear()
+    batcher = MicroBatcher("test", recording_job, max_batch_size=3, max_wait_ms=60_000)
+
+    async def run():
+        first = await asyncio.wait_for(submit_together(batcher, [1, 2], [3]), timeout=5)
+        second = await asyncio.wait_for(batcher.submit([4, 5, 6, 7]), timeout=5)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == [["result 1", "result 2"], ["result 3"]]
+    assert second == ["result 4", "result 5", "result 6", "result 7"]
+    assert batches == [[1, 2, 3], [4, 5, 6, 7]]
+    assert batcher.stats()["max_batch_seen"] == 4
+
+def test_empty_submit_does_not_run_a_batch():
+    batcher = MicroBatcher("test", recording_job, max_batch_size=4, max_wait_ms=0)
+    assert asyncio.run(batcher.submit([])) == []
+    assert batcher.batches == 0
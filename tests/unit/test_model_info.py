@@ -0,0 +1,23 @@
+from app import model_manager as mm
+
+def test_model_info_does_not_load_or_submit(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("a status probe must not load models or run inference jobs")
+    monkeypatch.setattr(mm.model_manager, "load", fail)
+    monkeypatch.setattr(mm, "run_inference", fail)
+
+    info = mm.get_model_info()
+    assert info["initialized"] is False
+    assert info["backend"] == mm.model_manager.backend
+    assert info["workers"] == mm.INFERENCE_WORKERS
+
+def test_model_info_in_process_mode_uses_startup_details(monkeypatch):
+    monkeypatch.setattr(mm, "INFERENCE_EXECUTOR", "process")
+    monkeypatch.setattr(mm, "_workers_ready", True)
+    monkeypatch.setattr(mm, "_worker_model_info", {"backend": "onnx", "device": "cpu", "initialized": True})
+    monkeypatch.setattr(mm, "run_inference", None)
+
+    info = mm.get_model_info()
+    assert info["initialized"] is True
+    assert info["device"] == "cpu"
+    assert info["executor"] == "process"
@@ -0,0 +1,36 @@
+import numpy as np
+
+from app.model_manager import ModelManager, DetectorSettings
+
+class CropDetector:
+    """First pass: one proposal per ``faces`` entry of the image; refinement: one box per crop."""
+
+    def __init__(self, faces):
+        self.faces = faces
+
+    def detect(self, images, imgsz):
+        if imgsz == DetectorSettings().imgsz:
+            return [(np.array(self.faces[id(image)], dtype=np.float32), np.full(len(self.faces[id(image)]), 0.9, dtype=np.float32), 5.0)
+                    for image in images]
+        # Refinement: a crop costs 10 ms and contains one face filling it
+        return [(np.array([[0, 0, crop.shape[1], crop.shape[0]]], dtype=np.float32), np.array([0.9], dtype=np.float32), 10.0)
+                for crop in images]
+
+def test_refine_time_is_charged_per_image():
+    crowded = np.zeros((600, 600, 3), dtype=np.uint8)
+    single = np.zeros((600, 600, 3), dtype=np.uint8)
+    boxes = {
+        id(crowded): [[20, 20, 60, 60], [200, 200, 240, 240], [400, 400, 440, 440]],
+        id(single): [[300, 300, 340, 340]],
+    }
+    manager = ModelManager()
+    manager.detector = CropDetector(boxes)
+    manager._initialized = True
+
+    two_pass = DetectorSettings(two_pass=True)
+    (crowded_boxes, crowded_time), (single_boxes, single_time) = manager.detect_faces_batch(
+        [crowded, single], [0.5, 0.5], [two_pass, two_pass])
+
+    # First pass 5 ms plus 10 ms per refined crop, spread over the faces found
+    assert len(crowded_boxes) == 3 and crowded_time == (5 + 30) / 3
+    assert len(single_boxes) == 1 and single_time == 5 + 10
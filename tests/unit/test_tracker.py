@@ -0,0 +1,59 @@
+from app.tracker import FaceTracker
+
+CONFIDENT = {"status": "ok", "label": "Ann", "confidence": 0.9}
+
+def shifted(box, dx):
+    x1, y1, x2, y2 = box
+    return [x1 + dx, y1, x2 + dx, y2]
+
+BOX = [100, 100, 200, 200]
+
+def first_decision(tracker, result=CONFIDENT, box=BOX, now=0.0):
+    (track, needs_embedding), = tracker.update([box], now=now)
+    assert needs_embedding  # New tracks are always embedded
+    tracker.record(track, result)
+    return track
+
+def test_steady_face_reuses_its_decision():
+    tracker = FaceTracker(iou_threshold=0.3, reembed_iou=0.5, max_age_s=1.0)
+    track = first_decision(tracker)
+
+    (same, needs_embedding), = tracker.update([shifted(BOX, 10)], now=0.1)  # IoU 0.82
+    assert same is track and not needs_embedding
+    assert tracker.stats() == {"tracks": 1, "embedded": 1, "reused": 1}
+
+def test_face_that_moved_from_its_decision_is_reembedded():
+    tracker = FaceTracker(iou_threshold=0.3, reembed_iou=0.5, max_age_s=1.0)
+    track = first_decision(tracker)
+
+    # Each step overlaps the previous box enough to keep the track, drifting from the decision box
+    (same, needs_embedding), = tracker.update([shifted(BOX, 20)], now=0.1)
+    assert same is track and not needs_embedding
+    (same, needs_embedding), = tracker.update([shifted(BOX, 40)], now=0.2)  # IoU with decision box 0.43
+    assert same is track and needs_embedding
+
+def test_unconfident_decision_is_reembedded():
+    tracker = FaceTracker(iou_threshold=0.3, reembed_iou=0.5, max_age_s=1.0)
+    track = first_decision(tracker, result={"status": "unconfident", "label": "unknown", "confidence": 0.4})
+
+    (same, needs_embedding), = tracker.update([BOX], now=0.1)
+    assert same is track and needs_embedding
+
+def test_stale_track_is_replaced():
+    tracker = FaceTracker(iou_threshold=0.3, reembed_iou=0.5, max_age_s=1.0)
+    track = first_decision(tracker)
+
+    (new, needs_embedding), = tracker.update([BOX], now=1.5)
+    assert new is not track and needs_embedding
+
+def test_each_box_keeps_its_own_track():
+    tracker = FaceTracker(iou_threshold=0.3, reembed_iou=0.5, max_age_s=1.0)
+    left_box, right_box = [0, 0, 100, 100], [300, 0, 400, 100]
+    (left, _), (right, _) = tracker.update([left_box, right_box], now=0.0)
+    tracker.record(left, CONFIDENT)
+    tracker.record(right, CONFIDENT)
+
+    # Boxes come back in the other order
+    (first, first_embed), (second, second_embed) = tracker.update([shifted(right_box, 5), shifted(left_box, 5)], now=0.1)
+    assert (first, second) == (right, left)
+    assert not first_embed and not second_embed
@@ -0,0 +1,42 @@
+import numpy as np
+
+from app.faiss_search import weighted_vote
+
+def weighted_vote_loop(distances, indices, label_array):
+    """Per-row voting loop that weighted_vote replaced."""
+    results = []
+    for row_distances, row_indices in zip(distances, indices):
+        label_scores = {}
+        for idx, dist in zip(row_indices, row_distances):
+            if 0 <= idx < len(label_array):
+                label = label_array[idx]
+                label_scores[label] = label_scores.get(label, 0) + 1 / (dist + 1e-8)
+        if not label_scores:
+            results.append(None)
+            continue
+        pred_label = max(label_scores, key=label_scores.get)
+        results.append((pred_label, label_scores[pred_label] / sum(label_scores.values())))
+    return results
+
+def test_weighted_vote_matches_loop():
+    rng = np.random.default_rng(0)
+    label_array = rng.integers(1, 8, 50).astype(np.int32)
+    distances = rng.uniform(0.05, 2.0, (200, 10)).astype(np.float32)
+    indices = rng.integers(-1, 55, (200, 10)).astype(np.int64)  # -1 and out-of-range neighbors included
+    indices[3] = -1  # A row without any valid neighbor
+
+    pred_labels, vote_ratios, has_votes = weighted_vote(distances, indices, label_array)
+
+    for row, expected in enumerate(weighted_vote_loop(distances, indices, label_array)):
+        if expected is None:
+            assert not has_votes[row]
+            continue
+        assert has_votes[row]
+        assert pred_labels[row] == expected[0]
+        np.testing.assert_allclose(vote_ratios[row], expected[1], rtol=1e-6)
+
+def test_weighted_vote_without_any_neighbor():
+    pred_labels, vote_ratios, has_votes = weighted_vote(
+        np.ones((2, 3), dtype=np.float32), np.full((2, 3), -1), np.array([1, 2], dtype=np.int32))
+    assert not has_votes.any()
+    assert vote_ratios.tolist() == [0.0, 0.0]